@@ -2,7 +2,6 @@
 Core module - Engine et logique principale
 """
 
-from core.engine import SearchEngine
 from core.validators import (
     validate_email,
     validate_phone,
@@ -21,3 +20,12 @@ __all__ = [
     'normalize_phone',
     'normalize_username',
 ]
+
+
+def __getattr__(name):
+    # SearchEngine importe les modules de recherche, qui importent eux-mêmes
+    # des utilitaires de core : import différé pour éviter le cycle
+    if name == 'SearchEngine':
+        from core.engine import SearchEngine
+        return SearchEngine
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
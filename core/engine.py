@@ -5,15 +5,19 @@ Résultats réels des APIs publiques et recherches parallélisées
 """
 
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, List, Any
+from typing import Callable, Dict, List, Any
 import logging
 from datetime import datetime
 
+import phonenumbers
+
 from modules.email_lookup import EmailLookup
-from modules.phone_lookup import PhoneLookup
+from modules.phone_lookup import PhoneLookup, PhoneContext
 from modules.username_lookup import UsernameLookup
 from core.validators import validate_email, validate_phone, validate_username
 from storage.database import CacheDB
+from core.http import get_http_cache
+from storage.breach_catalog import get_breach_catalog
 
 logger = logging.getLogger(__name__)
 
@@ -28,8 +32,14 @@ class SearchEngine:
         self.executor = ThreadPoolExecutor(max_workers=max_workers)
         self.max_workers = max_workers
     
-    def search_email(self, email: str, deep_scan: bool = False) -> Dict[str, Any]:
-        """Recherche complète par email avec cache"""
+    def search_email(self, email: str, deep_scan: bool = False, skip_sources=None) -> Dict[str, Any]:
+        """Recherche complète par email avec cache
+        
+        `skip_sources` peut contenir 'breaches', 'domain' et 'holehe' pour
+        éviter les sources coûteuses (ex: domaine sans courrier) ; un tel
+        résultat partiel n'est pas mis en cache.
+        """
+        skip_sources = set(skip_sources or ())
         if not validate_email(email):
             logger.error(f"Email invalide: {email}")
             return {"error": "Email invalide", "email": email}
@@ -54,6 +64,8 @@ class SearchEngine:
             "timestamp": None,
             "from_cache": False
         }
+        if skip_sources:
+            results["skipped_sources"] = sorted(skip_sources)
         
         try:
             logger.info(f"Démarrage recherche email: {email}")
@@ -63,10 +75,13 @@ class SearchEngine:
             futures = {
                 self.executor.submit(self.email_lookup.check_reputation, email): 'reputation',
                 self.executor.submit(self.email_lookup.check_dns, email): 'dns',
-                self.executor.submit(self.email_lookup.check_breaches, email): 'breaches',
-                self.executor.submit(self.email_lookup.verify_domain_registration, email): 'domain',
-                self.executor.submit(self.email_lookup.search_social_profiles, email): 'social_profiles',
+                self.executor.submit(self.email_lookup.search_social_profiles, email, None,
+                                     'holehe' not in skip_sources): 'social_profiles',
             }
+            if 'breaches' not in skip_sources:
+                futures[self.executor.submit(self.email_lookup.breach_report, email)] = 'breach_report'
+            if 'domain' not in skip_sources:
+                futures[self.executor.submit(self.email_lookup.verify_domain_registration, email)] = 'domain'
             
             for future in as_completed(futures):
                 key = futures[future]
@@ -78,6 +93,12 @@ class SearchEngine:
                     logger.error(f"Erreur {key}: {e}")
                     results[key] = {}
             
+            # Fuites : liste normalisée + statut/latence par fournisseur
+            report = results.pop("breach_report", None)
+            if report is not None:
+                results["breaches"] = report.get("breaches", [])
+                results["breach_providers"] = report.get("providers", {})
+            
             # Agrégation
             results["sources"] = {
                 "reputation": results["reputation"],
@@ -95,8 +116,9 @@ class SearchEngine:
             results["search_time"] = (end_time - start_time).total_seconds()
             results["timestamp"] = end_time.isoformat()
             
-            # Cache
-            self.cache.save_email(email, results)
+            # Cache : un résultat partiel (sources ignorées) ne doit pas servir aux recherches complètes
+            if not skip_sources:
+                self.cache.save_email(email, results)
             
             logger.info(f"Email search terminée: {email} - Confiance: {results['confidence']}%")
             
@@ -106,9 +128,42 @@ class SearchEngine:
         
         return results
     
+    def search_email_batch(self, emails: List[str], deep_scan: bool = False,
+                           max_in_flight: int = 50) -> List[Dict[str, Any]]:
+        """Recherche d'une liste d'emails avec pré-résolution DNS des domaines
+        
+        Les domaines de tout le lot sont résolus en une passe concurrente ;
+        pour les domaines sans courrier (NXDOMAIN, MX nul, ni MX ni A), les
+        sources coûteuses (HIBP, holehe, WHOIS) sont ignorées. Les autres
+        sont interrogés en RDAP/WHOIS en une passe limitée par serveur.
+        """
+        valid = [e for e in dict.fromkeys(e.strip() for e in emails) if e and validate_email(e)]
+        statuses = self.email_lookup.prefetch_domains(
+            (e.split('@')[1] for e in valid), max_in_flight=max_in_flight
+        )
+        self.email_lookup.prefetch_registrations(
+            domain for domain, status in statuses.items() if status.get('status') != 'dead'
+        )
+        
+        results = []
+        for email in valid:
+            status = statuses.get(email.split('@')[1].lower(), {})
+            skip = {'breaches', 'domain', 'holehe'} if status.get('status') == 'dead' else None
+            result = self.search_email(email, deep_scan, skip_sources=skip)
+            result['domain_status'] = status
+            results.append(result)
+        
+        return results
+    
     def search_phone(self, phone: str, country: str = "FR", deep_scan: bool = False) -> Dict[str, Any]:
         """Recherche complète par téléphone"""
-        if not validate_phone(phone, country):
+        # Numéro parsé une seule fois, partagé par toutes les sources locales
+        try:
+            ctx = PhoneContext(phone, country)
+        except phonenumbers.NumberParseException as e:
+            logger.debug(f"Phone parsing erreur: {e}")
+            ctx = None
+        if ctx is None or not ctx.valid:
             logger.error(f"Téléphone invalide: {phone}")
             return {"error": "Téléphone invalide", "phone": phone}
         
@@ -139,17 +194,17 @@ class SearchEngine:
             logger.info(f"Démarrage recherche phone: {phone}")
             start_time = datetime.now()
             
-            # Recherche parallélisée
+            # Recherche parallélisée (sources réseau uniquement)
             futures = {
-                self.executor.submit(self.phone_lookup.get_carrier_info, phone, country): 'carrier_info',
-                self.executor.submit(self.phone_lookup.get_location, phone, country): 'location',
                 self.executor.submit(self.phone_lookup.check_reputation, phone): 'reputation',
                 self.executor.submit(self.phone_lookup.search_data_brokers, phone): 'data_brokers',
                 self.executor.submit(self.phone_lookup.search_social, phone): 'social_profiles',
                 self.executor.submit(self.phone_lookup.check_spam_reports, phone): 'spam_reports',
-                self.executor.submit(self.phone_lookup.get_voip_provider, phone, country): 'voip_info',
             }
             
+            # Sources locales : une étape synchrone pendant que le réseau travaille
+            results.update(self.phone_lookup.offline_lookup(ctx))
+            
             for future in as_completed(futures):
                 key = futures[future]
                 try:
@@ -159,12 +214,6 @@ class SearchEngine:
                 except Exception as e:
                     logger.error(f"Erreur {key}: {e}")
             
-            # Timezone
-            try:
-                results['timezone'] = self.phone_lookup.get_timezone(phone, country)
-            except Exception as e:
-                logger.debug(f"Timezone erreur: {e}")
-            
             # Confiance
             results["confidence"] = self._calculate_confidence(results)
             
@@ -182,8 +231,9 @@ class SearchEngine:
         
         return results
     
-    def search_username(self, username: str, deep_scan: bool = False) -> Dict[str, Any]:
-        """Recherche complète par pseudo"""
+    def search_username(self, username: str, deep_scan: bool = False,
+                        on_profile: Callable[[Dict[str, Any]], None] = None) -> Dict[str, Any]:
+        """Recherche complète par pseudo (`on_profile` reçoit chaque profil dès qu'il est connu)"""
         if not validate_username(username):
             logger.error(f"Username invalide: {username}")
             return {"error": "Username invalide", "username": username}
@@ -213,7 +263,11 @@ class SearchEngine:
             
             # 1. Réseaux sociaux
             logger.debug("Recherche réseaux sociaux...")
-            social_results = self.username_lookup.search_all_platforms(username)
+            if deep_scan:
+                # Sherlock en parallèle, fusionné aux sondes natives au fil de l'eau
+                social_results = self.username_lookup.search_with_sherlock(username, on_result=on_profile)
+            else:
+                social_results = self.username_lookup.search_all_platforms(username, on_result=on_profile)
             results["social_media"] = social_results
             
             # 2. GitHub
@@ -354,10 +408,14 @@ class SearchEngine:
         return {
             'cache_dir': str(self.cache.db_path),
             'cache_enabled': True,
-            'ttl_hours': 24
+            'ttl_hours': 24,
+            'http_cache': get_http_cache().get_stats(),
+            'breach_catalog': get_breach_catalog().get_stats()
         }
     
     def clear_cache(self, days: int = 7) -> None:
         """Nettoyer le cache"""
         self.cache.clear_old_cache(days)
+        get_http_cache().clear_old_cache(days)
+        get_breach_catalog().clear_old_cache(days)
         logger.info(f"Cache nettoyé (> {days} jours)")
\ No newline at end of file
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+http.py - Session HTTP avec cache conditionnel sur disque
+Fraîcheur selon Cache-Control/Expires, revalidation ETag/Last-Modified (RFC 7234)
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from config import get_config
+from storage.http_cache import HTTPCache
+
+logger = logging.getLogger(__name__)
+
+# En-têtes propres à une connexion, jamais stockés (RFC 7230 §6.1)
+HOP_BY_HOP = {'connection', 'keep-alive', 'transfer-encoding', 'te', 'trailer', 'upgrade',
+              'proxy-authenticate', 'proxy-authorization', 'content-encoding', 'content-length'}
+
+# En-têtes de requête inclus dans la clé de cache : négociation et identité
+KEYED_HEADERS = ('accept', 'accept-language', 'authorization', 'cookie')
+# Clés d'API passées en en-tête (hibp-api-key, X-API-Key, x-apikey...)
+_CREDENTIAL_MARKERS = ('api-key', 'apikey', 'api_key', 'token')
+# Variations sans effet sur le corps stocké (déjà décodé par requests)
+_IGNORED_VARY = {'accept-encoding'}
+# Entrée réservée des en-têtes stockés : valeurs de requête désignées par Vary
+VARY_VALUES_HEADER = 'X-Raven-Vary-Values'
+
+
+def _keyed(name: str) -> bool:
+    name = name.lower()
+    return name in KEYED_HEADERS or any(marker in name for marker in _CREDENTIAL_MARKERS)
+
+
+def vary_values(vary: str, request_headers) -> Optional[Dict[str, str]]:
+    """Valeurs de la requête pour chaque en-tête cité par Vary (None pour `Vary: *`)"""
+    names = {v.strip().lower() for v in (vary or '').split(',') if v.strip()}
+    if '*' in names:
+        return None
+    # En-tête absent stocké comme "" : il doit rester absent pour resservir la réponse
+    return {name: request_headers.get(name) or '' for name in sorted(names - _IGNORED_VARY)}
+
+
+def parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    """Parser un en-tête Cache-Control en {directive: valeur}"""
+    directives = {}
+    for part in (value or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, arg = part.partition('=')
+        directives[name.strip().lower()] = arg.strip().strip('"') or None
+    return directives
+
+
+def _http_date(value: str) -> Optional[float]:
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def freshness_deadline(headers, now: float = None) -> float:
+    """Timestamp jusqu'auquel la réponse est fraîche (0 = à revalider)"""
+    now = now if now is not None else time.time()
+    cc = parse_cache_control(headers.get('Cache-Control', ''))
+    if 'no-cache' in cc:
+        return 0.0
+
+    try:
+        age = float(headers.get('Age', 0))
+    except ValueError:
+        age = 0.0
+
+    if cc.get('max-age') is not None:
+        try:
+            return now + int(cc['max-age']) - age
+        except ValueError:
+            return 0.0
+
+    expires = _http_date(headers.get('Expires'))
+    if expires is not None:
+        date = _http_date(headers.get('Date')) or now
+        return now + (expires - date) - age
+
+    return 0.0
+
+
+class CachedSession(requests.Session):
+    """requests.Session dont les GET passent par le cache HTTP disque
+
+    Chaque réponse porte `cache_status` : 'hit' (servie sans réseau),
+    'revalidated' (304 du serveur, corps lu sur disque) ou 'miss'.
+    """
+
+    def __init__(self, cache: HTTPCache = None, max_entry_bytes: int = None):
+        super().__init__()
+        config = get_config()
+        self.cache_enabled = config.get('cache.http_enabled', True)
+        self.max_entry_bytes = max_entry_bytes or int(config.get('cache.http_max_entry_mb', 50)) * 1024 * 1024
+        self.cache = cache or (get_http_cache() if self.cache_enabled else None)
+
+    def _cache_key(self, url: str, headers) -> str:
+        # Les réponses authentifiées ne sont pas partagées entre identités (ni entre clés d'API)
+        keyed = sorted((name.lower(), value) for name, value in headers.items() if value and _keyed(name))
+        material = '\n'.join([url] + [f"{name}: {value}" for name, value in keyed])
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def request(self, method, url, params=None, headers=None, **kwargs):
+        if (method.upper() != 'GET' or not self.cache_enabled or self.cache is None
+                or kwargs.get('stream')):
+            return super().request(method, url, params=params, headers=headers, **kwargs)
+
+        full_url = requests.Request('GET', url, params=params).prepare().url
+        merged = CaseInsensitiveDict(self.headers)
+        merged.update(headers or {})
+        key = self._cache_key(full_url, merged)
+        entry = self.cache.get(key)
+        if entry and not self._vary_matches(entry, merged):
+            entry = None
+        request_cc = parse_cache_control(merged.get('Cache-Control', ''))
+
+        if entry and 'no-cache' not in request_cc and time.time() < entry['expires_at']:
+            logger.debug(f"HTTP cache hit: {full_url}")
+            return self._from_entry(entry, full_url, 'hit')
+
+        conditional = dict(headers or {})
+        if entry:
+            stored = CaseInsensitiveDict(entry['headers'])
+            if stored.get('ETag'):
+                conditional['If-None-Match'] = stored['ETag']
+            if stored.get('Last-Modified'):
+                conditional['If-Modified-Since'] = stored['Last-Modified']
+
+        resp = super().request(method, url, params=params, headers=conditional, **kwargs)
+
+        if resp.status_code == 304 and entry:
+            stored = CaseInsensitiveDict(entry['headers'])
+            stored.update({k: v for k, v in resp.headers.items() if k.lower() not in HOP_BY_HOP})
+            varied = vary_values(stored.get('Vary', ''), merged)
+            if varied is not None:
+                stored[VARY_VALUES_HEADER] = json.dumps(varied)
+            entry['headers'] = dict(stored)
+            self.cache.refresh(key, entry['headers'], freshness_deadline(stored))
+            logger.debug(f"HTTP cache revalidated: {full_url}")
+            return self._from_entry(entry, full_url, 'revalidated', resp)
+
+        resp.cache_status = 'miss'
+        if resp.status_code == 200:
+            self._store(key, full_url, resp, merged)
+        return resp
+
+    @staticmethod
+    def _vary_matches(entry, request_headers) -> bool:
+        """La requête présente-t-elle les mêmes valeurs que celle qui a produit l'entrée ?"""
+        stored = CaseInsensitiveDict(entry['headers'])
+        expected = json.loads(stored.get(VARY_VALUES_HEADER) or '{}')
+        return all((request_headers.get(name) or '') == value for name, value in expected.items())
+
+    def _store(self, key: str, url: str, resp: requests.Response, request_headers) -> None:
+        """Stocker la réponse si elle est réutilisable"""
+        cc = parse_cache_control(resp.headers.get('Cache-Control', ''))
+        if 'no-store' in cc:
+            return
+        # Vary: * : la réponse ne peut jamais être resservie
+        varied = vary_values(resp.headers.get('Vary', ''), request_headers)
+        if varied is None:
+            return
+
+        expires_at = freshness_deadline(resp.headers)
+        has_validators = bool(resp.headers.get('ETag') or resp.headers.get('Last-Modified'))
+        if not has_validators and expires_at <= time.time():
+            return
+        if len(resp.content) > self.max_entry_bytes:
+            return
+
+        headers = {k: v for k, v in resp.headers.items() if k.lower() not in HOP_BY_HOP}
+        if varied:
+            headers[VARY_VALUES_HEADER] = json.dumps(varied)
+        self.cache.put(key, url, resp.status_code, headers, resp.content, expires_at)
+
+    @staticmethod
+    def _from_entry(entry, url: str, status: str, origin: requests.Response = None) -> requests.Response:
+        """Reconstruire une Response à partir d'une entrée du cache"""
+        resp = requests.Response()
+        resp.status_code = entry['status']
+        resp.headers = CaseInsensitiveDict(entry['headers'])
+        resp.headers.pop(VARY_VALUES_HEADER, None)
+        resp._content = bytes(entry['body'])
+        resp.url = url
+        resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+        resp.reason = 'OK'
+        if origin is not None:
+            resp.request = origin.request
+            resp.elapsed = origin.elapsed
+        resp.cache_status = status
+        return resp
+
+
+# Cache partagé (créé au premier usage)
+_http_cache = None
+_http_cache_lock = threading.Lock()
+
+def get_http_cache() -> HTTPCache:
+    """Obtenir le cache HTTP partagé"""
+    global _http_cache
+    with _http_cache_lock:
+        if _http_cache is None:
+            _http_cache = HTTPCache()
+        return _http_cache
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+resolver.py - Résolution DNS asynchrone partagée avec cache TTL
+Les requêtes d'un même lot partent en parallèle via dns.asyncresolver
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import dns.asyncresolver
+import dns.exception
+import dns.resolver
+
+logger = logging.getLogger(__name__)
+
+Query = Tuple[str, str]
+
+
+class DNSResolver:
+    """Résolveur partagé avec cache des réponses respectant les TTL
+
+    Chaque résultat est un dict {'records': [rdata, ...], 'status': ...}
+    où status vaut NOERROR, NXDOMAIN, NODATA, TIMEOUT ou ERROR.
+    Les réponses négatives (NXDOMAIN/NODATA) sont mises en cache
+    `negative_ttl` secondes ; les échecs réseau ne le sont pas.
+    """
+
+    def __init__(self, timeout: float = 5.0, negative_ttl: int = 300, max_ttl: int = 86400):
+        self.resolver = dns.asyncresolver.Resolver()
+        self.resolver.timeout = timeout
+        self.resolver.lifetime = timeout
+        self.negative_ttl = negative_ttl
+        self.max_ttl = max_ttl
+        self._cache: Dict[Query, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _cached(self, query: Query) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._cache.get(query)
+            if entry and entry[0] > time.time():
+                return entry[1]
+            if entry:
+                del self._cache[query]
+        return None
+
+    def _store(self, query: Query, result: Dict[str, Any], ttl: float) -> None:
+        with self._lock:
+            self._cache[query] = (time.time() + min(ttl, self.max_ttl), result)
+
+    async def _resolve(self, query: Query, semaphore: Optional[asyncio.Semaphore]) -> Dict[str, Any]:
+        name, rdtype = query
+        try:
+            if semaphore is not None:
+                async with semaphore:
+                    answer = await self.resolver.resolve(name, rdtype)
+            else:
+                answer = await self.resolver.resolve(name, rdtype)
+            result = {'records': list(answer), 'status': 'NOERROR'}
+            self._store(query, result, max(0.0, answer.expiration - time.time()))
+            return result
+        except dns.resolver.NXDOMAIN:
+            result = {'records': [], 'status': 'NXDOMAIN'}
+            self._store(query, result, self.negative_ttl)
+        except dns.resolver.NoAnswer:
+            result = {'records': [], 'status': 'NODATA'}
+            self._store(query, result, self.negative_ttl)
+        except dns.exception.Timeout:
+            result = {'records': [], 'status': 'TIMEOUT'}
+        except Exception as e:
+            logger.debug(f"DNS {rdtype} {name} erreur: {e}")
+            result = {'records': [], 'status': 'ERROR'}
+        return result
+
+    async def resolve_many_async(self, queries: Iterable[Query],
+                                 max_in_flight: int = None) -> Dict[Query, Dict[str, Any]]:
+        """Version coroutine de resolve_many"""
+        results: Dict[Query, Dict[str, Any]] = {}
+        pending = []
+        for query in dict.fromkeys(queries):
+            cached = self._cached(query)
+            if cached is not None:
+                results[query] = cached
+            else:
+                pending.append(query)
+
+        if pending:
+            semaphore = asyncio.Semaphore(max_in_flight) if max_in_flight else None
+            answers = await asyncio.gather(*(self._resolve(q, semaphore) for q in pending))
+            results.update(zip(pending, answers))
+        return results
+
+    def resolve_many(self, queries: Iterable[Query], max_in_flight: int = None) -> Dict[Query, Dict[str, Any]]:
+        """Résoudre un lot de (nom, type) en parallèle ; pire cas = un seul timeout
+
+        Appel bloquant : depuis une coroutine, utiliser `await resolve_many_async(...)`.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.resolve_many_async(queries, max_in_flight))
+        raise RuntimeError("resolve_many() appelé dans une boucle asyncio active : "
+                           "utiliser `await resolve_many_async(...)`")
+
+    def resolve(self, name: str, rdtype: str) -> Dict[str, Any]:
+        """Résoudre une seule requête (cache inclus)"""
+        return self.resolve_many([(name, rdtype)])[(name, rdtype)]
+
+    def records(self, name: str, rdtype: str) -> List[Any]:
+        """Enregistrements d'une requête, liste vide en cas d'échec"""
+        return self.resolve(name, rdtype)['records']
+
+    def clear(self) -> None:
+        """Vider le cache"""
+        with self._lock:
+            self._cache.clear()
+
+
+# Résolveur partagé (créé au premier usage)
+_resolver = None
+_resolver_lock = threading.Lock()
+
+def get_resolver() -> DNSResolver:
+    """Obtenir le résolveur DNS partagé"""
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = DNSResolver()
+        return _resolver
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+scheduler.py - Ordonnanceur de requêtes avec limite par hôte
+Un seul pool de workers partagé, files d'attente par hôte servies à tour de rôle
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+def host_of(url: str) -> str:
+    """Extraire l'hôte d'une URL (clé de limitation)"""
+    host = urlparse(url).hostname or url
+    return host[4:] if host.startswith('www.') else host
+
+
+class HostScheduler:
+    """Exécute des tâches HTTP en limitant la concurrence par hôte
+
+    Les tâches sont regroupées par hôte puis distribuées à tour de rôle,
+    si bien qu'aucun site n'est martelé et que la durée totale tend vers
+    celle de la file d'hôte la plus longue.
+    """
+
+    def __init__(self, max_workers: int = 20, per_host: int = 2, min_interval: float = 0.0):
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.min_interval = min_interval
+
+    def run(self, tasks: Iterable[Tuple[Any, str, Callable, tuple]],
+            deadline: Optional[float] = None) -> Iterator[Tuple[Any, Any, Optional[str]]]:
+        """Exécuter les tâches (key, url, func, args) et produire (key, result, error)
+
+        Les résultats sont produits au fil de l'eau. Si `deadline` (timestamp
+        time.monotonic) est dépassé, les tâches restantes sont produites avec
+        l'erreur 'timeout'.
+        """
+        queues: Dict[str, deque] = OrderedDict()
+        for task in tasks:
+            queues.setdefault(host_of(task[1]), deque()).append(task)
+
+        in_flight: Dict[str, int] = {host: 0 for host in queues}
+        last_start: Dict[str, float] = {}
+        running = {}
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            while queues or running:
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    break
+
+                # Distribution à tour de rôle : une tâche par hôte et par passe
+                dispatched = True
+                while dispatched and len(running) < self.max_workers:
+                    dispatched = False
+                    for host in list(queues):
+                        if len(running) >= self.max_workers:
+                            break
+                        if in_flight[host] >= self.per_host:
+                            continue
+                        if self.min_interval and now - last_start.get(host, 0.0) < self.min_interval:
+                            continue
+                        key, url, func, args = queues[host].popleft()
+                        if not queues[host]:
+                            del queues[host]
+                        future = executor.submit(func, *args)
+                        running[future] = (key, host)
+                        in_flight[host] += 1
+                        last_start[host] = now
+                        dispatched = True
+
+                if not running:
+                    # Uniquement des hôtes en attente de leur intervalle minimal
+                    time.sleep(self.min_interval / 4 or 0.01)
+                    continue
+
+                timeout = None
+                if deadline is not None:
+                    timeout = max(0.0, deadline - time.monotonic())
+                if self.min_interval and queues:
+                    timeout = min(timeout if timeout is not None else self.min_interval, self.min_interval)
+
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key, host = running.pop(future)
+                    in_flight[host] -= 1
+                    try:
+                        yield key, future.result(), None
+                    except Exception as e:
+                        logger.debug(f"Tâche {key} ({host}) erreur: {e}")
+                        yield key, None, str(e)
+
+            # Deadline atteinte : signaler tout ce qui n'a pas abouti
+            for key, host in running.values():
+                yield key, None, 'timeout'
+            for queue in queues.values():
+                for key, *_ in queue:
+                    yield key, None, 'timeout'
+        finally:
+            # Ne pas attendre les requêtes encore en vol au-delà de la deadline
+            for future in running:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+
+class HostRateLimiter:
+    """Intervalle minimal entre deux requêtes vers un même hôte (thread-safe)"""
+
+    def __init__(self, min_interval: float = 1.0):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next: Dict[str, float] = {}
+
+    def wait(self, host: str, min_interval: Optional[float] = None) -> None:
+        """Bloquer jusqu'à ce que le prochain appel vers `host` soit autorisé"""
+        interval = self.min_interval if min_interval is None else min_interval
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, 0.0))
+            self._next[host] = slot + interval
+        if slot > now:
+            time.sleep(slot - now)
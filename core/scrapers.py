@@ -8,6 +8,7 @@ import logging
 from typing import Dict, List, Any
 from bs4 import BeautifulSoup
 from utils.helpers import get_random_user_agent
+from sources.github_api import get_github_client
 
 logger = logging.getLogger(__name__)
 
@@ -67,11 +68,9 @@ class GitHubScraper(BaseScraper):
         results = {}
         
         try:
-            url = f"https://api.github.com/users/{username}"
-            resp = self.fetch(url)
+            data = get_github_client().get_user(username)
             
-            if resp and resp.status_code == 200:
-                data = resp.json()
+            if data:
                 results = {
                     'username': data.get('login'),
                     'name': data.get('name'),
@@ -92,24 +91,19 @@ class GitHubScraper(BaseScraper):
         
         return results
     
-    def search_repositories(self, username: str) -> List[Dict[str, Any]]:
-        """Chercher les repos d'un utilisateur"""
+    def search_repositories(self, username: str, max_pages: int = 10) -> List[Dict[str, Any]]:
+        """Chercher les repos d'un utilisateur (toutes les pages)"""
         repos = []
         
         try:
-            url = f"https://api.github.com/users/{username}/repos?per_page=100"
-            resp = self.fetch(url)
-            
-            if resp and resp.status_code == 200:
-                data = resp.json()
-                for repo in data:
-                    repos.append({
-                        'name': repo.get('name'),
-                        'url': repo.get('html_url'),
-                        'description': repo.get('description'),
-                        'stars': repo.get('stargazers_count'),
-                        'language': repo.get('language'),
-                    })
+            for repo in get_github_client().get_repositories(username, max_pages=max_pages):
+                repos.append({
+                    'name': repo.get('name'),
+                    'url': repo.get('html_url'),
+                    'description': repo.get('description'),
+                    'stars': repo.get('stargazers_count'),
+                    'language': repo.get('language'),
+                })
         except Exception as e:
             logger.debug(f"GitHub repos search error: {e}")
         
@@ -205,10 +199,19 @@ class InstagramScraper(BaseScraper):
         
         return results
 
-# Instances globales
-linkedin_scraper = LinkedInScraper()
-github_scraper = GitHubScraper()
-twitter_scraper = TwitterScraper()
-reddit_scraper = RedditScraper()
-whitepages_scraper = WhitepagesScraper()
-instagram_scraper = InstagramScraper()
\ No newline at end of file
+# Instances globales, créées au premier accès (le user agent charge fake_useragent)
+_INSTANCES = {
+    'linkedin_scraper': LinkedInScraper,
+    'github_scraper': GitHubScraper,
+    'twitter_scraper': TwitterScraper,
+    'reddit_scraper': RedditScraper,
+    'whitepages_scraper': WhitepagesScraper,
+    'instagram_scraper': InstagramScraper,
+}
+
+
+def __getattr__(name):
+    if name in _INSTANCES:
+        instance = globals()[name] = _INSTANCES[name]()
+        return instance
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+supervisor.py - Exécution supervisée des outils externes
+Concurrence bornée (globale et par outil), nice/rlimits, arrêt à l'échéance,
+sorties analysées mises en cache par (outil, version, arguments)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import signal
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from config import get_config
+from core.tools import get_tool_locator
+
+logger = logging.getLogger(__name__)
+
+try:
+    import resource
+    HAS_RESOURCE = hasattr(resource, 'prlimit')
+except ImportError:
+    HAS_RESOURCE = False
+
+
+class ToolSupervisor:
+    """Lance les outils externes sans surcharger la machine
+
+    Chaque exécution attend une place dans le pool global et dans celui de
+    son outil, sans dépasser l'échéance ; le processus (et son groupe) est
+    tué à l'échéance. Les sorties analysées sont réutilisées tant que
+    l'exécutable n'a pas changé.
+    """
+
+    def __init__(self, max_concurrent: int = 4, per_tool: Dict[str, int] = None, default_per_tool: int = 2,
+                 nice: int = 10, memory_mb: int = 2048, cpu_seconds: int = 600,
+                 cache=None, cache_ttl_hours: float = 24):
+        self.per_tool = per_tool or {}
+        self.default_per_tool = default_per_tool
+        self.nice = nice
+        self.memory_mb = memory_mb
+        self.cpu_seconds = cpu_seconds
+        self.cache_ttl_hours = cache_ttl_hours
+        self._cache = cache
+        self._global = threading.BoundedSemaphore(max_concurrent)
+        self._tool_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        if self._cache is None:
+            from storage.database import CacheDB
+            self._cache = CacheDB()
+        return self._cache
+
+    def _slots(self, tool: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if tool not in self._tool_slots:
+                self._tool_slots[tool] = threading.BoundedSemaphore(self.per_tool.get(tool, self.default_per_tool))
+            return self._tool_slots[tool]
+
+    @contextmanager
+    def slot(self, tool: str, end: float) -> Iterator[bool]:
+        """Réserver une place (outil puis globale) jusqu'à `end` (time.monotonic)
+
+        Produit False si aucune place ne s'est libérée à temps.
+        """
+        slots = self._slots(tool)
+        if not slots.acquire(timeout=max(0.0, end - time.monotonic())):
+            yield False
+            return
+        try:
+            if not self._global.acquire(timeout=max(0.0, end - time.monotonic())):
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                self._global.release()
+        finally:
+            slots.release()
+
+    # ------------------------------------------------------------------
+    # Cache des sorties analysées
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def tool_version(tool: str) -> str:
+        """Empreinte de l'exécutable (chemin, taille, mtime) : change à chaque mise à jour"""
+        path = get_tool_locator().which(tool)
+        if not path:
+            return 'absent'
+        try:
+            stat = os.stat(os.path.realpath(path))
+            return f"{os.path.realpath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+        except OSError:
+            return path
+
+    def cache_key(self, tool: str, args: List[str]) -> Optional[str]:
+        """Clé de cache, None si l'exécutable est introuvable (version inconnue)"""
+        version = self.tool_version(tool)
+        if version == 'absent':
+            return None
+        payload = json.dumps([tool, version, list(args)])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def cached(self, tool: str, args: List[str]) -> Optional[Any]:
+        """Sortie analysée d'une exécution identique récente (None si absente)"""
+        key = self.cache_key(tool, args)
+        return self.cache.get_tool_output(key, self.cache_ttl_hours) if key else None
+
+    def store(self, tool: str, args: List[str], value: Any) -> None:
+        key = self.cache_key(tool, args)
+        if key:
+            self.cache.save_tool_output(key, tool, value)
+
+    # ------------------------------------------------------------------
+    # Exécution
+    # ------------------------------------------------------------------
+
+    def apply_limits(self, pid: int) -> None:
+        """Priorité et limites CPU/mémoire d'un processus lancé"""
+        try:
+            if self.nice:
+                os.setpriority(os.PRIO_PROCESS, pid, self.nice)
+            if HAS_RESOURCE:
+                if self.memory_mb:
+                    limit = self.memory_mb * 1024 * 1024
+                    resource.prlimit(pid, resource.RLIMIT_AS, (limit, limit))
+                if self.cpu_seconds:
+                    resource.prlimit(pid, resource.RLIMIT_CPU, (self.cpu_seconds, self.cpu_seconds))
+        except (OSError, ValueError, AttributeError) as e:
+            logger.debug(f"Limites non appliquées au processus {pid}: {e}")
+
+    @staticmethod
+    def kill_group(process) -> None:
+        """Tuer le processus et son groupe (lancé avec start_new_session=True)"""
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (OSError, AttributeError):
+            process.kill()
+
+    def run(self, command: List[str], timeout: float = 60, deadline: float = None,
+            parser: Callable[[str], Any] = None, cache_args: List[str] = None,
+            use_cache: bool = True) -> Dict[str, Any]:
+        """Exécuter `command` et renvoyer {'status', 'output', 'returncode', 'cached', 'duration'}
+
+        `output` est la sortie analysée par `parser` (stdout brut sinon) ; un
+        code de sortie non nul donne le statut 'partial' : la sortie est
+        analysée et renvoyée mais n'est pas mise en cache.
+        `deadline` est un timestamp time.monotonic commun à plusieurs appels.
+        `cache_args` remplace les arguments dans la clé de cache (fichiers temporaires).
+        """
+        tool, args = command[0], command[1:] if cache_args is None else cache_args
+        result = {'status': 'error', 'output': None, 'returncode': None, 'cached': False, 'duration': 0.0}
+
+        if use_cache:
+            cached = self.cached(tool, args)
+            if cached is not None:
+                result.update(status='ok', output=cached, cached=True)
+                return result
+
+        end = time.monotonic() + timeout
+        if deadline is not None:
+            end = min(end, deadline)
+
+        with self.slot(tool, end) as acquired:
+            if not acquired:
+                result['status'] = 'timeout'
+                return result
+            started = time.monotonic()
+            stdout = self._execute(command, end, result)
+            result['duration'] = time.monotonic() - started
+
+        if result['status'] in ('ok', 'partial'):
+            try:
+                result['output'] = parser(stdout) if parser else stdout
+            except Exception as e:
+                logger.debug(f"Analyse de la sortie de {tool} erreur: {e}")
+                result['status'] = 'error'
+                return result
+            if use_cache and result['status'] == 'ok':
+                self.store(tool, args, result['output'])
+        return result
+
+    def _execute(self, command: List[str], end: float, result: Dict[str, Any]) -> str:
+        try:
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                       text=True, errors='replace', start_new_session=True)
+        except OSError as e:
+            logger.error(f"Erreur commande: {e}")
+            return ''
+
+        self.apply_limits(process.pid)
+        try:
+            stdout, _ = process.communicate(timeout=max(0.0, end - time.monotonic()))
+            result['returncode'] = process.returncode
+            if process.returncode == 0:
+                result['status'] = 'ok'
+            else:
+                # holehe, phoneinfoga, dmitry... sortent souvent en erreur avec des résultats valides
+                logger.warning(f"{command[0]} terminé avec le code {process.returncode}")
+                result['status'] = 'partial'
+            return stdout
+        except subprocess.TimeoutExpired:
+            logger.error(f"Timeout lors de l'exécution de: {' '.join(command)}")
+            self.kill_group(process)
+            process.wait()
+            result['status'] = 'timeout'
+            return ''
+
+
+# Superviseur partagé (créé au premier usage)
+_tool_supervisor = None
+_tool_supervisor_lock = threading.Lock()
+
+def get_tool_supervisor() -> ToolSupervisor:
+    """Obtenir le superviseur d'outils partagé"""
+    global _tool_supervisor
+    with _tool_supervisor_lock:
+        if _tool_supervisor is None:
+            config = get_config()
+            _tool_supervisor = ToolSupervisor(
+                max_concurrent=config.get('kali_tools.supervisor.max_concurrent', 4),
+                per_tool=config.get('kali_tools.supervisor.per_tool', {}),
+                nice=config.get('kali_tools.supervisor.nice', 10),
+                memory_mb=config.get('kali_tools.supervisor.memory_mb', 2048),
+                cpu_seconds=config.get('kali_tools.supervisor.cpu_seconds', 600),
+                cache_ttl_hours=config.get('kali_tools.supervisor.cache_ttl_hours', 24),
+            )
+        return _tool_supervisor
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+tools.py - Découverte des outils externes (theHarvester, sherlock...)
+shutil.which mémorisé sur disque entre deux exécutions, invalidé si PATH change
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ToolLocator:
+    """Chemins des commandes externes, résolus une fois puis relus du disque
+
+    Un outil trouvé reste valide tant que son exécutable existe ; un outil
+    absent est recherché de nouveau après `ttl_hours`, ou dès que PATH change.
+    """
+
+    def __init__(self, cache_path: str = None, ttl_hours: float = 24):
+        if cache_path is None:
+            cache_dir = Path.home() / '.raven_trace' / 'cache'
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            cache_path = cache_dir / 'tools.json'
+
+        self.cache_path = Path(cache_path)
+        self.ttl = ttl_hours * 3600
+        self._lock = threading.Lock()
+        self._path_key = None
+        self._entries: Optional[Dict[str, Dict]] = None
+
+    def _load(self) -> Dict[str, Dict]:
+        path_key = hashlib.sha1(os.environ.get('PATH', '').encode()).hexdigest()
+        if path_key != self._path_key:
+            # PATH modifié en cours d'exécution : résolutions précédentes caduques
+            self._path_key = path_key
+            self._entries = None
+        if self._entries is None:
+            self._entries = {}
+            try:
+                data = json.loads(self.cache_path.read_text(encoding='utf-8'))
+                if data.get('path_key') == self._path_key:
+                    self._entries = data.get('tools', {})
+            except (OSError, ValueError):
+                pass
+        return self._entries
+
+    def _save(self) -> None:
+        try:
+            tmp = self.cache_path.with_suffix('.tmp')
+            tmp.write_text(json.dumps({'path_key': self._path_key, 'tools': self._entries}), encoding='utf-8')
+            tmp.replace(self.cache_path)
+        except OSError as e:
+            logger.debug(f"Sauvegarde du cache d'outils impossible: {e}")
+
+    def _fresh(self, entry: Dict) -> bool:
+        if entry['path']:
+            return os.access(entry['path'], os.X_OK)
+        return time.time() - entry['checked_at'] < self.ttl
+
+    def which_many(self, commands: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Chemins de plusieurs commandes (None si absente), un seul accès disque"""
+        with self._lock:
+            entries = self._load()
+            changed = False
+            for command in commands:
+                entry = entries.get(command)
+                if entry is None or not self._fresh(entry):
+                    entries[command] = {'path': shutil.which(command), 'checked_at': time.time()}
+                    changed = True
+            if changed:
+                self._save()
+            return {command: entries[command]['path'] for command in commands}
+
+    def which(self, command: str) -> Optional[str]:
+        """Chemin d'une commande (None si absente)"""
+        return self.which_many([command])[command]
+
+    def invalidate(self) -> None:
+        """Oublier toutes les résolutions (après installation d'un outil)"""
+        with self._lock:
+            self._entries = {}
+            self._save()
+
+
+# Localisateur partagé (créé au premier usage)
+_tool_locator = None
+_tool_locator_lock = threading.Lock()
+
+def get_tool_locator() -> ToolLocator:
+    """Obtenir le localisateur d'outils partagé"""
+    global _tool_locator
+    with _tool_locator_lock:
+        if _tool_locator is None:
+            _tool_locator = ToolLocator()
+        return _tool_locator
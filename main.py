@@ -14,8 +14,7 @@ from pathlib import Path
 from datetime import datetime
 from typing import Dict, Optional
 
-# Import des modules locaux
-from core.engine import SearchEngine
+# Import des modules locaux (le moteur de recherche est importé à la demande)
 from cli.interface import (
     show_banner, setup_logging, show_help, show_menu,
     search_email_interactive, search_phone_interactive, 
@@ -32,6 +31,7 @@ console = Console()
 
 class RavenTrace:
     def __init__(self):
+        from core.engine import SearchEngine
         self.engine = SearchEngine(max_workers=5)
         self.logger = setup_logging()
     
@@ -96,8 +96,13 @@ class RavenTrace:
         """Recherche par pseudo"""
         console.print(f"\n[bold cyan]👤 Recherche par Pseudo: {username}[/bold cyan]\n")
         
+        def show_profile(profile: Dict) -> None:
+            # Profils affichés au fil de l'eau (Sherlock peut durer plusieurs minutes)
+            if profile.get('found'):
+                console.print(f"  [green]✓[/green] {profile['platform']}: {profile.get('url', '')}")
+        
         try:
-            results = self.engine.search_username(username, deep_scan)
+            results = self.engine.search_username(username, deep_scan, on_profile=show_profile)
             
             if 'error' in results:
                 show_error(results['error'])
@@ -339,6 +344,151 @@ def batch(email: str, username: str, phone: Optional[str]) -> None:
     show_success(f"Recherche batch exportée: {filepath}")
 
 
+@cli.command()
+@click.option('--input', 'input_file', required=True, type=click.Path(exists=True, dir_okay=False),
+              help='Fichier d\'emails (un par ligne)')
+@click.option('--deep', is_flag=True, help='Deep scan mode')
+@click.option('--max-in-flight', type=int, default=None, help='Requêtes DNS simultanées')
+def batch_email(input_file: str, deep: bool, max_in_flight: Optional[int]) -> None:
+    """Recherche d'une liste d'emails (pré-résolution DNS des domaines)"""
+    from config import get_config
+    
+    rt = RavenTrace()
+    max_in_flight = max_in_flight or get_config().get('search.dns_max_in_flight', 50)
+    
+    with open(input_file, encoding='utf-8') as f:
+        emails = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    
+    results = rt.engine.search_email_batch(emails, deep_scan=deep, max_in_flight=max_in_flight)
+    dead = sum(1 for r in results if r.get('domain_status', {}).get('status') == 'dead')
+    show_info(f"{len(results)} emails traités, {dead} sur des domaines sans courrier")
+    
+    export_dir = Path.home() / '.raven_trace' / 'exports'
+    export_dir.mkdir(parents=True, exist_ok=True)
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filepath = export_dir / f"batch_email_{timestamp}.json"
+    
+    export_json({'emails': results}, str(filepath))
+    show_success(f"Recherche batch exportée: {filepath}")
+
+
+@cli.command()
+@click.argument('query', required=False)
+@click.option('--domain', is_flag=True, help='Chercher les fuites d\'un domaine')
+@click.option('--data-class', 'data_class', default=None, help='Fuites exposant ce type de donnée (ex: Passwords)')
+@click.option('--sync', 'do_sync', is_flag=True, help='Resynchroniser le catalogue avant la recherche')
+def breach_info(query: Optional[str], domain: bool, data_class: Optional[str], do_sync: bool) -> None:
+    """Consulter le catalogue local des fuites (sans réseau)"""
+    from storage.breach_catalog import get_breach_catalog
+    
+    catalog = get_breach_catalog()
+    if do_sync or not catalog.last_sync():
+        stats = catalog.sync(force=do_sync)
+        show_info(f"Catalogue: {stats.get('added', 0)} ajoutées, {stats.get('updated', 0)} mises à jour")
+    
+    if data_class:
+        breaches = catalog.by_data_class(data_class)
+    elif query and domain:
+        breaches = catalog.by_domain(query)
+    elif query:
+        breach = catalog.get(query)
+        breaches = [breach] if breach else []
+    else:
+        stats = catalog.get_stats()
+        show_info(f"{stats['breaches']} fuites au catalogue")
+        return
+    
+    if not breaches:
+        show_warning("Aucune fuite trouvée dans le catalogue")
+        return
+    
+    table = Table(title="🔓 Catalogue des fuites", show_header=True, header_style="bold magenta")
+    table.add_column("Nom", style="cyan")
+    table.add_column("Date", style="yellow")
+    table.add_column("Comptes", style="red")
+    table.add_column("Données exposées", style="green")
+    
+    for breach in breaches:
+        table.add_row(breach['name'], breach.get('breach_date') or '-',
+                      f"{breach.get('pwn_count') or 0:,}", ', '.join(breach['data_classes']))
+    
+    console.print(table)
+
+
+@cli.command()
+@click.option('--targets', 'targets_file', required=True, type=click.Path(exists=True, dir_okay=False),
+              help='Fichier de cibles (emails, pseudos, téléphones ; un par ligne)')
+@click.option('--paths', 'paths', required=True, multiple=True, type=click.Path(exists=True),
+              help='Fichier ou dossier de dumps (option répétable)')
+@click.option('--country', default='FR', help='Code pays pour normaliser les téléphones')
+@click.option('--workers', type=int, default=None, help='Processus de scan (défaut: nombre de cœurs)')
+def scan_dumps(targets_file: str, paths: tuple, country: str, workers: Optional[int]) -> None:
+    """Chercher toutes les cibles dans des dumps locaux en un seul passage"""
+    from modules.dump_scanner import DumpScanner
+    
+    with open(targets_file, encoding='utf-8') as f:
+        identifiers = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    
+    scanner = DumpScanner(identifiers, country_code=country, workers=workers)
+    results = scanner.scan(paths)
+    
+    table = Table(title="🗂️  Scan des dumps", show_header=True, header_style="bold magenta")
+    table.add_column("Cible", style="cyan")
+    table.add_column("Type", style="yellow")
+    table.add_column("Occurrences", style="red")
+    table.add_column("Fichiers", style="green")
+    
+    for target, hits in results['hits'].items():
+        files = len({hit['file'] for hit in hits})
+        table.add_row(target, results['targets'][target]['type'], str(len(hits)), str(files))
+    
+    console.print(table)
+    show_info(f"{results['files_scanned']} fichiers, {results['bytes_scanned'] / 1024 / 1024:.1f} Mo "
+              f"en {results['search_time']:.1f}s ({results['engine']})")
+    
+    export_dir = Path.home() / '.raven_trace' / 'exports'
+    export_dir.mkdir(parents=True, exist_ok=True)
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filepath = export_dir / f"dump_scan_{timestamp}.json"
+    
+    export_json(results, str(filepath))
+    show_success(f"Résultats du scan exportés: {filepath}")
+
+
+@cli.command()
+@click.option('--input', 'input_file', required=True, type=click.Path(exists=True, dir_okay=False),
+              help='CSV de numéros (ou un numéro par ligne)')
+@click.option('--output', default=None, help='Fichier de sortie (.csv, ou .parquet si pyarrow est installé)')
+@click.option('--column', default=None, help='Colonne des numéros (nom ou index, défaut: première)')
+@click.option('--country', default='FR', help='Code pays des numéros sans indicatif')
+@click.option('--workers', type=int, default=None, help='Processus d\'enrichissement (défaut: nombre de cœurs)')
+@click.option('--chunk-size', type=int, default=50000, help='Numéros par bloc')
+def phone_enrich(input_file: str, output: Optional[str], column: Optional[str], country: str,
+                 workers: Optional[int], chunk_size: int) -> None:
+    """Normaliser et enrichir hors ligne une liste de numéros (E.164, opérateur, zone, fuseau)"""
+    import time
+    from modules.phone_enrich import PhoneEnricher, ColumnarWriter, read_numbers
+    
+    if output is None:
+        export_dir = Path.home() / '.raven_trace' / 'exports'
+        export_dir.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output = str(export_dir / f"phone_enrich_{timestamp}.csv")
+    
+    started = time.time()
+    valid = 0
+    enricher = PhoneEnricher(region=country, workers=workers, chunk_size=chunk_size)
+    with ColumnarWriter(output) as writer:
+        for columns in enricher.enrich(read_numbers(input_file, column)):
+            writer.write(columns)
+            valid += sum(columns['valid'])
+    
+    show_info(f"{writer.rows} numéros traités, {valid} valides, en {time.time() - started:.1f}s")
+    show_success(f"Enrichissement exporté: {writer.path}")
+
+
 @cli.command()
 def version() -> None:
     """Afficher la version"""
@@ -2,14 +2,26 @@
 Modules - Lookups spécialisés pour recherche OSINT
 """
 
-from modules.email_lookup import EmailLookup
-from modules.phone_lookup import PhoneLookup
-from modules.username_lookup import UsernameLookup
-from modules.breaches import BreachChecker
-
 __all__ = [
     'EmailLookup',
     'PhoneLookup',
     'UsernameLookup',
     'BreachChecker',
 ]
+
+_EXPORTS = {
+    'EmailLookup': 'modules.email_lookup',
+    'PhoneLookup': 'modules.phone_lookup',
+    'UsernameLookup': 'modules.username_lookup',
+    'BreachChecker': 'modules.breaches',
+}
+
+
+def __getattr__(name):
+    # Import au premier accès : `import modules.xxx` ne charge pas tous les lookups
+    if name in _EXPORTS:
+        import importlib
+        value = getattr(importlib.import_module(_EXPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -6,12 +6,13 @@ AdvancedOSINT - Techniques OSINT avancées
 import requests
 import logging
 import re
-import socket
 import ssl
 import subprocess
 from typing import Dict, List, Any
 from urllib.parse import urlparse
-import concurrent.futures
+
+from core.http import CachedSession
+from utils.extractor import extract_identifiers
 
 logger = logging.getLogger(__name__)
 
@@ -19,73 +20,37 @@ class AdvancedOSINT:
     """Techniques OSINT avancées pour investigation approfondie"""
     
     def __init__(self):
-        self.session = requests.Session()
+        self.session = CachedSession()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36'
         })
     
-    def certificate_transparency(self, domain: str) -> List[Dict[str, Any]]:
-        """Recherche via Certificate Transparency logs"""
-        subdomains = []
-        
-        try:
-            # crt.sh API
-            url = f"https://crt.sh/?q=%.{domain}&output=json"
-            resp = self.session.get(url, timeout=30)
-            
-            if resp.status_code == 200:
-                data = resp.json()
-                seen = set()
-                
-                for cert in data:
-                    name_value = cert.get('name_value', '')
-                    names = name_value.split('\n')
-                    
-                    for name in names:
-                        name = name.strip().lower()
-                        if name and name not in seen and domain in name:
-                            seen.add(name)
-                            subdomains.append({
-                                'subdomain': name,
-                                'issuer': cert.get('issuer_name', ''),
-                                'not_before': cert.get('not_before', ''),
-                                'not_after': cert.get('not_after', '')
-                            })
-                
-                logger.info(f"Certificate Transparency: {len(subdomains)} sous-domaines trouvés")
-        except Exception as e:
-            logger.error(f"CT logs error: {e}")
-        
-        return subdomains
+    def certificate_transparency(self, domain: str, limit: int = None, refresh: bool = False) -> List[Dict[str, Any]]:
+        """Recherche via Certificate Transparency logs (lecture en flux, cache local par domaine)"""
+        from sources.ct_logs import get_ct_client
+        return get_ct_client().subdomains(domain, limit=limit, refresh=refresh)
     
-    def wayback_machine_search(self, domain: str) -> List[Dict[str, Any]]:
-        """Rechercher dans Wayback Machine"""
+    def wayback_machine_search(self, domain: str, limit: int = 100,
+                               filters: List[str] = None) -> List[Dict[str, Any]]:
+        """Rechercher dans Wayback Machine (limite et filtres appliqués par le serveur CDX)"""
+        from sources.wayback import get_wayback_client
         results = []
         
         try:
-            # API Wayback Machine
-            url = f"http://web.archive.org/cdx/search/cdx?url={domain}/*&output=json&collapse=urlkey&fl=original,timestamp,mimetype,statuscode"
-            resp = self.session.get(url, timeout=30)
+            for capture in get_wayback_client().iter_captures(f"{domain}/*", limit=limit, filters=filters):
+                results.append({
+                    'url': capture.get('original', ''),
+                    'timestamp': capture.get('timestamp', ''),
+                    'mimetype': capture.get('mimetype', ''),
+                    'status': capture.get('statuscode', ''),
+                    'archive_url': capture.get('archive_url', '')
+                })
             
-            if resp.status_code == 200:
-                data = resp.json()
-                
-                if len(data) > 1:  # First row is headers
-                    for row in data[1:]:
-                        if len(row) >= 4:
-                            results.append({
-                                'url': row[0],
-                                'timestamp': row[1],
-                                'mimetype': row[2],
-                                'status': row[3],
-                                'archive_url': f"https://web.archive.org/web/{row[1]}/{row[0]}"
-                            })
-                
-                logger.info(f"Wayback Machine: {len(results)} URLs archivées trouvées")
+            logger.info(f"Wayback Machine: {len(results)} URLs archivées trouvées")
         except Exception as e:
             logger.error(f"Wayback Machine error: {e}")
         
-        return results[:100]  # Limiter les résultats
+        return results
     
     def shodan_search(self, query: str, api_key: str = None) -> Dict[str, Any]:
         """Recherche Shodan pour infrastructure"""
@@ -257,81 +222,28 @@ class AdvancedOSINT:
         
         return dorks
     
-    def port_scan(self, host: str, top_ports: int = 100) -> List[Dict[str, Any]]:
-        """Scanner les ports ouverts"""
-        open_ports = []
-        
-        # Ports communs à scanner
-        common_ports = [
-            21, 22, 23, 25, 53, 80, 110, 111, 135, 139, 143, 443, 445, 
-            993, 995, 1723, 3306, 3389, 5900, 8080, 8443, 8888
-        ]
-        
-        if top_ports > len(common_ports):
-            # Ajouter plus de ports
-            common_ports.extend(range(1, min(top_ports + 1, 65536)))
+    def port_scan(self, host: str, top_ports: int = 100, ports: str = None) -> List[Dict[str, Any]]:
+        """Scanner les ports ouverts (`top_ports` plus courants, ou liste/plages '22,80,8000-8100')"""
+        from config import get_config
+        from modules import port_scanner
         
-        common_ports = list(set(common_ports[:top_ports]))
+        config = get_config()
+        scanner = port_scanner.PortScanner(
+            concurrency=config.get('advanced.port_scan.concurrency', 500),
+            timeout=config.get('advanced.port_scan.timeout', 1.0),
+            banner_timeout=config.get('advanced.port_scan.banner_timeout', 2.0),
+            rate=config.get('advanced.port_scan.rate', 0)
+        )
         
-        def scan_port(port):
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(1)
-            result = sock.connect_ex((host, port))
-            sock.close()
-            
-            if result == 0:
-                service = self._get_service_name(port)
-                return {
-                    'port': port,
-                    'state': 'open',
-                    'service': service,
-                    'banner': self._grab_banner(host, port)
-                }
-            return None
-        
-        # Scan parallèle
-        with concurrent.futures.ThreadPoolExecutor(max_workers=50) as executor:
-            futures = [executor.submit(scan_port, port) for port in common_ports]
-            
-            for future in concurrent.futures.as_completed(futures):
-                result = future.result()
-                if result:
-                    open_ports.append(result)
-        
-        open_ports.sort(key=lambda x: x['port'])
-        logger.info(f"Port scan: {len(open_ports)} ports ouverts sur {host}")
+        open_ports = []
+        try:
+            open_ports = scanner.scan(host, ports if ports else port_scanner.top_ports(top_ports))
+            logger.info(f"Port scan: {len(open_ports)} ports ouverts sur {host}")
+        except Exception as e:
+            logger.error(f"Port scan error: {e}")
         
         return open_ports
     
-    def _get_service_name(self, port: int) -> str:
-        """Obtenir le nom du service pour un port"""
-        services = {
-            21: 'FTP', 22: 'SSH', 23: 'Telnet', 25: 'SMTP', 53: 'DNS',
-            80: 'HTTP', 110: 'POP3', 143: 'IMAP', 443: 'HTTPS',
-            445: 'SMB', 3306: 'MySQL', 3389: 'RDP', 5432: 'PostgreSQL',
-            6379: 'Redis', 8080: 'HTTP-Proxy', 8443: 'HTTPS-Alt',
-            27017: 'MongoDB', 9200: 'Elasticsearch'
-        }
-        return services.get(port, f'Unknown({port})')
-    
-    def _grab_banner(self, host: str, port: int) -> str:
-        """Récupérer la bannière d'un service"""
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(2)
-            sock.connect((host, port))
-            
-            # Certains services nécessitent d'envoyer des données d'abord
-            if port in [80, 443, 8080, 8443]:
-                sock.send(b'HEAD / HTTP/1.0\r\n\r\n')
-            
-            banner = sock.recv(1024).decode('utf-8', errors='ignore').strip()
-            sock.close()
-            
-            return banner[:100] if banner else ''
-        except:
-            return ''
-    
     def metadata_extraction(self, url: str) -> Dict[str, Any]:
         """Extraire les métadonnées d'un site web"""
         metadata = {
@@ -390,15 +302,10 @@ class AdvancedOSINT:
                 if soup.find(attrs={'class': re.compile('drupal')}):
                     metadata['technologies'].append('Drupal')
                 
-                # Extraire emails
-                email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-                emails = re.findall(email_pattern, resp.text)
-                metadata['emails'] = list(set(emails))[:10]
-                
-                # Extraire téléphones
-                phone_pattern = r'[\+]?[(]?[0-9]{1,4}[)]?[-\s\.]?[(]?[0-9]{1,4}[)]?[-\s\.]?[0-9]{1,5}[-\s\.]?[0-9]{1,5}'
-                phones = re.findall(phone_pattern, resp.text)
-                metadata['phones'] = list(set(phones))[:10]
+                # Extraire emails et téléphones (validés) en un passage
+                found = extract_identifiers(resp.text, kinds=('emails', 'phones'))
+                metadata['emails'] = found['emails'][:10]
+                metadata['phones'] = found['phones'][:10]
                 
                 logger.info(f"Métadonnées extraites de {url}")
                 
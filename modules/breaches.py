@@ -1,125 +1,459 @@
 #!/usr/bin/env python3
 """
 BreachChecker - Vérification des données compromises
-Utilise multiples sources de fuites connus
+Fournisseurs interrogés en parallèle, résultats normalisés et dédupliqués
 """
 
 import requests
 import logging
 import hashlib
-from typing import List, Dict, Any
+import mmap
+import os
+import re
+import time
+from array import array
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterable, Optional
+
+from config import get_config
+from core.scheduler import HostRateLimiter
+
+from storage.breach_catalog import get_breach_catalog
 
 logger = logging.getLogger(__name__)
 
+# Empreinte hexadécimale normalisée (majuscules)
+_HEX = re.compile(rb'[0-9A-F]+')
+
+def hash_password(password: str, hash_type: str = 'sha1') -> str:
+    """Empreinte hexadécimale majuscule d'un mot de passe (sha1 ou ntlm)"""
+    if hash_type == 'ntlm':
+        # MD4 peut être absent d'OpenSSL 3 : ValueError dans ce cas
+        return hashlib.new('md4', password.encode('utf-16le')).hexdigest().upper()
+    return hashlib.sha1(password.encode('utf-8')).hexdigest().upper()
+
+
+class HashListIndex:
+    """Recherche dans une liste de hachages triée, projetée en mémoire (mmap)
+
+    Format attendu : une empreinte hexadécimale par ligne, triée, suivie
+    éventuellement de ':compte' (listes Pwned Passwords SHA-1 / NTLM).
+    Le fichier n'est jamais chargé en RAM ; un index des préfixes
+    (fichier .idx à côté de la liste) réduit chaque recherche à un bucket.
+    """
+
+    def __init__(self, path: str, hash_type: str = 'sha1', index_prefix: int = 4, build_index: bool = True):
+        self.path = Path(path).expanduser()
+        self.hash_type = hash_type
+        self.index_prefix = index_prefix
+        self._file = open(self.path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+
+        first = self._mm[:self._mm.find(b'\n')] if self.size else b''
+        self.hash_len = len(first.split(b':')[0].strip())
+        self._offsets: Optional[array] = None
+        if build_index and self.size and index_prefix:
+            self._offsets = self._load_or_build_index()
+
+    def close(self) -> None:
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Recherche dichotomique sur les octets
+    # ------------------------------------------------------------------
+
+    def _line(self, lo: int, mid: int):
+        """Bornes de la ligne contenant `mid` (sans remonter avant `lo`)"""
+        nl = self._mm.rfind(b'\n', lo, mid)
+        start = nl + 1 if nl != -1 else lo
+        end = self._mm.find(b'\n', start)
+        return start, (end if end != -1 else self.size)
+
+    def _search(self, target: bytes, lo: int, hi: int):
+        """(ligne trouvée ou None, position d'insertion) dans [lo, hi)"""
+        width = len(target)
+        while lo < hi:
+            start, end = self._line(lo, (lo + hi) // 2)
+            key = self._mm[start:start + width]
+            if key < target:
+                lo = end + 1
+            elif key > target or width < self.hash_len:
+                hi = start
+            else:
+                return self._mm[start:end], end + 1
+        return None, lo
+
+    def _bucket(self, target: bytes):
+        if self._offsets is None:
+            return 0, self.size
+        i = int(target[:self.index_prefix], 16)
+        return self._offsets[i], self._offsets[i + 1]
+
+    # ------------------------------------------------------------------
+    # Index des préfixes
+    # ------------------------------------------------------------------
+
+    def _load_or_build_index(self) -> array:
+        """Charger le .idx s'il correspond au fichier, sinon le reconstruire"""
+        idx_path = self.path.with_name(self.path.name + '.idx')
+        stat = os.stat(self.path)
+        buckets = 16 ** self.index_prefix
+        header = [stat.st_size, stat.st_mtime_ns, self.index_prefix]
+
+        try:
+            stored = array('Q')
+            with open(idx_path, 'rb') as f:
+                stored.fromfile(f, 3 + buckets + 1)
+            if list(stored[:3]) == header:
+                return stored[3:]
+        except (OSError, EOFError):
+            pass
+
+        # Borne inférieure de chaque préfixe : une recherche par bucket
+        offsets = array('Q')
+        lo = 0
+        for i in range(buckets):
+            _, lo = self._search(f"{i:0{self.index_prefix}X}".encode(), lo, self.size)
+            offsets.append(lo)
+        offsets.append(self.size)
+
+        try:
+            with open(idx_path, 'wb') as f:
+                array('Q', header).tofile(f)
+                offsets.tofile(f)
+        except OSError as e:
+            logger.debug(f"Écriture index {idx_path} erreur: {e}")
+        return offsets
+
+    # ------------------------------------------------------------------
+    # API publique
+    # ------------------------------------------------------------------
+
+    def lookup(self, hash_hex: str) -> Optional[int]:
+        """Nombre d'occurrences d'une empreinte (1 sans compte), None si absente"""
+        return self.lookup_many([hash_hex])[hash_hex]
+
+    def lookup_many(self, hashes: Iterable[str]) -> Dict[str, Optional[int]]:
+        """Recherche groupée : requêtes triées pour un parcours séquentiel du fichier
+
+        Une requête qui n'est pas une empreinte hexadécimale de la bonne
+        longueur est rapportée absente (None). Les résultats sont indexés par
+        les requêtes telles que fournies : les variantes de casse d'une même
+        empreinte reçoivent toutes la réponse.
+        """
+        results: Dict[str, Optional[int]] = {}
+        originals: Dict[bytes, List[str]] = {}
+        for h in hashes:
+            originals.setdefault(h.strip().upper().encode(), []).append(h)
+        lo = 0
+        for target in sorted(originals):
+            if len(target) != self.hash_len or not _HEX.fullmatch(target):
+                logger.debug(f"Empreinte invalide ignorée: {originals[target][0]!r}")
+                count = None
+            else:
+                start, end = self._bucket(target)
+                line, lo = self._search(target, max(lo, start), end)
+                if line is None:
+                    count = None
+                else:
+                    _, _, value = line.partition(b':')
+                    count = int(value) if value.strip().isdigit() else 1
+            for original in originals[target]:
+                results[original] = count
+        return results
+
+
+# Fournisseurs : (méthode, intervalle minimal entre requêtes en secondes, clé API)
+PROVIDERS = {
+    'hibp': ('_check_hibp', 1.6, 'hibp'),
+    'leakcheck': ('_check_leakcheck', 1.0, 'leakcheck'),
+    'breachdirectory': ('_check_breachdirectory', 1.0, None),
+}
+PROVIDER_LABELS = {
+    'hibp': 'Have I Been Pwned',
+    'leakcheck': 'LeakCheck',
+    'breachdirectory': 'Breach Directory',
+}
+
+# Limiteur partagé par toutes les instances : un seul rythme par fournisseur
+_provider_limiter = HostRateLimiter()
+
+
+def breach_entry(provider: str, name: str, **fields) -> Dict[str, Any]:
+    """Fuite au format normalisé commun à tous les fournisseurs"""
+    entry = {
+        'source': PROVIDER_LABELS.get(provider, provider),
+        'sources': [PROVIDER_LABELS.get(provider, provider)],
+        'breach_name': name,
+        'title': None,
+        'domain': None,
+        'date': None,
+        'compromised_count': None,
+        'description': None,
+        'data_classes': [],
+        'severity': 'HIGH',
+    }
+    entry.update({k: v for k, v in fields.items() if v is not None})
+    # Certains fournisseurs renvoient une chaîne ("Email, Password") au lieu d'une liste
+    classes = entry['data_classes']
+    if isinstance(classes, str):
+        classes = re.split(r'[,;]', classes)
+    elif not isinstance(classes, (list, tuple, set)):
+        classes = [classes]
+    entry['data_classes'] = [str(c).strip() for c in classes if c is not None and str(c).strip()]
+    return entry
+
+
 class BreachChecker:
-    """Vérification des fuites de données"""
+    """Agrégation concurrente des fournisseurs de fuites de données"""
     
-    def __init__(self):
+    def __init__(self, providers: List[str] = None):
+        self.config = get_config()
         self.headers = {
-            'User-Agent': 'Raven-Trace/1.0'
+            'User-Agent': 'RavenTrace-OSINT/1.0'
         }
         self.timeout = 10
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.providers = providers or list(PROVIDERS)
+        self.limiter = _provider_limiter
+        self._hash_lists: Optional[List[HashListIndex]] = None
     
     def check_breaches(self, email: str) -> List[Dict[str, Any]]:
         """Vérifier si l'email a été compromis"""
-        breaches = []
+        return self.aggregate(email)['breaches']
+    
+    def aggregate(self, email: str) -> Dict[str, Any]:
+        """Interroger tous les fournisseurs en parallèle et fusionner par nom de fuite
         
-        # 1. Have I Been Pwned API
-        breaches.extend(self._check_hibp(email))
+        Renvoie {'breaches': [...], 'providers': {nom: {status, latency_ms, count}}} ;
+        la durée totale est celle du fournisseur le plus lent.
+        """
+        report = {'breaches': [], 'providers': {}}
+        found: Dict[str, Dict[str, Any]] = {}
         
-        # 2. LeakCheck API
-        breaches.extend(self._check_leakcheck(email))
+        with ThreadPoolExecutor(max_workers=len(self.providers) or 1) as executor:
+            futures = {name: executor.submit(self._run_provider, name, email) for name in self.providers}
+            # Fusion dans l'ordre des fournisseurs : le résultat ne dépend pas de leur vitesse
+            for name, future in futures.items():
+                status, entries, latency = future.result()
+                report['providers'][name] = {
+                    'status': status,
+                    'latency_ms': round(latency * 1000),
+                    'count': len(entries),
+                }
+                for entry in entries:
+                    self._merge(found, entry)
         
-        # 3. Breach Database Aggregators
-        breaches.extend(self._check_breachodb(email))
+        # Ordre stable : ordre de déclaration des fournisseurs, puis date
+        order = {PROVIDER_LABELS.get(p, p): i for i, p in enumerate(self.providers)}
+        report['breaches'] = sorted(found.values(),
+                                    key=lambda b: (order.get(b['source'], len(order)), b.get('date') or ''))
         
-        return breaches
+        statuses = [p['status'] for p in report['providers'].values()]
+        if not report['breaches'] and 'clean' in statuses:
+            report['breaches'] = [{
+                'source': ', '.join(PROVIDER_LABELS.get(n, n) for n, p in report['providers'].items()
+                                    if p['status'] == 'clean'),
+                'status': 'clean',
+                'message': 'Aucune fuite détectée',
+                'severity': 'SAFE'
+            }]
+        
+        summary = ', '.join(f"{n}={p['status']}" for n, p in report['providers'].items())
+        logger.info(f"Fuites: {len(found)} trouvées pour {email} ({summary})")
+        return report
     
-    def _check_hibp(self, email: str) -> List[Dict[str, Any]]:
-        """Vérifier Have I Been Pwned"""
-        results = []
+    @staticmethod
+    def _merge(found: Dict[str, Dict[str, Any]], entry: Dict[str, Any]) -> None:
+        """Dédupliquer par nom de fuite en complétant les champs manquants"""
+        key = (entry.get('breach_name') or '').strip().lower()
+        if not key:
+            return
+        existing = found.get(key)
+        if existing is None:
+            found[key] = entry
+            return
         
+        for source in entry['sources']:
+            if source not in existing['sources']:
+                existing['sources'].append(source)
+        for field, value in entry.items():
+            if field == 'data_classes':
+                existing['data_classes'] += [c for c in value if c not in existing['data_classes']]
+            elif existing.get(field) in (None, '') and value not in (None, ''):
+                existing[field] = value
+    
+    def _run_provider(self, name: str, email: str):
+        """Exécuter un fournisseur : (statut, fuites, durée en secondes)"""
+        method, _, key_name = PROVIDERS[name]
+        start = time.monotonic()
         try:
-            url = f"https://haveibeenpwned.com/api/v3/breachedaccount/{email}"
-            resp = requests.get(url, headers=self.headers, timeout=self.timeout)
-            
+            api_key = self.config.get_api_key(key_name) if key_name else None
+            status, entries = getattr(self, method)(email, api_key)
+        except requests.Timeout:
+            status, entries = 'timeout', []
+        except Exception as e:
+            logger.debug(f"{name} erreur: {e}")
+            status, entries = 'error', []
+        return status, entries, time.monotonic() - start
+    
+    def _get(self, provider: str, url: str, **kwargs) -> requests.Response:
+        """GET respectant l'intervalle minimal du fournisseur"""
+        self.limiter.wait(provider, PROVIDERS[provider][1])
+        return self.session.get(url, timeout=self.timeout, **kwargs)
+    
+    @staticmethod
+    def _status_for(code: int) -> str:
+        return {401: 'unauthorized', 403: 'unauthorized', 429: 'rate_limited'}.get(code, f"http_{code}")
+    
+    # ------------------------------------------------------------------
+    # Fournisseurs : chacun renvoie (statut, [fuites normalisées])
+    # ------------------------------------------------------------------
+    
+    def _check_hibp(self, email: str, api_key: Optional[str]):
+        """Have I Been Pwned : noms seulement, métadonnées du catalogue local"""
+        catalog = get_breach_catalog()
+        names = catalog.get_email_breaches(email, self.config.get('cache.ttl_hours', 24))
+        status = 'cached'
+        
+        if names is None:
+            headers = {'hibp-api-key': api_key} if api_key else {}
+            resp = self._get('hibp', f"https://haveibeenpwned.com/api/v3/breachedaccount/{email}?truncateResponse=true",
+                             headers=headers)
             if resp.status_code == 200:
-                breaches_data = resp.json()
-                for breach in breaches_data:
-                    results.append({
-                        'source': 'Have I Been Pwned',
-                        'breach_name': breach.get('Name'),
-                        'date': breach.get('BreachDate'),
-                        'compromised_count': breach.get('PwnCount'),
-                        'data_types': breach.get('DataClasses'),
-                        'title': breach.get('Title'),
-                        'description': breach.get('Description'),
-                        'url': f"https://haveibeenpwned.com/api/v3/breachedaccount/{email}",
-                    })
+                names = [breach.get('Name') for breach in resp.json() if breach.get('Name')]
             elif resp.status_code == 404:
-                logger.info(f"Email {email} non trouvé dans HIBP (bon signe)")
-                results.append({
-                    'source': 'Have I Been Pwned',
-                    'status': 'not_found',
-                    'message': 'Email non trouvé dans les données compromises'
-                })
+                names = []
             else:
-                logger.debug(f"HIBP réponse: {resp.status_code}")
-        except Exception as e:
-            logger.debug(f"HIBP erreur: {e}")
+                return self._status_for(resp.status_code), []
+            catalog.save_email_breaches(email, names)
+            status = 'ok'
         
-        return results
+        if not names:
+            return 'clean', []
+        
+        catalog.sync(max_age_hours=self.config.get('cache.breach_catalog_max_age_hours', 24))
+        known = catalog.get_many(names)
+        if len(known) < len(names):
+            # Fuite plus récente que le catalogue : resynchroniser (au plus une fois par heure)
+            if not catalog.sync(force=True).get('skipped'):
+                known = catalog.get_many(names)
+        
+        entries = []
+        for name in names:
+            breach = known.get(name, {})
+            entries.append(breach_entry(
+                'hibp', name,
+                title=breach.get('title'),
+                domain=breach.get('domain'),
+                date=breach.get('breach_date'),
+                added_date=breach.get('added_date'),
+                modified_date=breach.get('modified_date'),
+                compromised_count=breach.get('pwn_count'),
+                description=breach.get('description'),
+                data_classes=breach.get('data_classes'),
+                is_verified=breach.get('is_verified'),
+                is_fabricated=breach.get('is_fabricated'),
+                is_sensitive=breach.get('is_sensitive'),
+                is_retired=breach.get('is_retired'),
+                is_spam_list=breach.get('is_spam_list'),
+                logo_path=breach.get('logo_path'),
+                severity='CRITICAL' if breach.get('is_sensitive') else 'HIGH',
+            ))
+        return status, entries
     
-    def _check_leakcheck(self, email: str) -> List[Dict[str, Any]]:
-        """Vérifier LeakCheck"""
-        results = []
+    def _check_leakcheck(self, email: str, api_key: Optional[str]):
+        """LeakCheck : API publique, ou API v2 avec clé"""
+        if api_key:
+            resp = self._get('leakcheck', f"https://leakcheck.io/api/v2/query/{email}",
+                             headers={'X-API-Key': api_key})
+            if resp.status_code != 200:
+                return self._status_for(resp.status_code), []
+            data = resp.json()
+            entries = [
+                breach_entry('leakcheck', (item.get('source') or {}).get('name'),
+                             date=(item.get('source') or {}).get('breach_date'),
+                             data_classes=item.get('fields'))
+                for item in data.get('result', [])
+            ]
+            return ('ok' if entries else 'clean'), entries
         
-        try:
-            # LeakCheck (gratuit sans API key pour recherche basique)
-            url = f"https://leakcheck.io/search?q={email}"
-            resp = requests.get(url, headers=self.headers, timeout=self.timeout)
-            
-            if resp.status_code == 200 and "not found" not in resp.text.lower():
-                # Scraper les résultats
-                from bs4 import BeautifulSoup
-                soup = BeautifulSoup(resp.text, 'html.parser')
-                
-                # Chercher les breaches dans la réponse
-                if soup.find('div', class_='breaches'):
-                    results.append({
-                        'source': 'LeakCheck',
-                        'found': True,
-                        'url': url,
-                        'requires_manual_check': True
-                    })
-        except Exception as e:
-            logger.debug(f"LeakCheck erreur: {e}")
+        resp = self._get('leakcheck', f"https://leakcheck.net/api/public?check={email}")
+        if resp.status_code != 200:
+            return self._status_for(resp.status_code), []
+        data = resp.json()
+        if not data.get('found'):
+            return 'clean', []
         
-        return results
+        entries = []
+        for source in data.get('sources', []):
+            if isinstance(source, dict):
+                entries.append(breach_entry('leakcheck', source.get('name'), date=source.get('date'),
+                                            data_classes=data.get('fields')))
+            else:
+                entries.append(breach_entry('leakcheck', source))
+        return 'ok', entries
     
-    def _check_breachodb(self, email: str) -> List[Dict[str, Any]]:
-        """Vérifier BreachODB et autres agrégateurs"""
+    def _check_breachdirectory(self, email: str, api_key: Optional[str]):
+        """Breach Directory"""
+        resp = self._get('breachdirectory', f"https://breachdirectory.org/api/v1/search?term={email}&limit=100")
+        if resp.status_code != 200:
+            return self._status_for(resp.status_code), []
+        data = resp.json()
+        if not data.get('found'):
+            return 'clean', []
+        
+        entries = []
+        for result in data.get('results', []):
+            sources = result.get('sources') or []
+            for source in (sources if isinstance(sources, list) else [sources]):
+                entries.append(breach_entry('breachdirectory', source,
+                                            date=result.get('last_seen'),
+                                            data_classes=result.get('exposed_data')))
+        return 'ok', entries
+    
+    def _local_hash_lists(self) -> List[HashListIndex]:
+        """Listes locales déclarées dans sources.breaches.hash_lists (ouvertes une fois)"""
+        if self._hash_lists is None:
+            self._hash_lists = []
+            for entry in get_config().get('sources.breaches.hash_lists', []) or []:
+                if not isinstance(entry, dict):
+                    entry = {'path': entry}
+                path = entry.get('path')
+                try:
+                    self._hash_lists.append(HashListIndex(path, entry.get('type', 'sha1')))
+                except OSError as e:
+                    logger.warning(f"Liste de hachages {path} indisponible: {e}")
+        return self._hash_lists
+    
+    def check_hashes(self, hashes: List[str], hash_type: str = 'sha1') -> List[Dict[str, Any]]:
+        """Vérifier des empreintes dans les listes locales (hors ligne)"""
         results = []
         
-        try:
-            # BreachDatabase API
-            url = f"https://breachdirectory.org/api/v1/search?term={email}&limit=100"
-            resp = requests.get(url, headers=self.headers, timeout=self.timeout)
-            
-            if resp.status_code == 200:
-                data = resp.json()
-                
-                if data.get('found'):
-                    for breach in data.get('results', []):
-                        results.append({
-                            'source': 'Breach Directory',
-                            'breach_name': breach.get('sources'),
-                            'date_found': breach.get('last_seen'),
-                            'exposed_data': breach.get('exposed_data'),
-                            'url': f"https://breachdirectory.org/?term={email}",
-                        })
-        except Exception as e:
-            logger.debug(f"BreachODB erreur: {e}")
+        for index in self._local_hash_lists():
+            if index.hash_type != hash_type:
+                continue
+            for hash_hex, count in index.lookup_many(hashes).items():
+                if count is not None:
+                    results.append({
+                        'source': 'Local hash list',
+                        'list': str(index.path),
+                        'hash': hash_hex,
+                        'hash_type': hash_type,
+                        'compromised_count': count,
+                        'severity': 'CRITICAL'
+                    })
         
         return results
     
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+DumpScanner - Recherche multi-motifs dans des dumps locaux (pastes, combolists, CSV)
+Un automate construit sur toutes les cibles, un seul passage mmap par fichier
+"""
+
+import logging
+import mmap
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+
+import phonenumbers
+
+from core.validators import normalize_email, normalize_phone, normalize_username
+from utils.helpers import is_phone_like
+
+logger = logging.getLogger(__name__)
+
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+# Octets considérés comme faisant partie d'un mot (contrôle des bornes)
+WORD_BYTES = frozenset(b'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_')
+CONTEXT_BYTES = 160
+SEGMENT_SIZE = 64 * 1024 * 1024
+
+
+def target_patterns(identifier: str, country_code: str = "FR") -> Tuple[str, str, List[str]]:
+    """(type, forme normalisée, motifs à chercher) pour un identifiant"""
+    identifier = identifier.strip()
+    if '@' in identifier:
+        email = normalize_email(identifier)
+        return 'email', email, [email]
+
+    if is_phone_like(identifier):
+        e164 = normalize_phone(identifier, country_code)
+        patterns = [e164, e164.lstrip('+')]
+        try:
+            parsed = phonenumbers.parse(e164)
+            national = phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.NATIONAL)
+            patterns.append(re.sub(r'\D', '', national))
+        except phonenumbers.NumberParseException:
+            pass
+        return 'phone', e164, list(dict.fromkeys(p for p in patterns if len(p) >= 7))
+
+    username = normalize_username(identifier)
+    return 'username', username, [username]
+
+
+class PatternAutomaton:
+    """Automate multi-motifs insensible à la casse sur des octets
+
+    Utilise pyahocorasick s'il est installé ; sinon une expression régulière
+    construite depuis le trie des motifs (moteur C, un seul passage).
+    """
+
+    def __init__(self, patterns: Dict[str, str]):
+        # motif (minuscule) -> identifiant cible
+        self.patterns = {p.lower().encode('utf-8'): target for p, target in patterns.items() if p}
+        self.max_len = max((len(p) for p in self.patterns), default=0)
+
+        if HAS_AHOCORASICK:
+            # Décodage latin-1 : un caractère par octet, les offsets sont conservés
+            self._automaton = ahocorasick.Automaton()
+            for pattern in self.patterns:
+                text = pattern.decode('latin-1')
+                self._automaton.add_word(text, (len(pattern), pattern))
+            self._automaton.make_automaton()
+        else:
+            self._trie = self._build_trie(self.patterns)
+            self._regex = re.compile(b'(?=(' + self._trie_regex(self._trie) + b'))') if self.patterns else None
+
+    @staticmethod
+    def _build_trie(patterns: Iterable[bytes]) -> Dict:
+        trie: Dict = {}
+        for pattern in patterns:
+            node = trie
+            for byte in pattern:
+                node = node.setdefault(byte, {})
+            node[None] = True
+        return trie
+
+    @classmethod
+    def _trie_regex(cls, node: Dict) -> bytes:
+        """Alternative regex la plus longue d'abord pour un nœud du trie"""
+        branches = [re.escape(bytes([byte])) + cls._trie_regex(child)
+                    for byte, child in sorted((k, v) for k, v in node.items() if k is not None)]
+        if not branches:
+            return b''
+        body = branches[0] if len(branches) == 1 else b'(?:' + b'|'.join(branches) + b')'
+        return b'(?:' + body + b')?' if None in node else body
+
+    def _prefixes(self, match: bytes) -> Iterator[bytes]:
+        """Motifs terminaux inclus comme préfixes d'une correspondance regex"""
+        node = self._trie
+        for i, byte in enumerate(match):
+            node = node.get(byte)
+            if node is None:
+                return
+            if None in node:
+                yield match[:i + 1]
+
+    def iter_matches(self, data: bytes) -> Iterator[Tuple[int, bytes]]:
+        """(offset de début, motif) pour chaque occurrence, chevauchements compris"""
+        lowered = data.lower()
+        if HAS_AHOCORASICK:
+            for end, (length, pattern) in self._automaton.iter(lowered.decode('latin-1')):
+                yield end - length + 1, pattern
+        elif self._regex is not None:
+            for match in self._regex.finditer(lowered):
+                for pattern in self._prefixes(match.group(1)):
+                    yield match.start(), pattern
+
+
+# ----------------------------------------------------------------------
+# Workers (un automate par processus, construit une seule fois)
+# ----------------------------------------------------------------------
+
+_worker_automaton: Optional[PatternAutomaton] = None
+
+
+def _init_worker(patterns: Dict[str, str]) -> None:
+    global _worker_automaton
+    _worker_automaton = PatternAutomaton(patterns)
+
+
+def _context(data, start: int, end: int) -> str:
+    """Ligne autour d'une occurrence (bornée à CONTEXT_BYTES de chaque côté)"""
+    line_start = max(data.rfind(b'\n', max(0, start - CONTEXT_BYTES), start) + 1, start - CONTEXT_BYTES, 0)
+    line_end = data.find(b'\n', end, end + CONTEXT_BYTES)
+    if line_end == -1:
+        line_end = min(len(data), end + CONTEXT_BYTES)
+    return bytes(data[line_start:line_end]).decode('utf-8', errors='replace').strip()
+
+
+def scan_segment(path: str, start: int, end: int, automaton: PatternAutomaton = None) -> List[Dict[str, Any]]:
+    """Chercher les motifs dans [start, end) d'un fichier projeté en mémoire
+
+    Le segment est prolongé de max_len - 1 octets pour ne pas manquer les
+    occurrences à cheval sur deux segments ; seules celles qui commencent
+    dans [start, end) sont retenues.
+    """
+    automaton = automaton or _worker_automaton
+    hits = []
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return hits
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            stop = min(size, end + automaton.max_len - 1)
+            chunk = mm[start:stop]
+            for offset, pattern in automaton.iter_matches(chunk):
+                if offset >= end - start:
+                    continue
+                absolute = start + offset
+                tail = absolute + len(pattern)
+                if absolute > 0 and mm[absolute - 1] in WORD_BYTES and pattern[0] in WORD_BYTES:
+                    continue
+                if tail < size and mm[tail] in WORD_BYTES and pattern[-1] in WORD_BYTES:
+                    continue
+                hits.append({
+                    'target': automaton.patterns[pattern],
+                    'matched': pattern.decode('utf-8', errors='replace'),
+                    'file': path,
+                    'offset': absolute,
+                    'context': _context(mm, absolute, absolute + len(pattern)),
+                })
+    return hits
+
+
+class DumpScanner:
+    """Scan parallèle (fichiers et segments de gros fichiers) d'un corpus de dumps"""
+
+    def __init__(self, identifiers: Iterable[str], country_code: str = "FR",
+                 workers: int = None, segment_size: int = SEGMENT_SIZE):
+        self.targets: Dict[str, Dict[str, Any]] = {}
+        self.patterns: Dict[str, str] = {}
+        for identifier in identifiers:
+            if not identifier.strip():
+                continue
+            kind, normalized, patterns = target_patterns(identifier, country_code)
+            self.targets[normalized] = {'type': kind, 'patterns': patterns}
+            for pattern in patterns:
+                self.patterns.setdefault(pattern.lower(), normalized)
+
+        self.workers = workers or os.cpu_count() or 1
+        self.segment_size = segment_size
+
+    @staticmethod
+    def iter_files(paths: Iterable[str]) -> Iterator[Path]:
+        """Fichiers à scanner (dossiers parcourus récursivement)"""
+        for path in paths:
+            path = Path(path).expanduser()
+            if path.is_file():
+                yield path
+            elif path.is_dir():
+                for root, _, files in os.walk(path):
+                    for name in sorted(files):
+                        yield Path(root) / name
+
+    def _segments(self, files: List[Path]) -> Iterator[Tuple[str, int, int]]:
+        for path in files:
+            try:
+                size = path.stat().st_size
+            except OSError as e:
+                logger.warning(f"Fichier ignoré {path}: {e}")
+                continue
+            for start in range(0, size, self.segment_size):
+                yield str(path), start, min(size, start + self.segment_size)
+
+    def scan(self, paths: Iterable[str]) -> Dict[str, Any]:
+        """Scanner les fichiers et regrouper les occurrences par cible"""
+        started = time.time()
+        files = list(self.iter_files(paths))
+        segments = list(self._segments(files))
+        hits: List[Dict[str, Any]] = []
+
+        if self.patterns and segments:
+            if self.workers <= 1 or len(segments) == 1:
+                automaton = PatternAutomaton(self.patterns)
+                for segment in segments:
+                    hits.extend(scan_segment(*segment, automaton=automaton))
+            else:
+                with ProcessPoolExecutor(max_workers=min(self.workers, len(segments)),
+                                         initializer=_init_worker, initargs=(self.patterns,)) as executor:
+                    futures = {executor.submit(scan_segment, *segment): segment for segment in segments}
+                    for future in as_completed(futures):
+                        try:
+                            hits.extend(future.result())
+                        except Exception as e:
+                            logger.warning(f"Scan {futures[future][0]} erreur: {e}")
+
+        by_target: Dict[str, List[Dict[str, Any]]] = {target: [] for target in self.targets}
+        # Formes d'un même numéro qui se chevauchent (+336..., 336...) : une seule
+        # occurrence par cible, la plus longue à l'offset le plus bas
+        reached: Dict[Tuple[str, str], int] = {}
+        for hit in sorted(hits, key=lambda h: (h['file'], h['offset'], -len(h['matched']))):
+            key = (hit['target'], hit['file'])
+            if hit['offset'] < reached.get(key, -1):
+                continue
+            reached[key] = hit['offset'] + len(hit['matched'])
+            by_target[hit['target']].append(hit)
+
+        return {
+            'targets': self.targets,
+            'hits': by_target,
+            'files_scanned': len(files),
+            'bytes_scanned': sum(end - start for _, start, end in segments),
+            'engine': 'pyahocorasick' if HAS_AHOCORASICK else 'regex-trie',
+            'search_time': time.time() - started,
+        }
@@ -6,13 +6,19 @@ APIs publiques, scraping et intégration Kali tools
 
 import requests
 import logging
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+from typing import List, Dict, Any, Callable
 from bs4 import BeautifulSoup
 import time
 import json
-import dns.resolver
 import hashlib
 from config import get_config
+from core.http import CachedSession
+from core.resolver import get_resolver
+from modules.mail_security import get_mail_security_analyzer
+from sources.github_api import get_github_client
+from sources.registration import get_registration_client
+from modules.breaches import BreachChecker
 
 logger = logging.getLogger(__name__)
 
@@ -30,9 +36,12 @@ class EmailLookup:
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1'
         }
-        self.session = requests.Session()
+        self.session = CachedSession()
         self.session.headers.update(self.headers)
+        self.breach_checker = BreachChecker()
         self.timeout = 15
+        self.social_check_timeout = 12
+        self.holehe_timeout = 45
     
     def check_reputation(self, email: str) -> Dict[str, Any]:
         """Vérifier la réputation de l'email via multiples sources"""
@@ -103,69 +112,43 @@ class EmailLookup:
         
         try:
             domain = email.split('@')[1]
-            resolver = dns.resolver.Resolver()
-            resolver.timeout = 5
-            resolver.lifetime = 5
+            
+            # Les six requêtes partent en parallèle (résolveur partagé + cache TTL)
+            answers = get_resolver().resolve_many([
+                (domain, 'MX'),
+                (domain, 'TXT'),
+                (f"_dmarc.{domain}", 'TXT'),
+                (domain, 'A'),
+                (domain, 'AAAA'),
+                (domain, 'NS'),
+            ])
+            
+            def records(name, rdtype):
+                answer = answers[(name, rdtype)]
+                if answer['status'] != 'NOERROR':
+                    logger.debug(f"{rdtype} lookup {name}: {answer['status']}")
+                return answer['records']
             
             # MX Records
-            mx_records = []
-            try:
-                mx_answers = resolver.resolve(domain, 'MX')
-                for mx in mx_answers:
-                    mx_records.append({
-                        'exchange': str(mx.exchange).rstrip('.'),
-                        'priority': mx.preference
-                    })
-                mx_records.sort(key=lambda x: x['priority'])
-            except Exception as e:
-                logger.debug(f"MX lookup error: {e}")
+            mx_records = [
+                {'exchange': str(mx.exchange).rstrip('.'), 'priority': mx.preference}
+                for mx in records(domain, 'MX')
+            ]
+            mx_records.sort(key=lambda x: x['priority'])
             
             # SPF Records
-            spf_records = []
-            try:
-                txt_answers = resolver.resolve(domain, 'TXT')
-                for txt in txt_answers:
-                    txt_str = str(txt).strip('"')
-                    if 'v=spf1' in txt_str:
-                        spf_records.append(txt_str)
-            except Exception as e:
-                logger.debug(f"SPF lookup error: {e}")
+            spf_records = [
+                txt_str for txt_str in (str(txt).strip('"') for txt in records(domain, 'TXT'))
+                if 'v=spf1' in txt_str
+            ]
             
             # DMARC Records
-            dmarc_records = []
-            try:
-                dmarc_answers = resolver.resolve(f"_dmarc.{domain}", 'TXT')
-                for txt in dmarc_answers:
-                    dmarc_records.append(str(txt).strip('"'))
-            except Exception as e:
-                logger.debug(f"DMARC lookup error: {e}")
-            
-            # A Records
-            a_records = []
-            try:
-                a_answers = resolver.resolve(domain, 'A')
-                for a in a_answers:
-                    a_records.append(str(a))
-            except Exception as e:
-                logger.debug(f"A record lookup error: {e}")
-            
-            # AAAA Records (IPv6)
-            aaaa_records = []
-            try:
-                aaaa_answers = resolver.resolve(domain, 'AAAA')
-                for aaaa in aaaa_answers:
-                    aaaa_records.append(str(aaaa))
-            except Exception as e:
-                logger.debug(f"AAAA record lookup error: {e}")
+            dmarc_records = [str(txt).strip('"') for txt in records(f"_dmarc.{domain}", 'TXT')]
             
-            # NS Records
-            ns_records = []
-            try:
-                ns_answers = resolver.resolve(domain, 'NS')
-                for ns in ns_answers:
-                    ns_records.append(str(ns).rstrip('.'))
-            except Exception as e:
-                logger.debug(f"NS record lookup error: {e}")
+            # A / AAAA / NS Records
+            a_records = [str(a) for a in records(domain, 'A')]
+            aaaa_records = [str(aaaa) for aaaa in records(domain, 'AAAA')]
+            ns_records = [str(ns).rstrip('.') for ns in records(domain, 'NS')]
             
             results['dns'] = {
                 'domain': domain,
@@ -181,6 +164,13 @@ class EmailLookup:
                 'mail_servers': [mx['exchange'] for mx in mx_records]
             }
             
+            # Politiques SPF/DMARC/MTA-STS/BIMI (arbres SPF partagés entre domaines)
+            if self.config.get('sources.email.mail_security', True):
+                try:
+                    results['dns']['mail_security'] = get_mail_security_analyzer().analyze(domain)
+                except Exception as e:
+                    logger.debug(f"Analyse mail security erreur: {e}")
+            
             logger.info(f"DNS: {len(mx_records)} MX, SPF={len(spf_records)>0}, DMARC={len(dmarc_records)>0} pour {domain}")
             
         except Exception as e:
@@ -189,120 +179,146 @@ class EmailLookup:
         
         return results
     
-    def check_breaches(self, email: str) -> List[Dict[str, Any]]:
-        """Vérifier les fuites de données via multiples sources"""
-        breaches = []
+    def check_domain_mail(self, domain: str) -> Dict[str, Any]:
+        """Qualifier un domaine depuis le cache DNS : peut-il recevoir du courrier ?
         
-        # 1. Have I Been Pwned
-        hibp_key = self.config.get_api_key('hibp')
-        try:
-            url = f"https://haveibeenpwned.com/api/v3/breachedaccount/{email}?truncateResponse=false"
-            headers = {**self.headers}
-            
-            if hibp_key:
-                headers['hibp-api-key'] = hibp_key
-            
-            headers['User-Agent'] = 'RavenTrace-OSINT/1.0'
-            
-            resp = requests.get(url, headers=headers, timeout=self.timeout)
-            time.sleep(1.6)  # Rate limiting HIBP
-            
-            if resp.status_code == 200:
-                data = resp.json()
-                for breach in data:
-                    breaches.append({
-                        'source': 'Have I Been Pwned',
-                        'breach_name': breach.get('Name'),
-                        'title': breach.get('Title'),
-                        'domain': breach.get('Domain'),
-                        'date': breach.get('BreachDate'),
-                        'added_date': breach.get('AddedDate'),
-                        'modified_date': breach.get('ModifiedDate'),
-                        'compromised_count': breach.get('PwnCount'),
-                        'description': breach.get('Description'),
-                        'data_classes': breach.get('DataClasses', []),
-                        'is_verified': breach.get('IsVerified'),
-                        'is_fabricated': breach.get('IsFabricated'),
-                        'is_sensitive': breach.get('IsSensitive'),
-                        'is_retired': breach.get('IsRetired'),
-                        'is_spam_list': breach.get('IsSpamList'),
-                        'logo_path': breach.get('LogoPath'),
-                        'severity': 'CRITICAL' if breach.get('IsSensitive') else 'HIGH'
-                    })
-                logger.info(f"HIBP: {len(breaches)} fuites trouvées pour {email}")
-            elif resp.status_code == 404:
-                breaches.append({
-                    'source': 'Have I Been Pwned',
-                    'status': 'clean',
-                    'message': 'Aucune fuite détectée dans HIBP',
-                    'severity': 'SAFE'
-                })
-        except Exception as e:
-            logger.debug(f"HIBP erreur: {e}")
+        Un domaine est « mort » s'il n'existe pas (NXDOMAIN), publie un MX nul
+        (RFC 7505) ou n'a ni MX ni A. Un échec réseau laisse le statut inconnu.
+        """
+        resolver = get_resolver()
+        mx = resolver.resolve(domain, 'MX')
         
-        # 2. DeHashed (si API key disponible)
-        dehashed_key = self.config.get_api_key('dehashed')
-        if dehashed_key:
-            try:
-                # DeHashed API implementation
-                pass
-            except Exception as e:
-                logger.debug(f"DeHashed erreur: {e}")
+        if mx['status'] == 'NXDOMAIN':
+            return {'domain': domain, 'status': 'dead', 'reason': 'NXDOMAIN'}
+        if mx['status'] in ('TIMEOUT', 'ERROR'):
+            return {'domain': domain, 'status': 'unknown', 'reason': mx['status']}
+        if mx['records']:
+            if all(str(r.exchange) == '.' for r in mx['records']):
+                return {'domain': domain, 'status': 'dead', 'reason': 'null MX'}
+            return {'domain': domain, 'status': 'valid', 'reason': 'MX'}
         
-        # 3. LeakCheck via web scraping (respectueux)
-        try:
-            url = f"https://leakcheck.net/api/public?check={email}"
-            resp = self.session.get(url, timeout=10)
-            
-            if resp.status_code == 200:
-                data = resp.json()
-                if data.get('found') and data.get('sources'):
-                    for source in data.get('sources', []):
-                        breaches.append({
-                            'source': 'LeakCheck',
-                            'breach_name': source,
-                            'found': True,
-                            'severity': 'HIGH'
-                        })
-        except Exception as e:
-            logger.debug(f"LeakCheck erreur: {e}")
+        a = resolver.resolve(domain, 'A')
+        if a['records']:
+            return {'domain': domain, 'status': 'valid', 'reason': 'implicit MX (A)'}
+        if a['status'] in ('TIMEOUT', 'ERROR'):
+            return {'domain': domain, 'status': 'unknown', 'reason': a['status']}
+        return {'domain': domain, 'status': 'dead', 'reason': 'no MX'}
+    
+    def prefetch_domains(self, domains, max_in_flight: int = 50) -> Dict[str, Dict[str, Any]]:
+        """Pré-résoudre MX/TXT/DMARC/A/NS de tous les domaines d'un lot
         
-        return breaches
+        Les réponses alimentent le cache du résolveur partagé : les check_dns
+        suivants n'émettent plus de requêtes. Renvoie le statut de chaque domaine.
+        """
+        domains = list(dict.fromkeys(d.lower() for d in domains))
+        queries = []
+        for domain in domains:
+            queries.extend([
+                (domain, 'MX'),
+                (domain, 'TXT'),
+                (f"_dmarc.{domain}", 'TXT'),
+                (domain, 'A'),
+                (domain, 'AAAA'),
+                (domain, 'NS'),
+            ])
+        
+        get_resolver().resolve_many(queries, max_in_flight=max_in_flight)
+        statuses = {domain: self.check_domain_mail(domain) for domain in domains}
+        
+        dead = sum(1 for s in statuses.values() if s['status'] == 'dead')
+        logger.info(f"Pré-résolution DNS: {len(domains)} domaines, {dead} sans courrier")
+        return statuses
+    
+    def prefetch_registrations(self, domains) -> Dict[str, Dict[str, Any]]:
+        """Interroger RDAP/WHOIS pour tous les domaines d'un lot, en parallèle par serveur
+        
+        Les réponses alimentent le cache des domaines : les
+        verify_domain_registration suivants sont servis sans requête.
+        """
+        return get_registration_client().lookup_many(domains)
+    
+    def check_breaches(self, email: str) -> List[Dict[str, Any]]:
+        """Vérifier les fuites de données via multiples sources"""
+        return self.breach_checker.check_breaches(email)
+    
+    def breach_report(self, email: str) -> Dict[str, Any]:
+        """Fuites et statut/latence de chaque fournisseur"""
+        return self.breach_checker.aggregate(email)
     
-    def search_social_profiles(self, email: str) -> List[Dict[str, Any]]:
-        """Chercher les profils sociaux associés à l'email"""
+    def search_social_profiles(self, email: str, on_profile: Callable[[Dict[str, Any]], None] = None,
+                               use_holehe: bool = True) -> List[Dict[str, Any]]:
+        """Chercher les profils sociaux associés à l'email
+        
+        Gravatar, GitHub et Keybase sont interrogés en parallèle avec un délai
+        par vérification ; holehe (sous-processus lent) tourne en même temps
+        avec sa propre borne (désactivable via `use_holehe`). `on_profile`
+        reçoit chaque profil dès son arrivée.
+        """
         profiles = []
-        domain = email.split('@')[1]
-        username = email.split('@')[0]
         
-        # Intégration avec holehe si disponible
-        try:
-            from modules.kali_tools import kali_tools
-            if kali_tools.tools_available.get('holehe'):
-                holehe_results = kali_tools.holehe_check(email)
-                profiles.extend(holehe_results)
-        except ImportError:
-            pass
+        def collect(result):
+            profiles.append(result)
+            if on_profile:
+                try:
+                    on_profile(result)
+                except Exception as e:
+                    logger.debug(f"Callback profil erreur: {e}")
         
-        # Recherche manuelle sur les plateformes
-        platforms = {
-            'gravatar': self._check_gravatar(email),
-            'github': self._check_github_email(email),
-            'keybase': self._check_keybase(email),
-            'linkedin': f"https://www.linkedin.com/search/results/people/?keywords={email}",
-            'facebook': f"https://www.facebook.com/search/people/?q={email}",
-            'twitter': f"https://twitter.com/search?q={email}"
+        checks = {
+            'gravatar': self._check_gravatar,
+            'github': self._check_github_email,
+            'keybase': self._check_keybase,
         }
         
-        for platform, result in platforms.items():
-            if isinstance(result, dict):
-                profiles.append(result)
-            elif isinstance(result, str):
-                profiles.append({
+        executor = ThreadPoolExecutor(max_workers=len(checks) + 1)
+        try:
+            # Intégration avec holehe si disponible (borné séparément)
+            holehe_future = None
+            try:
+                from modules.kali_tools import kali_tools
+                if use_holehe and kali_tools.tools_available.get('holehe'):
+                    holehe_future = executor.submit(kali_tools.holehe_check, email, self.holehe_timeout)
+            except ImportError:
+                pass
+            
+            futures = {executor.submit(check, email): platform for platform, check in checks.items()}
+            try:
+                for future in as_completed(futures, timeout=self.social_check_timeout):
+                    platform = futures[future]
+                    try:
+                        collect(future.result())
+                    except Exception as e:
+                        logger.debug(f"Vérification {platform} erreur: {e}")
+                        collect({'platform': platform, 'found': False})
+            except FuturesTimeout:
+                for future, platform in futures.items():
+                    if not future.done():
+                        logger.debug(f"Vérification {platform}: délai dépassé")
+                        collect({'platform': platform, 'found': False, 'status': 'timeout'})
+            
+            # Liens de recherche manuelle
+            search_links = {
+                'linkedin': f"https://www.linkedin.com/search/results/people/?keywords={email}",
+                'facebook': f"https://www.facebook.com/search/people/?q={email}",
+                'twitter': f"https://twitter.com/search?q={email}"
+            }
+            for platform, url in search_links.items():
+                collect({
                     'platform': platform,
-                    'search_url': result,
+                    'search_url': url,
                     'type': 'search_link'
                 })
+            
+            if holehe_future is not None:
+                try:
+                    for result in holehe_future.result(timeout=self.holehe_timeout + 5):
+                        collect(result)
+                except FuturesTimeout:
+                    logger.warning(f"Holehe: délai de {self.holehe_timeout}s dépassé pour {email}")
+                except Exception as e:
+                    logger.debug(f"Holehe erreur: {e}")
+        finally:
+            executor.shutdown(wait=False)
         
         logger.info(f"Profils sociaux: {len(profiles)} trouvés pour {email}")
         return profiles
@@ -329,12 +345,10 @@ class EmailLookup:
     def _check_github_email(self, email: str) -> Dict[str, Any]:
         """Chercher sur GitHub par email"""
         try:
-            # GitHub API pour recherche par email
-            url = f"https://api.github.com/search/users?q={email}+in:email"
-            resp = self.session.get(url, timeout=10)
+            # GitHub API pour recherche par email (quota 'search' suivi par le client)
+            data = get_github_client().search_users(f"{email} in:email")
             
-            if resp.status_code == 200:
-                data = resp.json()
+            if data:
                 if data.get('total_count', 0) > 0:
                     users = data.get('items', [])
                     return {
@@ -375,54 +389,33 @@ class EmailLookup:
         return {'platform': 'keybase', 'found': False}
     
     def verify_domain_registration(self, email: str) -> Dict[str, Any]:
-        """Vérifier l'enregistrement du domaine via WHOIS"""
+        """Vérifier l'enregistrement du domaine via RDAP (repli WHOIS)"""
         results = {}
+        domain = email.split('@')[1]
         
         try:
-            import whois
-            domain = email.split('@')[1]
-            
-            # WHOIS lookup
-            w = whois.whois(domain)
-            
-            results = {
-                'domain': domain,
-                'registered': True if w.domain_name else False,
-                'registrar': w.registrar if hasattr(w, 'registrar') else None,
-                'creation_date': str(w.creation_date) if hasattr(w, 'creation_date') else None,
-                'expiration_date': str(w.expiration_date) if hasattr(w, 'expiration_date') else None,
-                'updated_date': str(w.updated_date) if hasattr(w, 'updated_date') else None,
-                'status': w.status if hasattr(w, 'status') else None,
-                'name_servers': w.name_servers if hasattr(w, 'name_servers') else [],
-                'org': w.org if hasattr(w, 'org') else None,
-                'emails': w.emails if hasattr(w, 'emails') else [],
-                'country': w.country if hasattr(w, 'country') else None
-            }
-            
-            logger.info(f"WHOIS: Domaine {domain} - Registrar: {results.get('registrar')}")
-            
-        except ImportError:
-            logger.warning("Module python-whois non installé")
-            # Fallback vers une API web
+            results = get_registration_client().lookup(domain)
+            if results.get('registered'):
+                logger.info(f"{results.get('source', 'whois').upper()}: Domaine {domain} - Registrar: {results.get('registrar')}")
+        except Exception as e:
+            logger.debug(f"Registration error: {e}")
+        
+        # Fallback vers une API web
+        if not results and self.config.get_api_key('whois'):
             try:
-                domain = email.split('@')[1]
                 url = f"https://www.whoisxmlapi.com/whoisserver/WhoisService?apiKey={self.config.get_api_key('whois')}&domainName={domain}&outputFormat=JSON"
-                
-                if self.config.get_api_key('whois'):
-                    resp = self.session.get(url, timeout=10)
-                    if resp.status_code == 200:
-                        data = resp.json()
-                        results = {
-                            'domain': domain,
-                            'registered': True,
-                            'registrar': data.get('WhoisRecord', {}).get('registrarName'),
-                            'creation_date': data.get('WhoisRecord', {}).get('createdDate'),
-                            'expiration_date': data.get('WhoisRecord', {}).get('expiresDate')
-                        }
+                resp = self.session.get(url, timeout=10)
+                if resp.status_code == 200:
+                    data = resp.json()
+                    results = {
+                        'domain': domain,
+                        'registered': True,
+                        'registrar': data.get('WhoisRecord', {}).get('registrarName'),
+                        'creation_date': data.get('WhoisRecord', {}).get('createdDate'),
+                        'expiration_date': data.get('WhoisRecord', {}).get('expiresDate')
+                    }
             except Exception as e:
                 logger.debug(f"WHOIS API error: {e}")
-        except Exception as e:
-            logger.debug(f"WHOIS error: {e}")
         
         return results
     
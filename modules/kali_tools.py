@@ -3,63 +3,156 @@
 KaliTools - Intégration des outils OSINT de Kali Linux
 """
 
-import subprocess
-import json
+import asyncio
 import logging
-from typing import Dict, List, Any
-from pathlib import Path
+import time
+from typing import Callable, Dict, Iterable, List, Any, Optional
 import re
+from functools import cached_property
+
+from core.supervisor import get_tool_supervisor
+from core.tools import get_tool_locator
+from utils.extractor import IdentifierExtractor, extract_identifiers, in_domain
 
 logger = logging.getLogger(__name__)
 
+# Longueur maximale d'une ligne lue en flux ; au-delà, la ligne est ignorée
+STREAM_LINE_LIMIT = 1024 * 1024
+
+# Nom interne -> commande recherchée dans PATH
+TOOL_COMMANDS = {
+    'theharvester': 'theHarvester',
+    'sherlock': 'sherlock',
+    'holehe': 'holehe',
+    'phoneinfoga': 'phoneinfoga',
+    'whatweb': 'whatweb',
+    'dmitry': 'dmitry',
+    'maltego': 'maltego',
+    'recon-ng': 'recon-ng',
+}
+
+
 class KaliToolsIntegration:
     """Intégration avec les outils OSINT de Kali Linux"""
     
-    def __init__(self):
-        self.check_tools_availability()
+    @cached_property
+    def tools_available(self) -> Dict[str, bool]:
+        """Disponibilité des outils, déterminée au premier usage"""
+        return self.check_tools_availability()
     
-    def check_tools_availability(self):
-        """Vérifier la disponibilité des outils"""
-        self.tools_available = {
-            'theharvester': self._check_command('theHarvester'),
-            'sherlock': self._check_command('sherlock'),
-            'holehe': self._check_command('holehe'),
-            'phoneinfoga': self._check_command('phoneinfoga'),
-            'whatweb': self._check_command('whatweb'),
-            'dmitry': self._check_command('dmitry'),
-            'maltego': self._check_command('maltego'),
-            'recon-ng': self._check_command('recon-ng')
-        }
+    def check_tools_availability(self) -> Dict[str, bool]:
+        """Vérifier la disponibilité des outils (cache disque partagé)"""
+        paths = get_tool_locator().which_many(TOOL_COMMANDS.values())
+        self.tools_available = {name: paths[command] is not None for name, command in TOOL_COMMANDS.items()}
         
         logger.info(f"Outils Kali disponibles: {[k for k,v in self.tools_available.items() if v]}")
+        return self.tools_available
     
     def _check_command(self, command: str) -> bool:
         """Vérifier si une commande est disponible"""
+        return get_tool_locator().which(command) is not None
+    
+    def _run_command(self, command: List[str], timeout: int = 30, parser: Callable[[str], Any] = None,
+                     cache_args: List[str] = None) -> Any:
+        """Exécuter une commande via le superviseur (pool borné, limites, cache)
+        
+        Renvoie la sortie analysée par `parser` (None en cas d'échec),
+        ou stdout ("" en cas d'échec) sans parser. Un code de sortie non nul
+        n'est pas un échec : la sortie produite est renvoyée.
+        """
+        result = get_tool_supervisor().run(command, timeout=timeout, parser=parser, cache_args=cache_args)
+        if result['status'] in ('ok', 'partial'):
+            return result['output']
+        return None if parser else ""
+    
+    async def _stream_command(self, command: List[str], on_line: Callable[[str], Optional[bool]],
+                              deadline: float) -> str:
+        """Lancer une commande et traiter sa sortie ligne par ligne jusqu'à `deadline`
+
+        Renvoie 'ok', 'timeout' (processus tué à l'échéance), 'stopped'
+        (`on_line` a renvoyé True : arrêt anticipé), 'partial' (code de sortie
+        non nul, lignes déjà transmises) ou 'error'. Les lignes plus longues que
+        STREAM_LINE_LIMIT sont ignorées sans interrompre la lecture. Une place
+        du superviseur (globale et par outil) est tenue pendant toute la lecture.
+        """
+        loop = asyncio.get_running_loop()
+        supervisor = get_tool_supervisor()
+        slot = supervisor.slot(command[0], time.monotonic() + max(0.0, deadline - loop.time()))
+        # L'attente d'une place bloque : elle se fait hors de la boucle d'événements
+        if not await loop.run_in_executor(None, slot.__enter__):
+            slot.__exit__(None, None, None)
+            return 'timeout'
         try:
-            subprocess.run(['which', command], capture_output=True, check=True)
-            return True
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            return False
+            return await self._read_stream(command, on_line, deadline)
+        finally:
+            slot.__exit__(None, None, None)
     
-    def _run_command(self, command: List[str], timeout: int = 30) -> str:
-        """Exécuter une commande système"""
+    async def _read_stream(self, command: List[str], on_line: Callable[[str], Optional[bool]],
+                           deadline: float) -> str:
+        """Lancer la commande dans son propre groupe et lire sa sortie (voir _stream_command)"""
+        loop = asyncio.get_running_loop()
+        supervisor = get_tool_supervisor()
         try:
-            result = subprocess.run(
-                command, 
-                capture_output=True, 
-                text=True, 
-                timeout=timeout
+            process = await asyncio.create_subprocess_exec(
+                *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+                limit=STREAM_LINE_LIMIT, start_new_session=True
             )
-            return result.stdout
-        except subprocess.TimeoutExpired:
-            logger.error(f"Timeout lors de l'exécution de: {' '.join(command)}")
-            return ""
-        except Exception as e:
+        except OSError as e:
             logger.error(f"Erreur commande: {e}")
-            return ""
+            return 'error'
+        
+        supervisor.apply_limits(process.pid)
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError
+                try:
+                    line = await asyncio.wait_for(process.stdout.readline(), remaining)
+                except ValueError:
+                    # Ligne trop longue : le tampon est vidé par readline, on passe à la suite
+                    logger.debug(f"Ligne de plus de {STREAM_LINE_LIMIT} octets ignorée: {command[0]}")
+                    continue
+                if not line:
+                    break
+                if on_line(line.decode('utf-8', errors='replace')):
+                    return 'stopped'
+            if await process.wait() != 0:
+                logger.warning(f"{command[0]} terminé avec le code {process.returncode}")
+                return 'partial'
+            return 'ok'
+        except asyncio.TimeoutError:
+            logger.warning(f"Timeout lors de l'exécution de: {' '.join(command)}")
+            return 'timeout'
+        finally:
+            if process.returncode is None:
+                supervisor.kill_group(process)
+                await process.wait()
+    
+    async def _harvest(self, domain: str, sources: List[str], max_concurrent: int, timeout: float,
+                       on_line: Callable[[str], None]) -> Dict[str, str]:
+        """Backends theHarvester en parallèle (au plus `max_concurrent`), échéance commune"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        semaphore = asyncio.Semaphore(max_concurrent)
+        
+        async def run(source: str) -> str:
+            async with semaphore:
+                if loop.time() >= deadline:
+                    return 'timeout'
+                cmd = ['theHarvester', '-d', domain, '-b', source, '-l', '100']
+                return await self._stream_command(cmd, on_line, deadline)
+        
+        statuses = await asyncio.gather(*(run(source) for source in sources))
+        return dict(zip(sources, statuses))
     
-    def theharvester_search(self, domain: str) -> Dict[str, Any]:
-        """Utiliser theHarvester pour rechercher des emails et sous-domaines"""
+    def theharvester_search(self, domain: str, sources: List[str] = None, max_concurrent: int = 5,
+                            timeout: float = 90, on_hit: Callable[[str, str], None] = None) -> Dict[str, Any]:
+        """Utiliser theHarvester pour rechercher des emails et sous-domaines
+        
+        Les backends tournent en parallèle ; leur sortie est analysée au fil
+        de l'eau et chaque nouvel email / hôte / IP est signalé à `on_hit`.
+        """
         if not self.tools_available.get('theharvester'):
             return {'error': 'theHarvester not available'}
         
@@ -67,44 +160,38 @@ class KaliToolsIntegration:
             'emails': [],
             'hosts': [],
             'ips': [],
-            'subdomains': []
+            'subdomains': [],
+            'backends': {}
         }
         
         try:
-            # Exécuter theHarvester avec plusieurs sources
-            sources = ['google', 'bing', 'linkedin', 'twitter', 'yahoo']
+            sources = sources or ['google', 'bing', 'linkedin', 'twitter', 'yahoo']
+            supervisor = get_tool_supervisor()
+            cache_args = ['-d', domain.lower(), '-b', ','.join(sources), '-l', '100']
+            cached = supervisor.cached('theHarvester', cache_args)
+            if cached is not None:
+                return cached
             
-            for source in sources:
-                cmd = [
-                    'theHarvester',
-                    '-d', domain,
-                    '-b', source,
-                    '-l', '100'
-                ]
-                
-                output = self._run_command(cmd, timeout=60)
-                
-                # Parser les résultats
-                if output:
-                    # Extraire les emails
-                    email_pattern = r'[\w\.-]+@' + re.escape(domain)
-                    emails = re.findall(email_pattern, output)
-                    results['emails'].extend(emails)
-                    
-                    # Extraire les hosts
-                    host_pattern = r'[\w\.-]+\.' + re.escape(domain)
-                    hosts = re.findall(host_pattern, output)
-                    results['hosts'].extend(hosts)
-                    
-                    # Extraire les IPs
-                    ip_pattern = r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b'
-                    ips = re.findall(ip_pattern, output)
-                    results['ips'].extend(ips)
+            extractor = IdentifierExtractor(kinds=('emails', 'domains', 'ips'))
+            target = domain.lower()
+            
+            def on_line(line: str) -> None:
+                # Dédupliqués au fil des sources : feed() ne renvoie que les nouveautés
+                for kind, value in extractor.feed(line if line.endswith('\n') else line + '\n'):
+                    if kind == 'emails' and in_domain(value.rsplit('@', 1)[1], domain):
+                        results['emails'].append(value)
+                    elif kind == 'domains' and value != target and in_domain(value, domain):
+                        results['hosts'].append(value)
+                    elif kind == 'ips':
+                        results['ips'].append(value)
+                    else:
+                        continue
+                    if on_hit:
+                        on_hit(kind, value)
             
-            # Dédupliquer
-            results['emails'] = list(set(results['emails']))
-            results['hosts'] = list(set(results['hosts']))
-            results['ips'] = list(set(results['ips']))
+            results['backends'] = asyncio.run(self._harvest(domain, sources, max_concurrent, timeout, on_line))
+            if all(status == 'ok' for status in results['backends'].values()):
+                supervisor.store('theHarvester', cache_args, results)
             
             logger.info(f"TheHarvester: {len(results['emails'])} emails, {len(results['hosts'])} hosts trouvés")
             
@@ -113,75 +200,85 @@ class KaliToolsIntegration:
         
         return results
     
-    def sherlock_search(self, username: str) -> List[Dict[str, Any]]:
-        """Utiliser Sherlock pour chercher un username"""
+    # Ligne Sherlock : "[+] GitHub: https://github.com/user" ou "[-] Site: Not Found!"
+    SHERLOCK_LINE = re.compile(r'^\[([+\-*!])\]\s+([^:]+?):\s+(.*)$')
+    
+    @staticmethod
+    def site_key(name: str) -> str:
+        """Nom de site normalisé pour comparer Sherlock et les sondes natives"""
+        return re.sub(r'[^a-z0-9]', '', name.lower())
+    
+    @classmethod
+    def _parse_sherlock_line(cls, line: str, username: str) -> Optional[Dict[str, Any]]:
+        """Résultat d'un site depuis une ligne de sortie Sherlock (None si autre ligne)"""
+        match = cls.SHERLOCK_LINE.match(line.strip())
+        if not match or match.group(1) not in '+-':
+            return None
+        mark, site, detail = match.groups()
+        found = mark == '+' and detail.startswith('http')
+        return {
+            'platform': site.strip(),
+            'username': username,
+            'found': found,
+            'url': detail.strip() if found else '',
+            'error': '' if found or 'not found' in detail.lower() else detail.strip(),
+            'source': 'sherlock'
+        }
+    
+    def sherlock_search(self, username: str, on_result: Callable[[Dict[str, Any]], None] = None,
+                        covered: Callable[[str], bool] = None, should_stop: Callable[[], bool] = None,
+                        timeout: float = 120, sites: Iterable[str] = None) -> List[Dict[str, Any]]:
+        """Utiliser Sherlock pour chercher un username, résultats lus au fil de l'eau
+        
+        Chaque site est transmis à `on_result` dès que Sherlock l'imprime, sauf
+        ceux déjà couverts (`covered(site)`, appelé à chaque ligne depuis ce
+        thread : doit être thread-safe). `should_stop` permet d'arrêter
+        Sherlock dès que le résultat est jugé suffisant. `sites` limite la
+        recherche à ces sites Sherlock (tous par défaut).
+        """
         if not self.tools_available.get('sherlock'):
             return []
         
         results = []
         
         try:
-            # Créer un fichier temporaire pour les résultats JSON
-            import tempfile
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-                output_file = f.name
+            supervisor = get_tool_supervisor()
             
-            cmd = [
-                'sherlock',
-                username,
-                '--output', output_file,
-                '--print-all',
-                '--timeout', '10'
-            ]
+            def emit(result: Dict[str, Any]) -> None:
+                if on_result and not (covered and covered(result['platform'])):
+                    on_result(result)
             
-            # Exécuter Sherlock
-            output = self._run_command(cmd, timeout=120)
+            site_args = [arg for site in (sites or ()) for arg in ('--site', site)]
+            cache_args = [username, '--print-all', '--timeout', '10'] + site_args
+            cached = supervisor.cached('sherlock', cache_args)
+            if cached is not None:
+                for result in cached:
+                    emit(result)
+                return cached
             
-            # Parser le fichier JSON de sortie
-            if Path(output_file).exists():
-                with open(output_file, 'r') as f:
-                    try:
-                        sherlock_data = json.load(f)
-                        
-                        for platform, data in sherlock_data.items():
-                            if isinstance(data, dict):
-                                results.append({
-                                    'platform': platform,
-                                    'username': username,
-                                    'found': data.get('status', '').lower() == 'claimed',
-                                    'url': data.get('url_main', ''),
-                                    'error': data.get('error_msg', ''),
-                                    'source': 'sherlock'
-                                })
-                    except json.JSONDecodeError:
-                        # Si pas de JSON, parser la sortie texte
-                        for line in output.split('\n'):
-                            if 'https://' in line or 'http://' in line:
-                                # Extraire l'URL et la plateforme
-                                parts = line.strip().split()
-                                if parts:
-                                    url = [p for p in parts if p.startswith('http')][0] if any(p.startswith('http') for p in parts) else ''
-                                    if url:
-                                        platform = url.split('/')[2].replace('www.', '').split('.')[0]
-                                        results.append({
-                                            'platform': platform,
-                                            'username': username,
-                                            'found': True,
-                                            'url': url,
-                                            'source': 'sherlock'
-                                        })
-                
-                # Nettoyer le fichier temporaire
-                Path(output_file).unlink(missing_ok=True)
+            def on_line(line: str) -> bool:
+                result = self._parse_sherlock_line(line, username)
+                if result:
+                    results.append(result)
+                    emit(result)
+                return bool(should_stop and should_stop())
+            
+            cmd = ['sherlock', username, '--print-all', '--no-color', '--no-txt', '--timeout', '10'] + site_args
+            status = asyncio.run(self._run_stream(cmd, on_line, timeout))
+            if status == 'ok':
+                supervisor.store('sherlock', cache_args, results)
             
-            logger.info(f"Sherlock: {len(results)} profils trouvés pour {username}")
+            logger.info(f"Sherlock: {sum(1 for r in results if r['found'])} profils trouvés pour {username} ({status})")
             
         except Exception as e:
             logger.error(f"Sherlock error: {e}")
         
         return results
     
-    def holehe_check(self, email: str) -> List[Dict[str, Any]]:
+    async def _run_stream(self, command: List[str], on_line: Callable[[str], Optional[bool]], timeout: float) -> str:
+        return await self._stream_command(command, on_line, asyncio.get_running_loop().time() + timeout)
+    
+    def holehe_check(self, email: str, timeout: int = 60) -> List[Dict[str, Any]]:
         """Utiliser holehe pour vérifier l'existence d'un email"""
         if not self.tools_available.get('holehe'):
             return []
@@ -190,20 +287,8 @@ class KaliToolsIntegration:
         
         try:
             cmd = ['holehe', email, '--only-used']
-            output = self._run_command(cmd, timeout=60)
-            
-            # Parser la sortie de holehe
-            for line in output.split('\n'):
-                if '[+]' in line:  # Compte trouvé
-                    parts = line.split('[+]')[1].strip()
-                    platform = parts.split()[0] if parts else 'unknown'
-                    
-                    results.append({
-                        'platform': platform.lower(),
-                        'email': email,
-                        'found': True,
-                        'source': 'holehe'
-                    })
+            results = self._run_command(cmd, timeout=timeout,
+                                        parser=lambda output: self._parse_holehe(output, email)) or []
             
             logger.info(f"Holehe: {len(results)} comptes trouvés pour {email}")
             
@@ -212,6 +297,23 @@ class KaliToolsIntegration:
         
         return results
     
+    @staticmethod
+    def _parse_holehe(output: str, email: str) -> List[Dict[str, Any]]:
+        """Comptes trouvés dans la sortie de holehe"""
+        results = []
+        for line in output.split('\n'):
+            if '[+]' in line:  # Compte trouvé
+                parts = line.split('[+]')[1].strip()
+                platform = parts.split()[0] if parts else 'unknown'
+                
+                results.append({
+                    'platform': platform.lower(),
+                    'email': email,
+                    'found': True,
+                    'source': 'holehe'
+                })
+        return results
+    
     def phoneinfoga_scan(self, phone: str) -> Dict[str, Any]:
         """Utiliser PhoneInfoga pour scanner un numéro"""
         if not self.tools_available.get('phoneinfoga'):
@@ -227,24 +329,7 @@ class KaliToolsIntegration:
         
         try:
             cmd = ['phoneinfoga', 'scan', '-n', phone]
-            output = self._run_command(cmd, timeout=30)
-            
-            # Parser la sortie
-            if 'Valid' in output:
-                results['valid'] = True
-            
-            # Extraire les informations
-            patterns = {
-                'carrier': r'Carrier:\s*(.+)',
-                'country': r'Country:\s*(.+)',
-                'line_type': r'Line type:\s*(.+)',
-                'location': r'Location:\s*(.+)'
-            }
-            
-            for key, pattern in patterns.items():
-                match = re.search(pattern, output, re.IGNORECASE)
-                if match:
-                    results[key] = match.group(1).strip()
+            results.update(self._run_command(cmd, timeout=30, parser=self._parse_phoneinfoga) or {})
             
             logger.info(f"PhoneInfoga: Scan complété pour {phone}")
             
@@ -253,6 +338,26 @@ class KaliToolsIntegration:
         
         return results
     
+    @staticmethod
+    def _parse_phoneinfoga(output: str) -> Dict[str, Any]:
+        """Champs extraits de la sortie de PhoneInfoga"""
+        results = {}
+        if 'Valid' in output:
+            results['valid'] = True
+        
+        patterns = {
+            'carrier': r'Carrier:\s*(.+)',
+            'country': r'Country:\s*(.+)',
+            'line_type': r'Line type:\s*(.+)',
+            'location': r'Location:\s*(.+)'
+        }
+        
+        for key, pattern in patterns.items():
+            match = re.search(pattern, output, re.IGNORECASE)
+            if match:
+                results[key] = match.group(1).strip()
+        return results
+    
     def dmitry_gather(self, domain: str) -> Dict[str, Any]:
         """Utiliser dmitry pour gather des infos sur un domaine"""
         if not self.tools_available.get('dmitry'):
@@ -266,15 +371,12 @@ class KaliToolsIntegration:
         
         try:
             cmd = ['dmitry', '-wine', domain]
-            output = self._run_command(cmd, timeout=45)
-            
-            # Parser emails
-            email_pattern = r'[\w\.-]+@[\w\.-]+'
-            results['emails'] = list(set(re.findall(email_pattern, output)))
-            
-            # Parser subdomains
-            subdomain_pattern = r'[\w\.-]+\.' + re.escape(domain)
-            results['subdomains'] = list(set(re.findall(subdomain_pattern, output)))
+            # Parser emails et sous-domaines
+            found = self._run_command(cmd, timeout=45,
+                                      parser=lambda output: extract_identifiers(output, kinds=('emails', 'domains')))
+            if found:
+                results['emails'] = found['emails']
+                results['subdomains'] = [h for h in found['domains'] if h != domain.lower() and in_domain(h, domain)]
             
             logger.info(f"Dmitry: {len(results['emails'])} emails trouvés")
             
@@ -283,5 +385,5 @@ class KaliToolsIntegration:
         
         return results
 
-# Instance globale
+# Instance globale (outils recherchés au premier usage)
 kali_tools = KaliToolsIntegration()
\ No newline at end of file
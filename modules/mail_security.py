@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+MailSecurity - Analyse des politiques SPF / DMARC / MTA-STS / BIMI
+Expansion récursive SPF (limite RFC 7208 de 10 requêtes) avec mémoïsation
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, List, Any, Optional, Tuple
+
+from core.http import CachedSession
+from core.resolver import get_resolver
+
+logger = logging.getLogger(__name__)
+
+# Mécanismes SPF qui coûtent une requête DNS (RFC 7208 §4.6.4)
+DNS_MECHANISMS = ('include', 'a', 'mx', 'ptr', 'exists')
+SPF_LOOKUP_LIMIT = 10
+# Arbres SPF mémoïsés : durée de validité (s) et nombre maximal
+SPF_TREE_TTL = 300
+SPF_TREE_MAX = 1024
+
+
+def _txt_strings(records) -> List[str]:
+    """Concaténer les chaînes d'un enregistrement TXT"""
+    texts = []
+    for record in records:
+        strings = getattr(record, 'strings', None)
+        if strings is not None:
+            texts.append(b''.join(strings).decode('utf-8', errors='replace'))
+        else:
+            texts.append(str(record).strip('"'))
+    return texts
+
+
+def parse_tags(record: str) -> Dict[str, str]:
+    """Parser un enregistrement tag=valeur (DMARC, MTA-STS, BIMI)"""
+    tags = {}
+    for part in record.split(';'):
+        name, sep, value = part.strip().partition('=')
+        if sep:
+            tags[name.strip().lower()] = value.strip()
+    return tags
+
+
+class MailSecurityAnalyzer:
+    """Analyseur de politiques de sécurité mail avec cache partagé entre domaines"""
+
+    def __init__(self):
+        self.resolver = get_resolver()
+        self.session = CachedSession()
+        self.timeout = 10
+        # Arbres SPF expansés, partagés entre domaines (_spf.google.com, ...) :
+        # domaine -> (expiration, arbre)
+        self._spf_trees: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # SPF
+    # ------------------------------------------------------------------
+
+    def _spf_record(self, domain: str) -> Optional[str]:
+        records = [t for t in _txt_strings(self.resolver.records(domain, 'TXT'))
+                   if t.lower().startswith('v=spf1')]
+        if len(records) > 1:
+            logger.debug(f"SPF: plusieurs enregistrements pour {domain} (permerror)")
+        return records[0] if records else None
+
+    def _cached_tree(self, domain: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._spf_trees.get(domain)
+            if entry and entry[0] > time.time():
+                return entry[1]
+            if entry:
+                del self._spf_trees[domain]
+        return None
+
+    def _store_tree(self, domain: str, node: Dict[str, Any]) -> None:
+        with self._lock:
+            if len(self._spf_trees) >= SPF_TREE_MAX:
+                # Éviction du plus ancien (ordre d'insertion)
+                del self._spf_trees[next(iter(self._spf_trees))]
+            self._spf_trees[domain] = (time.time() + SPF_TREE_TTL, node)
+
+    def expand_spf(self, domain: str, _stack: tuple = (), _count: list = None) -> Dict[str, Any]:
+        """Expanser l'arbre SPF d'un domaine (include: et redirect= récursifs)
+
+        Chaque nœud porte `lookups`, le nombre cumulé de requêtes DNS de son
+        sous-arbre, ce qui permet d'appliquer la limite de 10 sans recalcul.
+        L'expansion s'arrête dès que la limite est dépassée (permerror) :
+        un arbre hostile ne déclenche pas de requêtes en cascade.
+        """
+        count = _count if _count is not None else [0]
+        domain = domain.lower().rstrip('.')
+        cached = self._cached_tree(domain)
+        if cached is not None:
+            count[0] += cached['lookups']
+            return cached
+
+        node = {
+            'domain': domain,
+            'record': None,
+            'mechanisms': [],
+            'includes': [],
+            'redirect': None,
+            'all': None,
+            'ip4': [],
+            'ip6': [],
+            'lookups': 0,
+            'errors': [],
+            'truncated': False,
+        }
+
+        if domain in _stack:
+            node['errors'].append(f"boucle include via {domain}")
+            return node
+
+        record = self._spf_record(domain)
+        node['record'] = record
+        if record is None:
+            node['errors'].append('aucun enregistrement SPF')
+        else:
+            for term in record.split()[1:]:
+                qualifier = term[0] if term[0] in '+-~?' else '+'
+                body = term[1:] if term[0] in '+-~?' else term
+                name, _, value = body.partition(':')
+                name = name.split('/')[0].lower()
+
+                if body.lower().startswith('redirect='):
+                    node['redirect'] = body.split('=', 1)[1]
+                    continue
+                if '=' in body and ':' not in body:
+                    continue  # modificateur inconnu (exp=...)
+
+                node['mechanisms'].append(f"{qualifier}{body}")
+                if name == 'ip4':
+                    node['ip4'].append(value)
+                elif name == 'ip6':
+                    node['ip6'].append(value)
+                elif name == 'all':
+                    node['all'] = qualifier
+
+                if name in DNS_MECHANISMS:
+                    node['lookups'] += 1
+                    count[0] += 1
+                    if self._over_limit(node, count):
+                        break
+                if name == 'include' and value:
+                    child = self.expand_spf(value, _stack + (domain,), count)
+                    node['includes'].append(child)
+                    node['lookups'] += child['lookups']
+                    if child['truncated'] or self._over_limit(node, count):
+                        node['truncated'] = True
+                        break
+
+            # redirect= n'est appliqué qu'en l'absence de mécanisme "all"
+            if node['redirect'] and node['all'] is None and not node['truncated']:
+                node['lookups'] += 1
+                count[0] += 1
+                if not self._over_limit(node, count):
+                    child = self.expand_spf(node['redirect'], _stack + (domain,), count)
+                    node['includes'].append(child)
+                    node['lookups'] += child['lookups']
+                    node['all'] = child['all']
+                    node['truncated'] = child['truncated']
+
+        # Un arbre tronqué dépend du budget de l'appelant : pas de mémoïsation
+        if not node['truncated']:
+            self._store_tree(domain, node)
+        return node
+
+    @staticmethod
+    def _over_limit(node: Dict[str, Any], count: list) -> bool:
+        """Limite de requêtes dépassée : arrêt de l'expansion (permerror)"""
+        if count[0] <= SPF_LOOKUP_LIMIT:
+            return False
+        if not node['truncated']:
+            node['truncated'] = True
+            node['errors'].append(f"permerror: plus de {SPF_LOOKUP_LIMIT} requêtes DNS")
+        return True
+
+    def analyze_spf(self, domain: str) -> Dict[str, Any]:
+        """Résumé SPF : politique finale, nombre de requêtes, dépassement de limite"""
+        tree = self.expand_spf(domain)
+
+        ip4, ip6, errors = [], [], []
+
+        def walk(node):
+            ip4.extend(node['ip4'])
+            ip6.extend(node['ip6'])
+            errors.extend(f"{node['domain']}: {e}" for e in node['errors'])
+            for child in node['includes']:
+                walk(child)
+
+        walk(tree)
+        policy = {'-': 'fail', '~': 'softfail', '?': 'neutral', '+': 'pass'}.get(tree['all'])
+
+        return {
+            'configured': tree['record'] is not None,
+            'record': tree['record'],
+            'all_policy': policy,
+            'dns_lookups': tree['lookups'],
+            'exceeds_lookup_limit': tree['lookups'] > SPF_LOOKUP_LIMIT,
+            'includes': [child['domain'] for child in tree['includes']],
+            'ip4_count': len(ip4),
+            'ip6_count': len(ip6),
+            'errors': errors,
+        }
+
+    # ------------------------------------------------------------------
+    # DMARC / MTA-STS / BIMI
+    # ------------------------------------------------------------------
+
+    def analyze_dmarc(self, domain: str) -> Dict[str, Any]:
+        """Parser les tags DMARC (p, sp, pct, rua, ruf, adkim, aspf)"""
+        records = [t for t in _txt_strings(self.resolver.records(f"_dmarc.{domain}", 'TXT'))
+                   if t.lower().startswith('v=dmarc1')]
+        if not records:
+            return {'configured': False}
+
+        tags = parse_tags(records[0])
+        return {
+            'configured': True,
+            'record': records[0],
+            'policy': tags.get('p'),
+            'subdomain_policy': tags.get('sp', tags.get('p')),
+            'pct': int(tags['pct']) if tags.get('pct', '').isdigit() else 100,
+            'rua': [u.strip() for u in tags.get('rua', '').split(',') if u.strip()],
+            'ruf': [u.strip() for u in tags.get('ruf', '').split(',') if u.strip()],
+            'adkim': tags.get('adkim', 'r'),
+            'aspf': tags.get('aspf', 'r'),
+            'enforced': tags.get('p') in ('quarantine', 'reject'),
+        }
+
+    def analyze_mta_sts(self, domain: str, fetch_policy: bool = True) -> Dict[str, Any]:
+        """Enregistrement _mta-sts et politique HTTPS (RFC 8461)"""
+        records = [t for t in _txt_strings(self.resolver.records(f"_mta-sts.{domain}", 'TXT'))
+                   if t.lower().startswith('v=stsv1')]
+        if not records:
+            return {'configured': False}
+
+        result = {'configured': True, 'id': parse_tags(records[0]).get('id')}
+        if fetch_policy:
+            try:
+                resp = self.session.get(f"https://mta-sts.{domain}/.well-known/mta-sts.txt", timeout=self.timeout)
+                if resp.status_code == 200:
+                    policy = {}
+                    mx = []
+                    for line in resp.text.splitlines():
+                        key, _, value = line.partition(':')
+                        key, value = key.strip().lower(), value.strip()
+                        if key == 'mx':
+                            mx.append(value)
+                        elif key:
+                            policy[key] = value
+                    result.update({
+                        'mode': policy.get('mode'),
+                        'max_age': int(policy['max_age']) if policy.get('max_age', '').isdigit() else None,
+                        'mx': mx,
+                    })
+            except Exception as e:
+                logger.debug(f"MTA-STS policy {domain} erreur: {e}")
+        return result
+
+    def analyze_bimi(self, domain: str, selector: str = 'default') -> Dict[str, Any]:
+        """Enregistrement BIMI (logo l= et certificat VMC a=)"""
+        records = [t for t in _txt_strings(self.resolver.records(f"{selector}._bimi.{domain}", 'TXT'))
+                   if t.lower().startswith('v=bimi1')]
+        if not records:
+            return {'configured': False}
+
+        tags = parse_tags(records[0])
+        return {
+            'configured': True,
+            'logo_url': tags.get('l') or None,
+            'vmc_url': tags.get('a') or None,
+        }
+
+    def analyze(self, domain: str, fetch_mta_sts_policy: bool = True) -> Dict[str, Any]:
+        """Analyse complète d'un domaine"""
+        domain = domain.lower()
+        # Les requêtes de premier niveau partent en un seul lot
+        self.resolver.resolve_many([
+            (domain, 'TXT'),
+            (f"_dmarc.{domain}", 'TXT'),
+            (f"_mta-sts.{domain}", 'TXT'),
+            (f"default._bimi.{domain}", 'TXT'),
+        ])
+        return {
+            'domain': domain,
+            'spf': self.analyze_spf(domain),
+            'dmarc': self.analyze_dmarc(domain),
+            'mta_sts': self.analyze_mta_sts(domain, fetch_mta_sts_policy),
+            'bimi': self.analyze_bimi(domain),
+        }
+
+    def clear(self) -> None:
+        """Vider le cache des arbres SPF"""
+        with self._lock:
+            self._spf_trees.clear()
+
+
+# Analyseur partagé (créé au premier usage)
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+def get_mail_security_analyzer() -> MailSecurityAnalyzer:
+    """Obtenir l'analyseur partagé (cache SPF commun à tout un lot)"""
+    global _analyzer
+    with _analyzer_lock:
+        if _analyzer is None:
+            _analyzer = MailSecurityAnalyzer()
+        return _analyzer
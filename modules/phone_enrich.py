@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+PhoneEnrich - Enrichissement hors ligne de grandes listes de numéros
+Normalisation E.164, métadonnées phonenumbers mémoïsées par préfixe,
+traitement par blocs dans un pool de processus, sortie en colonnes
+"""
+
+import csv
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+
+import phonenumbers
+from phonenumbers import carrier, geocoder, timezone
+from phonenumbers.carrierdata import CARRIER_LONGEST_PREFIX
+from phonenumbers.geodata import GEOCODE_LONGEST_PREFIX
+from phonenumbers.tzdata import TIMEZONE_LONGEST_PREFIX
+
+from modules.phone_prefixes import get_prefix_classifier
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ['input', 'e164', 'valid', 'region', 'type', 'category', 'carrier', 'location', 'timezones']
+
+# Les tables carrier/geocoder/timezone ne regardent que ces premiers chiffres
+PREFIX_DIGITS = max(CARRIER_LONGEST_PREFIX, GEOCODE_LONGEST_PREFIX, TIMEZONE_LONGEST_PREFIX)
+
+TYPE_NAMES = {value: name.lower() for name, value in vars(phonenumbers.PhoneNumberType).items()
+              if name.isupper()}
+
+
+# (préfixe, type, région) -> (opérateur, localisation, fuseaux), un cache par processus
+_prefix_memo: Dict[Tuple[str, int, Optional[str]], Tuple[str, str, str]] = {}
+MEMO_MAX_SIZE = 500000
+
+
+def _prefix_metadata(number: phonenumbers.PhoneNumber, key: Tuple[str, int, Optional[str]]) -> Tuple[str, str, str]:
+    """Métadonnées identiques pour tous les numéros partageant préfixe, type et région"""
+    cached = _prefix_memo.get(key)
+    if cached is None:
+        cached = (
+            carrier.name_for_number(number, "en"),
+            geocoder.description_for_number(number, "en"),
+            '|'.join(timezone.time_zones_for_number(number)),
+        )
+        if len(_prefix_memo) >= MEMO_MAX_SIZE:
+            _prefix_memo.clear()
+        _prefix_memo[key] = cached
+    return cached
+
+
+def enrich_number(raw: str, region: Optional[str] = "FR") -> Dict[str, Any]:
+    """Enrichir un numéro (une ligne de sortie)"""
+    row = dict.fromkeys(COLUMNS)
+    row['input'] = raw
+    row['valid'] = False
+    try:
+        number = phonenumbers.parse(raw, region)
+    except phonenumbers.NumberParseException:
+        return row
+
+    row['e164'] = phonenumbers.format_number(number, phonenumbers.PhoneNumberFormat.E164)
+    row['region'] = phonenumbers.region_code_for_number(number)
+    number_type = phonenumbers.number_type(number)
+    row['type'] = TYPE_NAMES.get(number_type, 'unknown')
+    # number_type != UNKNOWN équivaut à is_valid_number pour une région résolue
+    row['valid'] = row['region'] is not None and number_type != phonenumbers.PhoneNumberType.UNKNOWN
+    if not row['valid']:
+        return row
+
+    line = get_prefix_classifier().lookup(row['e164'])
+    if number_type == phonenumbers.PhoneNumberType.VOIP:
+        row['category'] = 'voip'
+    elif line:
+        row['category'] = line['category']
+
+    key = (row['e164'][:1 + PREFIX_DIGITS], number_type, row['region'])
+    row['carrier'], row['location'], row['timezones'] = _prefix_metadata(number, key)
+    return row
+
+
+def enrich_chunk(numbers: List[str], region: Optional[str] = "FR") -> Dict[str, List[Any]]:
+    """Enrichir un bloc de numéros, résultat en colonnes"""
+    columns: Dict[str, List[Any]] = {name: [] for name in COLUMNS}
+    for raw in numbers:
+        row = enrich_number(raw, region)
+        for name in COLUMNS:
+            columns[name].append(row[name])
+    return columns
+
+
+class PhoneEnricher:
+    """Enrichissement par blocs dans un pool de processus (ordre d'entrée conservé)"""
+
+    def __init__(self, region: Optional[str] = "FR", workers: int = None, chunk_size: int = 50000):
+        self.region = region
+        self.workers = workers
+        self.chunk_size = chunk_size
+
+    def _chunks(self, numbers: Iterable[str]) -> Iterator[List[str]]:
+        iterator = iter(numbers)
+        while True:
+            chunk = list(islice(iterator, self.chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def enrich(self, numbers: Iterable[str]) -> Iterator[Dict[str, List[Any]]]:
+        """Générer les blocs enrichis ; au plus 2 blocs en attente par worker"""
+        if self.workers == 1:
+            for chunk in self._chunks(numbers):
+                yield enrich_chunk(chunk, self.region)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            max_pending = 2 * executor._max_workers
+            pending = deque()
+            for chunk in self._chunks(numbers):
+                pending.append(executor.submit(enrich_chunk, chunk, self.region))
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+
+def read_numbers(path: str, column: str = None) -> Iterator[str]:
+    """Lire une colonne de numéros d'un CSV (nom ou index, en-tête détecté)"""
+    with open(path, newline='', encoding='utf-8', errors='replace') as f:
+        sample = f.read(65536)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t|')
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(f, dialect)
+        first = next(reader, [])
+        index = int(column) if column and column.isdigit() else 0
+        # En-tête : aucun chiffre sur la première ligne (une seule colonne déjoue le Sniffer)
+        if first and not any(ch.isdigit() for ch in ''.join(first)):
+            if column in first:
+                index = first.index(column)
+        elif len(first) > index and first[index].strip():
+            yield first[index].strip()
+
+        for row in reader:
+            if len(row) > index and row[index].strip():
+                yield row[index].strip()
+
+
+class ColumnarWriter:
+    """Écriture des blocs en Parquet (si pyarrow est installé) ou en CSV"""
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self.rows = 0
+        self._parquet = None
+        self._csv_file = None
+        self._csv = None
+
+        if self.path.endswith('.parquet'):
+            try:
+                import pyarrow
+                import pyarrow.parquet
+                self._pa = pyarrow
+                self._pq = pyarrow.parquet
+                self._parquet = True
+            except ImportError:
+                logger.warning("pyarrow non installé - sortie CSV")
+                self.path = self.path[:-len('.parquet')] + '.csv'
+
+        if not self._parquet:
+            self._csv_file = open(self.path, 'w', newline='', encoding='utf-8')
+            self._csv = csv.writer(self._csv_file)
+            self._csv.writerow(COLUMNS)
+
+    def write(self, columns: Dict[str, List[Any]]) -> None:
+        """Écrire un bloc en colonnes"""
+        count = len(columns[COLUMNS[0]])
+        if self._parquet:
+            table = self._pa.table(columns)
+            if self._parquet is True:
+                self._parquet = self._pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+        else:
+            self._csv.writerows(zip(*(columns[name] for name in COLUMNS)))
+        self.rows += count
+
+    def close(self) -> None:
+        if self._parquet not in (None, True):
+            self._parquet.close()
+        if self._csv_file:
+            self._csv_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
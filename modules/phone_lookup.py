@@ -7,12 +7,77 @@ Carriers, localisation, réputation
 import requests
 import logging
 import phonenumbers
-from typing import Dict, List, Any
+from functools import cached_property
+from typing import Dict, List, Any, Optional, Union
 from bs4 import BeautifulSoup
 import time
 
+from core.scheduler import HostScheduler
+from modules.phone_prefixes import get_prefix_classifier
+
 logger = logging.getLogger(__name__)
 
+
+class PhoneContext:
+    """Numéro parsé une seule fois par recherche, métadonnées calculées à la demande"""
+    
+    def __init__(self, phone: str, country: Optional[str] = "FR"):
+        self.phone = phone
+        self.country = country
+        self.number = phonenumbers.parse(phone.strip().replace(' ', '').replace('-', ''), country)
+    
+    @classmethod
+    def build(cls, phone: Union[str, 'PhoneContext'], country: Optional[str] = "FR") -> 'PhoneContext':
+        """Réutiliser un contexte existant ou parser le numéro"""
+        return phone if isinstance(phone, PhoneContext) else cls(phone, country)
+    
+    @cached_property
+    def valid(self) -> bool:
+        return phonenumbers.is_valid_number(self.number)
+    
+    @cached_property
+    def possible(self) -> bool:
+        return phonenumbers.is_possible_number(self.number)
+    
+    @cached_property
+    def e164(self) -> str:
+        return phonenumbers.format_number(self.number, phonenumbers.PhoneNumberFormat.E164)
+    
+    @cached_property
+    def region_code(self) -> Optional[str]:
+        return phonenumbers.region_code_for_number(self.number)
+    
+    @cached_property
+    def carrier(self) -> str:
+        # Données opérateurs/géographiques chargées au premier usage (plusieurs centaines de ms)
+        from phonenumbers import carrier as carrier_module
+        return carrier_module.name_for_number(self.number, "en")
+    
+    @cached_property
+    def location(self) -> str:
+        from phonenumbers import geocoder
+        return geocoder.description_for_number(self.number, "en")
+    
+    @cached_property
+    def number_type(self) -> int:
+        return phonenumbers.number_type(self.number)
+    
+    @cached_property
+    def time_zones(self) -> List[str]:
+        from phonenumbers import timezone
+        return list(timezone.time_zones_for_number(self.number))
+    
+    @cached_property
+    def line(self) -> Optional[Dict[str, Any]]:
+        """Plage opérateur la plus spécifique (trie de préfixes)"""
+        return get_prefix_classifier().lookup(self.e164)
+    
+    @cached_property
+    def is_voip(self) -> bool:
+        return (self.number_type == phonenumbers.PhoneNumberType.VOIP
+                or bool(self.line and self.line['category'] == 'voip'))
+
+
 class PhoneLookup:
     """Moteur de recherche pour numéros de téléphone avec résultats concrets"""
     
@@ -21,22 +86,22 @@ class PhoneLookup:
             'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         self.timeout = 10
+        # Délai global du sondage des agrégateurs (toutes plateformes confondues)
+        self.broker_deadline = 8
     
-    def get_carrier_info(self, phone: str, country: str = "FR") -> Dict[str, Any]:
+    def get_carrier_info(self, phone: Union[str, PhoneContext], country: str = "FR") -> Dict[str, Any]:
         """Obtenir les infos de l'opérateur via phonenumbers"""
         results = {}
         
         try:
-            parsed = phonenumbers.parse(phone, country)
-            
-            from phonenumbers import geocoder, carrier as carrier_module
+            ctx = PhoneContext.build(phone, country)
             
-            results['country'] = phonenumbers.region_code_for_number(parsed)
-            results['carrier'] = carrier_module.name_for_number(parsed, "en")
-            results['region'] = geocoder.description_for_number(parsed, "en")
-            results['type'] = str(phonenumbers.number_type(parsed))
-            results['valid'] = phonenumbers.is_valid_number(parsed)
-            results['possible'] = phonenumbers.is_possible_number(parsed)
+            results['country'] = ctx.region_code
+            results['carrier'] = ctx.carrier
+            results['region'] = ctx.location
+            results['type'] = str(ctx.number_type)
+            results['valid'] = ctx.valid
+            results['possible'] = ctx.possible
             
             logger.debug(f"Carrier info récupéré pour {phone}")
         except Exception as e:
@@ -45,23 +110,17 @@ class PhoneLookup:
         
         return results
     
-    def get_location(self, phone: str, country: str = None) -> Dict[str, Any]:
+    def get_location(self, phone: Union[str, PhoneContext], country: str = None) -> Dict[str, Any]:
         """Localiser le numéro de téléphone"""
         results = {}
         
         try:
-            if country:
-                parsed = phonenumbers.parse(phone, country)
-            else:
-                parsed = phonenumbers.parse(phone)
+            ctx = PhoneContext.build(phone, country)
             
-            from phonenumbers import geocoder
-            location = geocoder.description_for_number(parsed, "en")
+            results['location'] = ctx.location
+            results['country_code'] = ctx.region_code
             
-            results['location'] = location
-            results['country_code'] = phonenumbers.region_code_for_number(parsed)
-            
-            logger.info(f"Location trouvée pour {phone}: {location}")
+            logger.info(f"Location trouvée pour {ctx.phone}: {ctx.location}")
             
         except Exception as e:
             logger.debug(f"Location lookup erreur: {e}")
@@ -104,8 +163,26 @@ class PhoneLookup:
         
         return results
     
-    def search_data_brokers(self, phone: str) -> List[Dict[str, Any]]:
-        """Chercher sur les agrégateurs de données"""
+    def _probe_broker(self, platform: str, url: str) -> Dict[str, Any]:
+        """Requête HEAD vers un agrégateur"""
+        try:
+            resp = requests.head(url, headers=self.headers, timeout=5, allow_redirects=True)
+            return {
+                'platform': platform,
+                'url': url,
+                'reachable': resp.status_code == 200,
+                'status_code': resp.status_code
+            }
+        except requests.Timeout:
+            return {
+                'platform': platform,
+                'url': url,
+                'reachable': False,
+                'status': 'timeout'
+            }
+    
+    def search_data_brokers(self, phone: str, deadline: float = None) -> List[Dict[str, Any]]:
+        """Chercher sur les agrégateurs de données (en parallèle, délai global `deadline` en s)"""
         brokers = []
         
         try:
@@ -118,33 +195,22 @@ class PhoneLookup:
                 'peoplefinder': f"https://www.peoplefinder.com/search?q={phone_clean}",
             }
             
-            for platform, url in platforms.items():
-                try:
-                    resp = requests.head(url, headers=self.headers, timeout=5, allow_redirects=True)
-                    if resp.status_code == 200:
-                        brokers.append({
-                            'platform': platform,
-                            'url': url,
-                            'reachable': True,
-                            'status_code': resp.status_code
-                        })
-                    else:
-                        brokers.append({
-                            'platform': platform,
-                            'url': url,
-                            'reachable': False,
-                            'status_code': resp.status_code
-                        })
-                except requests.Timeout:
-                    brokers.append({
+            tasks = [(platform, url, self._probe_broker, (platform, url)) for platform, url in platforms.items()]
+            scheduler = HostScheduler(max_workers=len(tasks), per_host=1)
+            results = {}
+            for platform, result, error in scheduler.run(tasks, time.monotonic() + (deadline or self.broker_deadline)):
+                if result:
+                    results[platform] = result
+                elif error == 'timeout':
+                    results[platform] = {
                         'platform': platform,
-                        'url': url,
+                        'url': platforms[platform],
                         'reachable': False,
                         'status': 'timeout'
-                    })
-                except Exception as e:
-                    logger.debug(f"Data broker {platform} erreur: {e}")
+                    }
             
+            # Ordre stable : celui de la liste des plateformes
+            brokers = [results[platform] for platform in platforms if platform in results]
             logger.info(f"Data brokers vérifiés: {len(brokers)}")
         except Exception as e:
             logger.debug(f"Data brokers erreur: {e}")
@@ -191,21 +257,18 @@ class PhoneLookup:
         
         try:
             # 1. Valider le numéro
-            parsed = phonenumbers.parse(phone, country)
-            if not phonenumbers.is_valid_number(parsed):
+            ctx = PhoneContext(phone, country)
+            if not ctx.valid:
                 logger.warning(f"Numéro invalide: {phone}")
                 results['valid'] = False
                 return results
             
             results['valid'] = True
             
-            # 2. Info opérateur
-            logger.debug("Récupération info opérateur...")
-            results['carrier_info'] = self.get_carrier_info(phone, country)
-            
-            # 3. Localisation
-            logger.debug("Récupération localisation...")
-            results['location'] = self.get_location(phone, country)
+            # 2-3. Info opérateur et localisation (hors ligne, même contexte)
+            logger.debug("Récupération info opérateur et localisation...")
+            results['carrier_info'] = self.get_carrier_info(ctx)
+            results['location'] = self.get_location(ctx)
             
             # 4. Réputation
             logger.debug("Vérification réputation...")
@@ -227,22 +290,17 @@ class PhoneLookup:
         
         return results
     
-    def format_phone(self, phone: str, country: str = "FR") -> str:
+    def format_phone(self, phone: Union[str, PhoneContext], country: str = "FR") -> str:
         """Normaliser un numéro de téléphone"""
         try:
-            parsed = phonenumbers.parse(phone, country)
-            return phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164)
+            return PhoneContext.build(phone, country).e164
         except:
             return phone
     
-    def get_timezone(self, phone: str, country: str = "FR") -> List[str]:
+    def get_timezone(self, phone: Union[str, PhoneContext], country: str = "FR") -> List[str]:
         """Obtenir les fuseaux horaires possibles"""
         try:
-            parsed = phonenumbers.parse(phone, country)
-            from phonenumbers import timezone
-            
-            timezones = timezone.time_zones_for_number(parsed)
-            return list(timezones)
+            return PhoneContext.build(phone, country).time_zones
         except:
             return []
     
@@ -279,25 +337,33 @@ class PhoneLookup:
         
         return results
     
-    def get_voip_provider(self, phone: str, country: str = "FR") -> Dict[str, Any]:
+    def get_voip_provider(self, phone: Union[str, PhoneContext], country: str = "FR") -> Dict[str, Any]:
         """Déterminer si c'est un numéro VoIP"""
         results = {
-            'phone': phone,
+            'phone': phone.phone if isinstance(phone, PhoneContext) else phone,
             'is_voip': False,
-            'voip_provider': None
+            'voip_provider': None,
+            'line_category': None
         }
         
         try:
-            parsed = phonenumbers.parse(phone, country)
-            from phonenumbers import carrier as carrier_module
-            
-            carrier_name = carrier_module.name_for_number(parsed, "en")
-            
-            voip_keywords = ['voip', 'skype', 'google voice', 'jajah', 'twilio']
-            results['is_voip'] = any(keyword in carrier_name.lower() for keyword in voip_keywords)
-            results['voip_provider'] = carrier_name if results['is_voip'] else None
+            ctx = PhoneContext.build(phone, country)
+            results['is_voip'] = ctx.is_voip
+            if ctx.line:
+                results['line_category'] = ctx.line['category']
+            if ctx.is_voip:
+                results['voip_provider'] = (ctx.line['name'] if ctx.line else ctx.carrier) or None
             
         except Exception as e:
             logger.debug(f"VoIP check erreur: {e}")
         
-        return results
\ No newline at end of file
+        return results
+    
+    def offline_lookup(self, ctx: PhoneContext) -> Dict[str, Any]:
+        """Toutes les sources locales (phonenumbers) en une étape, sans réseau"""
+        return {
+            'carrier_info': self.get_carrier_info(ctx),
+            'location': self.get_location(ctx),
+            'voip_info': self.get_voip_provider(ctx),
+            'timezone': self.get_timezone(ctx),
+        }
\ No newline at end of file
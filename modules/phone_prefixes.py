@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+PhonePrefixes - Classification opérateur / VoIP par plus long préfixe E.164
+Trie compilé (tableaux plats) construit depuis les données opérateurs de
+phonenumbers et un fichier de plages utilisateur, sérialisé sur disque
+"""
+
+import csv
+import json
+import logging
+import struct
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+import phonenumbers
+
+logger = logging.getLogger(__name__)
+
+VOIP_KEYWORDS = ('voip', 'skype', 'google voice', 'jajah', 'twilio')
+CATEGORIES = ('mobile', 'voip', 'mvno', 'premium', 'fixed', 'other')
+
+_MAGIC = b'RTPT1'
+_HEADER = struct.Struct('<II')
+
+
+class PrefixClassifier:
+    """Plus long préfixe correspondant, en parcourant un chiffre par nœud
+
+    Les nœuds sont stockés dans deux tableaux : `children[nœud * 10 + chiffre]`
+    (0 = pas d'enfant, la racine n'étant jamais un enfant) et `values[nœud]`
+    (index de l'enregistrement, -1 si le préfixe n'est pas une plage).
+    """
+
+    def __init__(self, records: List[Tuple[str, str]], children: array, values: array,
+                 meta: Dict[str, Any] = None):
+        self.records = records
+        self.children = children
+        self.values = values
+        self.meta = meta or {}
+
+    @classmethod
+    def build(cls, ranges: Iterable[Tuple[str, str, str]], meta: Dict[str, Any] = None) -> 'PrefixClassifier':
+        """Compiler des plages (préfixe, catégorie, nom) ; la dernière l'emporte"""
+        records: List[Tuple[str, str]] = []
+        record_index: Dict[Tuple[str, str], int] = {}
+        children = array('i', [0] * 10)
+        values = array('i', [-1])
+
+        for prefix, category, name in ranges:
+            digits = ''.join(ch for ch in prefix if ch.isdigit())
+            if not digits:
+                continue
+            record = (category, name or '')
+            if record not in record_index:
+                record_index[record] = len(records)
+                records.append(record)
+
+            node = 0
+            for ch in digits:
+                slot = node * 10 + ord(ch) - 48
+                child = children[slot]
+                if not child:
+                    child = len(values)
+                    children[slot] = child
+                    children.extend([0] * 10)
+                    values.append(-1)
+                node = child
+            values[node] = record_index[record]
+
+        return cls(records, children, values, meta)
+
+    def lookup(self, number: str) -> Optional[Dict[str, Any]]:
+        """Plage la plus spécifique d'un numéro E.164 (None si aucune)"""
+        digits = number[1:] if number.startswith('+') else number
+        children, values = self.children, self.values
+        node, best, depth = 0, -1, 0
+        for i, ch in enumerate(digits):
+            digit = ord(ch) - 48
+            if not 0 <= digit <= 9:
+                break
+            node = children[node * 10 + digit]
+            if not node:
+                break
+            if values[node] >= 0:
+                best, depth = values[node], i + 1
+        if best < 0:
+            return None
+        category, name = self.records[best]
+        return {'category': category, 'name': name, 'prefix': digits[:depth]}
+
+    def lookup_many(self, numbers: Iterable[str]) -> List[Optional[Dict[str, Any]]]:
+        """Classer un lot de numéros E.164"""
+        lookup = self.lookup
+        return [lookup(number) for number in numbers]
+
+    def is_voip(self, number: str) -> bool:
+        match = self.lookup(number)
+        return bool(match) and match['category'] == 'voip'
+
+    # ------------------------------------------------------------------
+    # Sérialisation
+    # ------------------------------------------------------------------
+
+    def save(self, path: Path) -> None:
+        """Écrire le trie compilé (en-tête JSON + tableaux bruts)"""
+        header = json.dumps({'meta': self.meta, 'records': self.records,
+                             'nodes': len(self.values)}).encode('utf-8')
+        tmp = Path(str(path) + '.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(_MAGIC)
+            f.write(_HEADER.pack(len(header), self.children.itemsize))
+            f.write(header)
+            f.write(self.children.tobytes())
+            f.write(self.values.tobytes())
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> 'PrefixClassifier':
+        """Charger un trie compilé sans le reconstruire"""
+        with open(path, 'rb') as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"Format de trie inconnu: {path}")
+            header_len, itemsize = _HEADER.unpack(f.read(_HEADER.size))
+            header = json.loads(f.read(header_len))
+            children, values = array('i'), array('i')
+            if children.itemsize != itemsize:
+                raise ValueError("Taille d'entier incompatible")
+            nodes = header['nodes']
+            children.frombytes(f.read(nodes * 10 * itemsize))
+            values.frombytes(f.read(nodes * itemsize))
+        records = [tuple(record) for record in header['records']]
+        return cls(records, children, values, header['meta'])
+
+
+def carrier_category(name: str) -> str:
+    """Catégorie déduite du nom d'opérateur phonenumbers"""
+    lowered = name.lower()
+    return 'voip' if any(keyword in lowered for keyword in VOIP_KEYWORDS) else 'mobile'
+
+
+def carrier_ranges() -> Iterable[Tuple[str, str, str]]:
+    """Plages opérateurs de phonenumbers (préfixes sans '+')"""
+    # Importé seulement pour reconstruire le trie : le chargement depuis le disque s'en passe
+    from phonenumbers.carrierdata import CARRIER_DATA
+    for prefix, names in CARRIER_DATA.items():
+        name = names.get('en') or next(iter(names.values()), '')
+        if name:
+            yield prefix, carrier_category(name), name
+
+
+def read_ranges_file(path: Path) -> Iterable[Tuple[str, str, str]]:
+    """Plages utilisateur : `préfixe,catégorie[,nom]` par ligne, '#' en commentaire"""
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            if not row or row[0].lstrip().startswith('#') or len(row) < 2:
+                continue
+            category = row[1].strip().lower()
+            if category not in CATEGORIES:
+                logger.debug(f"Catégorie de plage inconnue: {category}")
+                continue
+            yield row[0].strip(), category, row[2].strip() if len(row) > 2 else ''
+
+
+def load_classifier(ranges_file: Optional[str] = None, cache_path: Optional[Path] = None) -> PrefixClassifier:
+    """Charger le trie depuis le disque ou le reconstruire si ses sources ont changé"""
+    if cache_path is None:
+        cache_dir = Path.home() / '.raven_trace' / 'cache'
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        cache_path = cache_dir / 'phone_prefixes.bin'
+
+    ranges_path = Path(ranges_file).expanduser() if ranges_file else None
+    meta = {
+        'phonenumbers': phonenumbers.__version__,
+        'ranges_file': str(ranges_path) if ranges_path else None,
+        'ranges_mtime': ranges_path.stat().st_mtime_ns if ranges_path and ranges_path.exists() else None,
+    }
+
+    try:
+        classifier = PrefixClassifier.load(cache_path)
+        if classifier.meta == meta:
+            return classifier
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.debug(f"Trie de préfixes illisible, reconstruction: {e}")
+
+    ranges = list(carrier_ranges())
+    if meta['ranges_mtime'] is not None:
+        ranges.extend(read_ranges_file(ranges_path))
+    classifier = PrefixClassifier.build(ranges, meta)
+    try:
+        classifier.save(cache_path)
+    except OSError as e:
+        logger.debug(f"Sauvegarde du trie de préfixes impossible: {e}")
+    return classifier
+
+
+# Classifieur partagé (créé au premier usage)
+_prefix_classifier = None
+_prefix_classifier_lock = threading.Lock()
+
+def get_prefix_classifier() -> PrefixClassifier:
+    """Obtenir le classifieur de préfixes partagé"""
+    global _prefix_classifier
+    with _prefix_classifier_lock:
+        if _prefix_classifier is None:
+            from config import get_config
+            _prefix_classifier = load_classifier(get_config().get('sources.phone.ranges_file'))
+        return _prefix_classifier
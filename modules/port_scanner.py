@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+port_scanner.py - Découverte de services TCP (asyncio)
+Fenêtre de connexions bornée, bannière lue sur la connexion qui a confirmé
+le port, cadence limitée par hôte. Réservé aux cibles autorisées.
+"""
+
+import asyncio
+import logging
+import socket
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Ports TCP les plus fréquemment ouverts, par ordre décroissant de fréquence
+TOP_PORTS = [
+    80, 23, 443, 21, 22, 25, 3389, 110, 445, 139, 143, 53, 135, 3306, 8080, 1723, 111, 995, 993, 5900,
+    1025, 587, 8888, 199, 1720, 465, 548, 113, 81, 6001, 10000, 514, 5060, 179, 1026, 2000, 8443, 8000,
+    32768, 554, 26, 1433, 49152, 2001, 515, 8008, 49154, 1027, 5666, 646, 5000, 5631, 631, 49153, 8081,
+    2049, 88, 79, 5800, 106, 2121, 1110, 49155, 6000, 513, 990, 5357, 427, 49156, 543, 544, 5101, 144,
+    7, 389, 8009, 3128, 444, 9999, 5009, 7070, 5190, 3000, 5432, 1900, 3986, 13, 1029, 9, 5051, 6646,
+    49157, 1028, 873, 1755, 2717, 4899, 9100, 119, 37, 6379, 27017, 9200, 11211, 5672, 9092, 2375,
+]
+
+SERVICES = {
+    21: 'FTP', 22: 'SSH', 23: 'Telnet', 25: 'SMTP', 53: 'DNS',
+    80: 'HTTP', 110: 'POP3', 143: 'IMAP', 443: 'HTTPS',
+    445: 'SMB', 3306: 'MySQL', 3389: 'RDP', 5432: 'PostgreSQL',
+    6379: 'Redis', 8080: 'HTTP-Proxy', 8443: 'HTTPS-Alt',
+    27017: 'MongoDB', 9200: 'Elasticsearch'
+}
+
+# Services muets tant que le client n'a rien envoyé
+HTTP_PORTS = {80, 81, 443, 3000, 5000, 8000, 8008, 8080, 8081, 8443, 8888, 9200}
+HTTP_PROBE = b'HEAD / HTTP/1.0\r\n\r\n'
+
+
+def service_name(port: int) -> str:
+    """Nom du service usuel d'un port"""
+    return SERVICES.get(port, f'Unknown({port})')
+
+
+def top_ports(count: int) -> List[int]:
+    """Les `count` ports les plus courants, complétés par les autres dans l'ordre croissant"""
+    count = max(0, min(count, 65535))
+    ports = TOP_PORTS[:count]
+    if count > len(TOP_PORTS):
+        known = set(TOP_PORTS)
+        ports += [port for port in range(1, 65536) if port not in known][:count - len(TOP_PORTS)]
+    return ports
+
+
+def parse_ports(spec: Union[str, Iterable[int]]) -> List[int]:
+    """'22,80,8000-8100' (ou liste d'entiers) -> ports uniques dans l'ordre donné"""
+    if isinstance(spec, str):
+        ports = []
+        for part in filter(None, (p.strip() for p in spec.split(','))):
+            if '-' in part:
+                start, end = (int(x) for x in part.split('-', 1))
+                ports.extend(range(start, end + 1))
+            else:
+                ports.append(int(part))
+    else:
+        ports = [int(p) for p in spec]
+    invalid = [p for p in ports if not 0 < p < 65536]
+    if invalid:
+        raise ValueError(f"Ports invalides: {invalid[:5]}")
+    return list(dict.fromkeys(ports))
+
+
+class _HostPacer:
+    """Espacement minimal entre deux connexions vers un même hôte"""
+
+    def __init__(self, rate: Optional[float]):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next: Dict[str, float] = {}
+
+    async def wait(self, host: str) -> None:
+        if not self.interval:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        # Réserver le prochain créneau avant d'attendre : pas de verrou nécessaire
+        slot = max(now, self._next.get(host, now))
+        self._next[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class PortScanner:
+    """Scanner TCP connect asynchrone
+
+    `concurrency` connexions au plus sont ouvertes à la fois (un nombre fixe
+    de coroutines consomme la liste hôte x port) ; `rate` limite le nombre
+    de connexions par seconde et par hôte.
+    """
+
+    def __init__(self, concurrency: int = 500, timeout: float = 1.0, banner_timeout: float = 2.0,
+                 rate: float = None, banner_size: int = 1024):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.banner_timeout = banner_timeout
+        self.rate = rate
+        self.banner_size = banner_size
+
+    @staticmethod
+    async def _resolve(host: str) -> Optional[str]:
+        """Adresse de connexion d'un hôte (None si non résolu)"""
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        except (OSError, UnicodeError) as e:
+            logger.debug(f"Port scan: {host} non résolu: {e}")
+            return None
+        return infos[0][4][0] if infos else None
+
+    async def _probe(self, host: str, address: str, port: int) -> Optional[Dict[str, Any]]:
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(address, port), self.timeout)
+        except (OSError, asyncio.TimeoutError):
+            return None
+
+        banner = ''
+        try:
+            if port in HTTP_PORTS:
+                writer.write(HTTP_PROBE)
+                await writer.drain()
+            data = await asyncio.wait_for(reader.read(self.banner_size), self.banner_timeout)
+            banner = data.decode('utf-8', errors='ignore').strip()[:100]
+        except (OSError, asyncio.TimeoutError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+        return {'host': host, 'address': address, 'port': port, 'state': 'open',
+                'service': service_name(port), 'banner': banner}
+
+    async def scan_async(self, targets: Iterable[Tuple[str, int]]) -> List[Dict[str, Any]]:
+        """Sonder les couples (hôte, port) et renvoyer les ports ouverts"""
+        pacer = _HostPacer(self.rate)
+        pending: Iterator[Tuple[str, int]] = iter(targets)
+        found: List[Dict[str, Any]] = []
+        # Une seule résolution par hôte, partagée par toutes les coroutines
+        addresses: Dict[str, asyncio.Future] = {}
+
+        async def worker() -> None:
+            # Les coroutines se partagent l'itérateur : pas une tâche par port
+            for host, port in pending:
+                if host not in addresses:
+                    addresses[host] = asyncio.ensure_future(self._resolve(host))
+                address = await addresses[host]
+                if address is None:
+                    continue
+                await pacer.wait(host)
+                result = await self._probe(host, address, port)
+                if result:
+                    found.append(result)
+
+        await asyncio.gather(*(worker() for _ in range(max(1, self.concurrency))))
+        found.sort(key=lambda r: (r['host'], r['port']))
+        return found
+
+    def scan(self, hosts: Union[str, Iterable[str]], ports: Union[str, Iterable[int]]) -> List[Dict[str, Any]]:
+        """Scanner un ou plusieurs hôtes sur `ports` (liste ou '22,80,8000-8100')"""
+        hosts = [hosts] if isinstance(hosts, str) else list(hosts)
+        ports = parse_ports(ports)
+        # Ports entrelacés entre hôtes : la cadence par hôte ne bloque pas les autres
+        targets = ((host, port) for port in ports for host in hosts)
+        return asyncio.run(self.scan_async(targets))
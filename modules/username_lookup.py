@@ -5,20 +5,67 @@ UsernameLookup - Recherche avancée par pseudo avec résultats réels
 
 import requests
 import logging
-from typing import Dict, List, Any
+import re
+from itertools import islice
+from typing import Callable, Dict, List, Any, Iterable, Iterator, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
 import time
 
+from core.scheduler import HostScheduler
+from core.http import CachedSession
+from core.validators import validate_username
+from sources.github_api import get_github_client
+
 logger = logging.getLogger(__name__)
 
 class UsernameLookup:
     """Moteur de recherche pour pseudonymes avec résultats concrets"""
     
+    # Plateformes vérifiées (gabarits d'URL de profil)
+    PLATFORMS = {
+        'github': "https://github.com/{username}",
+        'twitter': "https://twitter.com/{username}",
+        'instagram': "https://www.instagram.com/{username}/",
+        'facebook': "https://www.facebook.com/{username}",
+        'linkedin': "https://www.linkedin.com/in/{username}",
+        'youtube': "https://www.youtube.com/@{username}",
+        'tiktok': "https://www.tiktok.com/@{username}",
+        'reddit': "https://www.reddit.com/user/{username}",
+        'twitch': "https://www.twitch.tv/{username}",
+        'pinterest': "https://www.pinterest.com/{username}",
+        'snapchat': "https://www.snapchat.com/add/{username}",
+        'telegram': "https://t.me/{username}",
+        'mastodon': "https://mastodon.social/@{username}",
+        'bluesky': "https://bsky.app/profile/{username}",
+        'tumblr': "https://{username}.tumblr.com",
+        'gitlab': "https://gitlab.com/{username}",
+        'medium': "https://medium.com/@{username}",
+    }
+    
+    # Probabilités a priori des familles de variantes (ordre de sondage)
+    VARIANT_PRIORS = {
+        'literal': 1.0,
+        'email_local': 0.9,
+        'full_name': 0.7,
+        'separator': 0.55,
+        'initials': 0.5,
+        'reversed_name': 0.4,
+        'digits': 0.3,
+        'leet': 0.15,
+    }
+    
+    SEPARATORS = ('', '.', '_', '-')
+    DIGIT_SUFFIXES = ('1', '01', '123', '7', '2', '69', '99', '00')
+    LEET_MAP = str.maketrans({'a': '4', 'e': '3', 'i': '1', 'o': '0', 's': '5', 't': '7'})
+    
     def __init__(self):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         self.timeout = 10
+        self.session = CachedSession()
+        self.session.headers.update(self.headers)
     
     def check_platform(self, username: str, platform: str, url: str) -> Dict[str, Any]:
         """Vérifier un username sur une plateforme"""
@@ -51,27 +98,13 @@ class UsernameLookup:
         
         return result
     
-    def search_all_platforms(self, username: str) -> List[Dict[str, Any]]:
-        """Chercher un username sur les réseaux sociaux majeurs"""
+    def search_all_platforms(self, username: str,
+                             on_result: Callable[[Dict[str, Any]], None] = None) -> List[Dict[str, Any]]:
+        """Chercher un username sur les réseaux sociaux majeurs (`on_result` appelé au fil de l'eau)"""
         
         platforms = {
-            'github': f"https://github.com/{username}",
-            'twitter': f"https://twitter.com/{username}",
-            'instagram': f"https://www.instagram.com/{username}/",
-            'facebook': f"https://www.facebook.com/{username}",
-            'linkedin': f"https://www.linkedin.com/in/{username}",
-            'youtube': f"https://www.youtube.com/@{username}",
-            'tiktok': f"https://www.tiktok.com/@{username}",
-            'reddit': f"https://www.reddit.com/user/{username}",
-            'twitch': f"https://www.twitch.tv/{username}",
-            'pinterest': f"https://www.pinterest.com/{username}",
-            'snapchat': f"https://www.snapchat.com/add/{username}",
-            'telegram': f"https://t.me/{username}",
-            'mastodon': f"https://mastodon.social/@{username}",
-            'bluesky': f"https://bsky.app/profile/{username}",
-            'tumblr': f"https://{username}.tumblr.com",
-            'gitlab': f"https://gitlab.com/{username}",
-            'medium': f"https://medium.com/@{username}",
+            platform: template.format(username=username)
+            for platform, template in self.PLATFORMS.items()
         }
         
         results = []
@@ -87,6 +120,8 @@ class UsernameLookup:
                 try:
                     result = future.result()
                     results.append(result)
+                    if on_result:
+                        on_result(result)
                 except Exception as e:
                     logger.debug(f"Erreur parallèle: {e}")
         
@@ -96,41 +131,269 @@ class UsernameLookup:
         
         return results
     
+    def search_with_sherlock(self, username: str, on_result: Callable[[Dict[str, Any]], None] = None,
+                             sherlock_timeout: float = 120, deadline: float = None,
+                             sites: Iterable[str] = None) -> List[Dict[str, Any]]:
+        """Sondes natives et Sherlock en parallèle, fusionnés au fil de l'eau
+        
+        Un site sondé avec succès par les sondes natives est ignoré dans la
+        sortie de Sherlock ; s'il a déjà été rapporté par Sherlock, le
+        résultat natif le remplace. Une sonde native en échec (timeout,
+        erreur) n'est retenue que si Sherlock n'a rien rapporté pour ce site.
+        
+        `sites` limite Sherlock à ces sites : il n'est pas lancé s'ils sont
+        tous sondés nativement, et il est arrêté dès que les sondes natives
+        sont terminées et que les sites restants sont déjà couverts.
+        `deadline` (timestamp time.monotonic) arrête Sherlock à l'échéance.
+        """
+        from modules.kali_tools import KaliToolsIntegration, kali_tools
+        
+        site_key = KaliToolsIntegration.site_key
+        pending = {site_key(site) for site in sites} if sites is not None else None
+        if pending is not None and pending <= {site_key(platform) for platform in self.PLATFORMS}:
+            return self.search_all_platforms(username, on_result=on_result)
+        if deadline is not None:
+            sherlock_timeout = max(0.0, min(sherlock_timeout, deadline - time.monotonic()))
+        
+        lock = threading.Lock()
+        covered = set()
+        reported = set()
+        native_done = threading.Event()
+        merged: Dict[str, Dict[str, Any]] = {}
+        failed: Dict[str, Dict[str, Any]] = {}
+        
+        def is_covered(platform: str) -> bool:
+            with lock:
+                return KaliToolsIntegration.site_key(platform) in covered
+        
+        def add_native(result: Dict[str, Any]) -> None:
+            key = KaliToolsIntegration.site_key(result['platform'])
+            with lock:
+                if not result.get('accessible'):
+                    failed[key] = result
+                    return
+                covered.add(key)
+                merged[key] = result
+            if on_result:
+                on_result(result)
+        
+        def add_sherlock(result: Dict[str, Any]) -> None:
+            with lock:
+                key = KaliToolsIntegration.site_key(result['platform'])
+                reported.add(key)
+                if key in merged:
+                    return
+                merged[key] = result
+            if on_result:
+                on_result(result)
+        
+        def should_stop() -> bool:
+            if deadline is not None and time.monotonic() >= deadline:
+                return True
+            if pending is None or not native_done.is_set():
+                return False
+            # Tout ce que Sherlock vérifie encore est déjà sondé nativement
+            with lock:
+                return pending - reported <= covered
+        
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            sherlock = executor.submit(kali_tools.sherlock_search, username, add_sherlock, is_covered,
+                                       should_stop, sherlock_timeout, sites)
+            self.search_all_platforms(username, on_result=add_native)
+            native_done.set()
+            sherlock.result()
+        
+        for key, result in failed.items():
+            if key not in merged:
+                merged[key] = result
+                if on_result:
+                    on_result(result)
+        
+        results = sorted(merged.values(), key=lambda x: x['found'], reverse=True)
+        logger.info(f"Résultats fusionnés (natif + Sherlock): {sum(1 for r in results if r['found'])}/{len(results)}")
+        return results
+    
+    def sweep(self, usernames: Iterable[str], platforms: Optional[Iterable[str]] = None,
+              per_host: int = 2, max_workers: int = 20) -> Iterator[Dict[str, Any]]:
+        """Balayer la matrice pseudos x plateformes et produire les profils trouvés
+        
+        Toutes les vérifications passent par un seul ordonnanceur limité par
+        hôte : les requêtes sont entrelacées entre sites et la durée totale
+        tend vers celle de la file d'hôte la plus lente.
+        """
+        wanted = set(platforms) if platforms is not None else None
+        selected = {
+            name: template for name, template in self.PLATFORMS.items()
+            if wanted is None or name in wanted
+        }
+        
+        def tasks():
+            for username in dict.fromkeys(usernames):
+                for platform, template in selected.items():
+                    url = template.format(username=username)
+                    yield (username, platform), url, self.check_platform, (username, platform, url)
+        
+        scheduler = HostScheduler(max_workers=max_workers, per_host=per_host)
+        checked = found = 0
+        for (username, platform), result, error in scheduler.run(tasks()):
+            checked += 1
+            if result and result.get('found'):
+                found += 1
+                yield result
+        
+        logger.info(f"Sweep: {found} profils trouvés sur {checked} vérifications")
+    
+    def sweep_matrix(self, usernames: Iterable[str], platforms: Optional[Iterable[str]] = None,
+                     **kwargs) -> Dict[str, Dict[str, str]]:
+        """Matrice creuse {username: {platform: url}} des profils trouvés"""
+        matrix: Dict[str, Dict[str, str]] = {}
+        for result in self.sweep(usernames, platforms, **kwargs):
+            matrix.setdefault(result['username'], {})[result['platform']] = result['url']
+        return matrix
+    
+    def generate_variants(self, seed: str = None, first_name: str = None, last_name: str = None,
+                          email: str = None) -> Iterator[Tuple[str, float]]:
+        """Générer paresseusement les variantes (pseudo, probabilité) d'une identité
+        
+        Les familles sont produites par probabilité décroissante et chaque
+        variante n'apparaît qu'une fois, avec la probabilité de sa première
+        famille.
+        """
+        seen = set()
+        priors = self.VARIANT_PRIORS
+        
+        def emit(candidates, family):
+            for candidate in candidates:
+                candidate = candidate.lower().strip()
+                if candidate and candidate not in seen and validate_username(candidate):
+                    seen.add(candidate)
+                    yield candidate, priors[family]
+        
+        first = re.sub(r'[^a-z0-9]', '', (first_name or '').lower())
+        last = re.sub(r'[^a-z0-9]', '', (last_name or '').lower())
+        local = email.split('@')[0].split('+')[0] if email and '@' in email else None
+        
+        bases = [b for b in (seed, local) if b]
+        if first and last:
+            bases.append(f"{first}{last}")
+        
+        if seed:
+            yield from emit([seed], 'literal')
+        if local:
+            yield from emit([local], 'email_local')
+        if first and last:
+            yield from emit((f"{first}{sep}{last}" for sep in self.SEPARATORS), 'full_name')
+        
+        def separator_swaps(base):
+            parts = re.split(r'[._-]', base)
+            if len(parts) > 1:
+                for sep in self.SEPARATORS:
+                    yield sep.join(parts)
+        
+        for base in bases:
+            yield from emit(separator_swaps(base), 'separator')
+        
+        if first and last:
+            yield from emit((f"{first[0]}{sep}{last}" for sep in self.SEPARATORS), 'initials')
+            yield from emit((f"{first}{sep}{last[0]}" for sep in self.SEPARATORS), 'initials')
+            yield from emit((f"{last}{sep}{first}" for sep in self.SEPARATORS), 'reversed_name')
+        
+        for suffix in self.DIGIT_SUFFIXES:
+            yield from emit((f"{base}{suffix}" for base in bases), 'digits')
+        
+        yield from emit((base.lower().translate(self.LEET_MAP) for base in bases), 'leet')
+    
+    def probe_variants(self, seed: str = None, first_name: str = None, last_name: str = None,
+                       email: str = None, platforms: Optional[Iterable[str]] = None,
+                       budget: int = 200, min_platforms: int = 3,
+                       confidence_threshold: float = 0.9, batch_size: int = 5) -> Dict[str, Any]:
+        """Sonder les variantes par probabilité décroissante sous un budget de requêtes
+        
+        La confiance d'une variante vaut prior x min(1, trouvés / min_platforms).
+        Le sondage s'arrête dès qu'une variante atteint `confidence_threshold`
+        ou que le budget de requêtes est épuisé.
+        """
+        platforms = list(platforms) if platforms is not None else list(self.PLATFORMS)
+        variants = self.generate_variants(seed, first_name, last_name, email)
+        
+        results = {
+            'seed': seed,
+            'probed': [],
+            'requests': 0,
+            'budget': budget,
+            'stopped_early': False,
+            'matches': {},
+        }
+        if not platforms:
+            return results
+        
+        while results['requests'] + len(platforms) <= budget:
+            affordable = (budget - results['requests']) // len(platforms)
+            batch = list(islice(variants, min(batch_size, affordable)))
+            if not batch:
+                break
+            
+            priors = dict(batch)
+            results['probed'].extend(priors)
+            results['requests'] += len(batch) * len(platforms)
+            
+            for hit in self.sweep(priors, platforms):
+                match = results['matches'].setdefault(hit['username'], {
+                    'prior': priors[hit['username']],
+                    'profiles': {},
+                })
+                match['profiles'][hit['platform']] = hit['url']
+            
+            for match in results['matches'].values():
+                found = len(match['profiles'])
+                match['confidence'] = round(match['prior'] * min(1.0, found / min_platforms), 2)
+            
+            if any(m['confidence'] >= confidence_threshold for m in results['matches'].values()):
+                results['stopped_early'] = True
+                break
+        
+        logger.info(f"Variantes: {len(results['probed'])} sondées, {len(results['matches'])} trouvées, "
+                    f"{results['requests']} requêtes")
+        return results
+    
     def search_github_advanced(self, username: str) -> Dict[str, Any]:
         """Recherche avancée GitHub via API"""
+        return self.search_github_batch([username]).get(username, {})
+    
+    def search_github_batch(self, usernames: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Recherche GitHub groupée (un appel GraphQL par lot si token configuré)"""
         results = {}
         
         try:
-            # GitHub API publique - pas de clé requise
-            url = f"https://api.github.com/users/{username}"
-            resp = requests.get(url, headers=self.headers, timeout=self.timeout)
-            
-            if resp.status_code == 200:
-                data = resp.json()
-                results = {
-                    'platform': 'github',
-                    'username': username,
-                    'found': True,
-                    'name': data.get('name'),
-                    'bio': data.get('bio'),
-                    'location': data.get('location'),
-                    'company': data.get('company'),
-                    'blog': data.get('blog'),
-                    'email': data.get('email'),
-                    'followers': data.get('followers'),
-                    'following': data.get('following'),
-                    'public_repos': data.get('public_repos'),
-                    'public_gists': data.get('public_gists'),
-                    'profile_url': data.get('html_url'),
-                    'created_at': data.get('created_at'),
-                    'updated_at': data.get('updated_at'),
-                }
-                logger.info(f"GitHub: {username} - {data.get('followers')} followers")
-            else:
-                results['found'] = False
-                
+            users = get_github_client().get_users(usernames)
         except Exception as e:
             logger.debug(f"GitHub API erreur: {e}")
+            return results
+        
+        for username, data in users.items():
+            if not data:
+                results[username] = {'found': False}
+                continue
+            
+            results[username] = {
+                'platform': 'github',
+                'username': username,
+                'found': True,
+                'name': data.get('name'),
+                'bio': data.get('bio'),
+                'location': data.get('location'),
+                'company': data.get('company'),
+                'blog': data.get('blog'),
+                'email': data.get('email'),
+                'followers': data.get('followers'),
+                'following': data.get('following'),
+                'public_repos': data.get('public_repos'),
+                'public_gists': data.get('public_gists'),
+                'profile_url': data.get('html_url'),
+                'created_at': data.get('created_at'),
+                'updated_at': data.get('updated_at'),
+            }
+            logger.info(f"GitHub: {username} - {data.get('followers')} followers")
         
         return results
     
@@ -140,7 +403,7 @@ class UsernameLookup:
         
         try:
             url = f"https://www.reddit.com/user/{username}/about.json"
-            resp = requests.get(url, headers=self.headers, timeout=self.timeout)
+            resp = self.session.get(url, timeout=self.timeout)
             
             if resp.status_code == 200:
                 data = resp.json()
@@ -2,12 +2,24 @@
 Sources module - Intégrations avec sources externes
 """
 
-from sources.public_apis import public_apis
-from sources.social_media import social_media_searcher
-from sources.data_aggregators import data_aggregators
-
 __all__ = [
     'public_apis',
     'social_media_searcher',
     'data_aggregators',
-]
\ No newline at end of file
+]
+
+_EXPORTS = {
+    'public_apis': 'sources.public_apis',
+    'social_media_searcher': 'sources.social_media',
+    'data_aggregators': 'sources.data_aggregators',
+}
+
+
+def __getattr__(name):
+    # Import au premier accès : `import sources.xxx` ne charge pas toutes les sources
+    if name in _EXPORTS:
+        import importlib
+        value = getattr(importlib.import_module(_EXPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
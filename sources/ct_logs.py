@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+ct_logs.py - Sous-domaines via les journaux Certificate Transparency (crt.sh)
+Réponse JSON lue incrémentalement depuis le socket, noms normalisés et
+dédupliqués au fil de l'eau, cache local par domaine avec reprise
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Iterator, Optional
+
+from core.http import CachedSession
+from utils.extractor import in_domain
+
+logger = logging.getLogger(__name__)
+
+CRTSH_URL = "https://crt.sh/"
+# Taille maximale d'un objet JSON isolé : au-delà, la réponse est jugée invalide
+MAX_OBJECT_BYTES = 1024 * 1024
+_HOSTNAME = re.compile(r'^[a-z0-9_](?:[a-z0-9_-]{0,62}\.)*[a-z0-9-]{1,63}$')
+
+
+def iter_json_array(chunks: Iterable[str], max_object: int = MAX_OBJECT_BYTES) -> Iterator[Any]:
+    """Produire les éléments d'un tableau JSON au fil des morceaux de texte
+
+    Seul l'élément en cours de lecture est gardé en mémoire.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    for chunk in chunks:
+        buffer += chunk
+        pos = 0
+        while True:
+            # Sauter blancs, ouverture du tableau et séparateurs
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer) and not started:
+                if buffer[pos] != '[':
+                    raise ValueError("Réponse CT : tableau JSON attendu")
+                started = True
+                pos += 1
+                continue
+            if pos >= len(buffer) or buffer[pos] == ']':
+                break
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Élément incomplet : attendre le morceau suivant
+                if len(buffer) - pos > max_object:
+                    raise ValueError("Réponse CT : élément JSON trop volumineux")
+                break
+            yield item
+            pos = end
+        buffer = buffer[pos:]
+
+
+def normalize_name(name: str) -> Optional[str]:
+    """Nom de certificat -> nom d'hôte minuscule (sans joker ni point final), None si invalide"""
+    name = name.strip().lower().rstrip('.')
+    if name.startswith('*.'):
+        name = name[2:]
+    return name if _HOSTNAME.match(name) else None
+
+
+class CTLogClient:
+    """Sous-domaines d'un domaine depuis crt.sh, avec cache local et reprise
+
+    Par domaine, le cache conserve les sous-domaines (JSONL, un par ligne),
+    les identifiants des certificats déjà traités et l'état de la dernière
+    collecte. Une collecte interrompue (limite, coupure) reprend en sautant
+    les certificats connus ; une collecte complète est resservie sans
+    réseau pendant `ttl_hours`.
+    """
+
+    def __init__(self, cache_dir: str = None, ttl_hours: float = 24, timeout: int = 60,
+                 chunk_size: int = 64 * 1024):
+        if cache_dir is None:
+            cache_dir = Path.home() / '.raven_trace' / 'cache' / 'ct'
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl_hours * 3600
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.session = CachedSession()
+        self.session.headers.update({'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36'})
+        # Un verrou par domaine (ses fichiers de cache) ; `_lock` ne garde que le dictionnaire
+        self._lock = threading.Lock()
+        self._domain_locks: Dict[str, threading.Lock] = {}
+
+    def _domain_lock(self, domain: str) -> threading.Lock:
+        with self._lock:
+            if domain not in self._domain_locks:
+                self._domain_locks[domain] = threading.Lock()
+            return self._domain_locks[domain]
+
+    def _paths(self, domain: str) -> Dict[str, Path]:
+        base = self.cache_dir / re.sub(r'[^a-z0-9.-]', '_', domain)
+        return {
+            'names': base.with_name(base.name + '.jsonl'),
+            'ids': base.with_name(base.name + '.ids'),
+            'meta': base.with_name(base.name + '.meta.json'),
+        }
+
+    def _load(self, domain: str):
+        paths = self._paths(domain)
+        records: Dict[str, Dict[str, Any]] = {}
+        ids = array('q')
+        meta: Dict[str, Any] = {}
+        try:
+            with open(paths['names'], encoding='utf-8') as f:
+                for line in f:
+                    record = json.loads(line)
+                    records[record['subdomain']] = record
+            with open(paths['ids'], 'rb') as f:
+                ids.frombytes(f.read())
+            meta = json.loads(paths['meta'].read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.debug(f"Cache CT illisible pour {domain}: {e}")
+        return records, ids, meta
+
+    @staticmethod
+    def _contains(sorted_ids: array, value: int) -> bool:
+        i = bisect_left(sorted_ids, value)
+        return i < len(sorted_ids) and sorted_ids[i] == value
+
+    def iter_entries(self, domain: str, exclude_expired: bool = False) -> Iterator[Dict[str, Any]]:
+        """Certificats crt.sh d'un domaine, lus au fil du téléchargement (ValueError si erreur HTTP)"""
+        params = {'q': f"%.{domain}", 'output': 'json'}
+        if exclude_expired:
+            params['exclude'] = 'expired'
+        with self.session.get(CRTSH_URL, params=params, timeout=self.timeout, stream=True) as resp:
+            if resp.status_code != 200:
+                raise ValueError(f"crt.sh réponse: {resp.status_code}")
+            resp.encoding = resp.encoding or 'utf-8'
+            yield from iter_json_array(resp.iter_content(chunk_size=self.chunk_size, decode_unicode=True))
+
+    def subdomains(self, domain: str, limit: int = None, refresh: bool = False,
+                   exclude_expired: bool = False) -> List[Dict[str, Any]]:
+        """Sous-domaines de `domain` (au plus `limit` nouveaux par collecte)"""
+        domain = domain.strip().lower().rstrip('.')
+        with self._domain_lock(domain):
+            records, ids, meta = self._load(domain)
+            fresh = meta.get('complete') and time.time() - meta.get('fetched_at', 0) < self.ttl
+            if fresh and not refresh:
+                logger.debug(f"CT cache: {domain}")
+                return list(records.values())
+
+            paths = self._paths(domain)
+            # Certificats des collectes précédentes : tableau trié, 8 octets par identifiant
+            known_ids = array('q', sorted(ids))
+            added = 0
+            complete = False
+            try:
+                with open(paths['names'], 'a', encoding='utf-8') as out:
+                    for cert in self.iter_entries(domain, exclude_expired):
+                        cert_id = cert.get('id')
+                        if isinstance(cert_id, int) and self._contains(known_ids, cert_id):
+                            continue
+                        for raw in (cert.get('name_value') or '').split('\n'):
+                            name = normalize_name(raw)
+                            if not name or name in records or not in_domain(name, domain):
+                                continue
+                            record = {
+                                'subdomain': name,
+                                'issuer': cert.get('issuer_name', ''),
+                                'not_before': cert.get('not_before', ''),
+                                'not_after': cert.get('not_after', '')
+                            }
+                            records[name] = record
+                            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                            added += 1
+                        if isinstance(cert_id, int):
+                            ids.append(cert_id)
+                        if limit and added >= limit:
+                            break
+                    else:
+                        complete = True
+            except Exception as e:
+                logger.error(f"CT logs error: {e}")
+            finally:
+                with open(paths['ids'], 'wb') as f:
+                    ids.tofile(f)
+                paths['meta'].write_text(json.dumps({'complete': complete, 'fetched_at': time.time()}),
+                                         encoding='utf-8')
+
+            logger.info(f"Certificate Transparency: {len(records)} sous-domaines ({added} nouveaux)"
+                        f"{'' if complete else ', collecte partielle'}")
+            return list(records.values())
+
+
+# Client partagé (créé au premier usage)
+_ct_client = None
+_ct_client_lock = threading.Lock()
+
+def get_ct_client() -> CTLogClient:
+    """Obtenir le client Certificate Transparency partagé"""
+    global _ct_client
+    with _ct_client_lock:
+        if _ct_client is None:
+            _ct_client = CTLogClient()
+        return _ct_client
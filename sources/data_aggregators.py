@@ -5,9 +5,12 @@ data_aggregators.py - Intégrations avec agrégateurs de données
 
 import requests
 import logging
+import time
 from typing import Dict, List, Any
 from bs4 import BeautifulSoup
 
+from core.scheduler import HostScheduler
+
 logger = logging.getLogger(__name__)
 
 class DataAggregators:
@@ -18,6 +21,8 @@ class DataAggregators:
             'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36'
         }
         self.timeout = 10
+        # Délai global de search_all_aggregators
+        self.deadline = 15
     
     def spokeo_search_email(self, email: str) -> Dict[str, Any]:
         """Rechercher un email sur Spokeo"""
@@ -155,22 +160,41 @@ class DataAggregators:
         
         return result
     
-    def search_all_aggregators(self, query: str, query_type: str = 'email') -> List[Dict[str, Any]]:
-        """Chercher sur tous les agrégateurs"""
-        results = []
+    def search_all_aggregators(self, query: str, query_type: str = 'email',
+                               deadline: float = None) -> List[Dict[str, Any]]:
+        """Chercher sur tous les agrégateurs (en parallèle, une requête par hôte)
         
+        Les plateformes sans réponse avant `deadline` secondes sont marquées
+        'timeout' ; l'ordre des résultats reste celui de la liste ci-dessous.
+        """
         if query_type == 'email':
-            results.append(self.spokeo_search_email(query))
-            results.append(self.whitepages_search(query, 'email'))
-            results.append(self.radaris_search(query))
-            results.append(self.pipl_search(query))
-            results.append(self.truthfinder_search(query))
-            results.append(self.peoplefinder_search(query))
+            calls = [
+                ('spokeo', 'https://www.spokeo.com', self.spokeo_search_email, (query,)),
+                ('whitepages', 'https://www.whitepages.com', self.whitepages_search, (query, 'email')),
+                ('radaris', 'https://radaris.com', self.radaris_search, (query,)),
+                ('pipl', 'https://pipl.com', self.pipl_search, (query,)),
+                ('truthfinder', 'https://www.truthfinder.com', self.truthfinder_search, (query,)),
+                ('peoplefinder', 'https://www.peoplefinder.com', self.peoplefinder_search, (query,)),
+            ]
         elif query_type == 'phone':
-            results.append(self.whitepages_search(query, 'phone'))
-            results.append(self.spokeo_search_email(query))
+            calls = [
+                ('whitepages', 'https://www.whitepages.com', self.whitepages_search, (query, 'phone')),
+                ('spokeo', 'https://www.spokeo.com', self.spokeo_search_email, (query,)),
+            ]
+        else:
+            return []
+        
+        tasks = [(i, url, func, args) for i, (_, url, func, args) in enumerate(calls)]
+        scheduler = HostScheduler(max_workers=len(tasks), per_host=1)
+        results: Dict[int, Dict[str, Any]] = {}
+        for i, result, error in scheduler.run(tasks, time.monotonic() + (deadline or self.deadline)):
+            if result:
+                results[i] = result
+            elif error == 'timeout':
+                results[i] = {'platform': calls[i][0], 'query': query, 'found': False,
+                              'url': None, 'status': 'timeout'}
         
-        return [r for r in results if r]
+        return [results[i] for i in range(len(calls)) if i in results]
 
 # Instance global
 data_aggregators = DataAggregators()
\ No newline at end of file
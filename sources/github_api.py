@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+github_api.py - Client GitHub économe en quota
+Lots GraphQL (avec token), requêtes conditionnelles via le cache HTTP,
+pagination et mise en attente jusqu'au reset du rate limit
+"""
+
+import requests
+import logging
+import threading
+import time
+from typing import Dict, List, Any, Iterable, Optional
+
+from config import get_config
+from core.http import CachedSession
+
+logger = logging.getLogger(__name__)
+
+API_URL = "https://api.github.com"
+GRAPHQL_URL = "https://api.github.com/graphql"
+
+USER_FIELDS = """
+    login name bio location company websiteUrl email url createdAt updatedAt
+    followers { totalCount } following { totalCount }
+    repositories(privacy: PUBLIC) { totalCount } gists(privacy: PUBLIC) { totalCount }
+"""
+
+
+class GitHubClient:
+    """Client GitHub avec suivi du rate limit et cache conditionnel"""
+
+    def __init__(self, token: str = None, batch_size: int = 50, max_wait: float = 900):
+        self.token = token or get_config().get_api_key('github')
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.timeout = 10
+        self.session = CachedSession()
+        self.session.headers.update({
+            'Accept': 'application/vnd.github+json',
+            'User-Agent': 'RavenTrace-OSINT/1.0',
+        })
+        if self.token:
+            self.session.headers['Authorization'] = f"Bearer {self.token}"
+
+        # Quota par ressource ('core', 'search', 'graphql') : remaining / reset
+        self._limits: Dict[str, Dict[str, float]] = {}
+        self._cond = threading.Condition()
+
+    # ------------------------------------------------------------------
+    # Rate limit
+    # ------------------------------------------------------------------
+
+    def _acquire(self, resource: str) -> bool:
+        """Réserver une requête, en attendant le reset si le quota est épuisé"""
+        with self._cond:
+            while True:
+                state = self._limits.get(resource)
+                if not state or time.time() >= state['reset']:
+                    return True
+                if state['remaining'] > 0:
+                    state['remaining'] -= 1
+                    return True
+
+                wait = state['reset'] - time.time()
+                if wait > self.max_wait:
+                    logger.warning(f"GitHub {resource}: quota épuisé, reset dans {int(wait)}s - requête abandonnée")
+                    return False
+                logger.info(f"GitHub {resource}: quota épuisé, attente {int(wait)}s")
+                self._cond.wait(wait + 1)
+
+    def _refund(self, resource: str) -> None:
+        """Rendre une réservation inutilisée (réponse servie depuis le disque)"""
+        with self._cond:
+            state = self._limits.get(resource)
+            if state and time.time() < state['reset']:
+                state['remaining'] += 1
+                self._cond.notify_all()
+
+    def _update_limits(self, resp: requests.Response, resource: str) -> None:
+        """Mettre à jour le quota depuis les en-têtes X-RateLimit-*"""
+        headers = resp.headers
+        if 'X-RateLimit-Remaining' not in headers:
+            return
+
+        resource = headers.get('X-RateLimit-Resource', resource)
+        try:
+            remaining = int(headers['X-RateLimit-Remaining'])
+            reset = float(headers.get('X-RateLimit-Reset', time.time() + 60))
+        except ValueError:
+            return
+
+        if resp.status_code in (403, 429) and 'Retry-After' in headers:
+            remaining = 0
+            reset = time.time() + float(headers['Retry-After'])
+
+        with self._cond:
+            self._limits[resource] = {'remaining': remaining, 'reset': reset}
+            self._cond.notify_all()
+
+    def rate_limit_status(self) -> Dict[str, Dict[str, float]]:
+        """Quotas connus par ressource"""
+        with self._cond:
+            return {k: dict(v) for k, v in self._limits.items()}
+
+    # ------------------------------------------------------------------
+    # Transport
+    # ------------------------------------------------------------------
+
+    def _request(self, method: str, url: str, resource: str = 'core', **kwargs) -> Optional[requests.Response]:
+        """Requête avec réservation de quota et une relance après reset"""
+        for attempt in range(2):
+            if not self._acquire(resource):
+                return None
+            resp = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            if getattr(resp, 'cache_status', None) == 'hit':
+                # Servie depuis le disque : ni quota consommé, ni en-têtes à jour
+                self._refund(resource)
+                return resp
+            # Après un 304, les en-têtes X-RateLimit-* sont ceux du 304 (qui ne consomme pas de quota)
+            self._update_limits(resp, resource)
+
+            exhausted = resp.headers.get('X-RateLimit-Remaining') == '0' or 'Retry-After' in resp.headers
+            if resp.status_code in (403, 429) and exhausted and attempt == 0:
+                continue
+            return resp
+        return resp
+
+    def get_json(self, url: str, resource: str = 'core', params: Dict[str, Any] = None):
+        """GET conditionnel via le cache HTTP : un 304 ne consomme pas de quota"""
+        resp = self._request('GET', url, resource, params=params)
+        if resp is None:
+            return None, None
+
+        if resp.status_code == 200:
+            return 200, resp.json()
+        return resp.status_code, None
+
+    # ------------------------------------------------------------------
+    # Utilisateurs
+    # ------------------------------------------------------------------
+
+    def get_user(self, login: str) -> Optional[Dict[str, Any]]:
+        """Profil d'un utilisateur (format REST), None si introuvable"""
+        return self.get_users([login]).get(login)
+
+    def get_users(self, logins: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Profils de plusieurs utilisateurs, par lots GraphQL si un token est configuré"""
+        logins = list(dict.fromkeys(logins))
+        users: Dict[str, Optional[Dict[str, Any]]] = {}
+
+        if self.token:
+            for i in range(0, len(logins), self.batch_size):
+                users.update(self._graphql_users(logins[i:i + self.batch_size]))
+        else:
+            for login in logins:
+                status, data = self.get_json(f"{API_URL}/users/{login}")
+                users[login] = data if status == 200 else None
+
+        return users
+
+    def _graphql_users(self, logins: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Un seul appel GraphQL pour un lot d'utilisateurs (alias u0..uN)"""
+        aliases = {f"u{i}": login for i, login in enumerate(logins)}
+        query = "query(" + ", ".join(f"${a}: String!" for a in aliases) + ") {\n"
+        query += "\n".join(f"  {a}: user(login: ${a}) {{ {USER_FIELDS} }}" for a in aliases)
+        query += "\n}"
+
+        resp = self._request('POST', GRAPHQL_URL, 'graphql', json={'query': query, 'variables': aliases})
+        if resp is None or resp.status_code != 200:
+            logger.debug(f"GitHub GraphQL erreur: {resp.status_code if resp is not None else 'quota'}")
+            return {login: None for login in logins}
+
+        data = resp.json().get('data') or {}
+        return {login: self._from_graphql(data.get(alias)) for alias, login in aliases.items()}
+
+    @staticmethod
+    def _from_graphql(node: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Convertir un nœud GraphQL User au format de l'API REST"""
+        if not node:
+            return None
+        return {
+            'login': node.get('login'),
+            'name': node.get('name'),
+            'bio': node.get('bio'),
+            'location': node.get('location'),
+            'company': node.get('company'),
+            'blog': node.get('websiteUrl'),
+            'email': node.get('email') or None,
+            'followers': (node.get('followers') or {}).get('totalCount'),
+            'following': (node.get('following') or {}).get('totalCount'),
+            'public_repos': (node.get('repositories') or {}).get('totalCount'),
+            'public_gists': (node.get('gists') or {}).get('totalCount'),
+            'html_url': node.get('url'),
+            'created_at': node.get('createdAt'),
+            'updated_at': node.get('updatedAt'),
+        }
+
+    def get_repositories(self, login: str, max_pages: int = 10) -> List[Dict[str, Any]]:
+        """Tous les dépôts publics d'un utilisateur (pagination per_page=100)"""
+        repos = []
+        for page in range(1, max_pages + 1):
+            status, data = self.get_json(f"{API_URL}/users/{login}/repos",
+                                         params={'per_page': 100, 'page': page})
+            if status != 200 or not data:
+                break
+            repos.extend(data)
+            if len(data) < 100:
+                break
+        return repos
+
+    def search_users(self, query: str, limit: int = 5) -> Dict[str, Any]:
+        """Recherche d'utilisateurs (quota 'search' distinct)"""
+        status, data = self.get_json(f"{API_URL}/search/users", 'search',
+                                     params={'q': query, 'per_page': limit})
+        return data if status == 200 and data else {}
+
+
+# Instance partagée (créée au premier usage)
+_github_client = None
+_github_lock = threading.Lock()
+
+def get_github_client() -> GitHubClient:
+    """Obtenir le client GitHub partagé"""
+    global _github_client
+    with _github_lock:
+        if _github_client is None:
+            _github_client = GitHubClient()
+        return _github_client
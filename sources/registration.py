@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+registration.py - Client d'enregistrement de domaines RDAP / WHOIS
+RDAP via le bootstrap IANA (cache disque), repli WHOIS brut (port 43)
+avec cache des serveurs de référence par TLD et limite par serveur
+"""
+
+import json
+import logging
+import re
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional
+
+from core.http import CachedSession
+from core.scheduler import HostRateLimiter, HostScheduler
+from storage.database import CacheDB
+
+logger = logging.getLogger(__name__)
+
+BOOTSTRAP_URL = "https://data.iana.org/rdap/dns.json"
+IANA_WHOIS = "whois.iana.org"
+
+# Champs WHOIS texte -> clés normalisées (première occurrence retenue)
+WHOIS_FIELDS = {
+    'registrar': ('registrar', 'sponsoring registrar', 'registrar name'),
+    'creation_date': ('creation date', 'created', 'registered on', 'registration time', 'created on'),
+    'expiration_date': ('registry expiry date', 'registrar registration expiration date',
+                        'expiry date', 'expiration date', 'expires on', 'paid-till'),
+    'updated_date': ('updated date', 'last updated', 'last-update', 'changed', 'last modified'),
+    'org': ('registrant organization', 'registrant organisation', 'org', 'organisation'),
+    'country': ('registrant country', 'country'),
+}
+WHOIS_NOT_FOUND = re.compile(r'no match|not found|no entries found|no data found|status:\s*free|no object found',
+                             re.IGNORECASE)
+
+
+class RegistrationClient:
+    """Recherche d'enregistrement de domaine, RDAP d'abord puis WHOIS"""
+
+    def __init__(self, cache_dir: Path = None, bootstrap_max_age_days: int = 7,
+                 whois_interval: float = 2.0, rdap_interval: float = 0.5):
+        self.cache_dir = Path(cache_dir) if cache_dir else Path.home() / '.raven_trace' / 'cache'
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.bootstrap_file = self.cache_dir / 'rdap_bootstrap.json'
+        self.referrals_file = self.cache_dir / 'whois_servers.json'
+        self.bootstrap_max_age = bootstrap_max_age_days * 86400
+        self.whois_interval = whois_interval
+        self.rdap_interval = rdap_interval
+        self.timeout = 10
+
+        self.session = CachedSession()
+        self.session.headers.update({'Accept': 'application/rdap+json', 'User-Agent': 'RavenTrace-OSINT/1.0'})
+        self.db = CacheDB()
+        self.limiter = HostRateLimiter()
+
+        self._lock = threading.Lock()
+        self._rdap_servers: Optional[Dict[str, str]] = None
+        # Références trouvées (persistées) ; TLD sans référence : réessayés après expiration
+        self._whois_servers: Dict[str, str] = {
+            tld: server for tld, server in (self._load_json(self.referrals_file) or {}).items() if server
+        }
+        self._missing_servers: Dict[str, float] = {}
+        self.missing_server_ttl = 3600
+
+    # ------------------------------------------------------------------
+    # Caches disque
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _load_json(path: Path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _save_json(path: Path, data) -> None:
+        try:
+            tmp = path.with_suffix('.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            tmp.replace(path)
+        except OSError as e:
+            logger.debug(f"Écriture {path} erreur: {e}")
+
+    def _rdap_bootstrap(self) -> Dict[str, str]:
+        """Table TLD -> URL RDAP, depuis le fichier IANA mis en cache sur disque"""
+        with self._lock:
+            if self._rdap_servers is not None:
+                return self._rdap_servers
+
+            data = None
+            try:
+                fresh = time.time() - self.bootstrap_file.stat().st_mtime < self.bootstrap_max_age
+            except OSError:
+                fresh = False
+            if fresh:
+                data = self._load_json(self.bootstrap_file)
+
+            if data is None:
+                try:
+                    resp = self.session.get(BOOTSTRAP_URL, timeout=self.timeout)
+                    if resp.status_code == 200:
+                        data = resp.json()
+                        self._save_json(self.bootstrap_file, data)
+                except Exception as e:
+                    logger.debug(f"Bootstrap RDAP erreur: {e}")
+                # Hors ligne : un bootstrap périmé vaut mieux que rien
+                data = data or self._load_json(self.bootstrap_file) or {}
+
+            servers = {}
+            for tlds, urls in data.get('services', []):
+                url = next((u for u in urls if u.startswith('https')), urls[0] if urls else None)
+                if url:
+                    for tld in tlds:
+                        servers[tld.lower()] = url if url.endswith('/') else url + '/'
+            self._rdap_servers = servers
+            return servers
+
+    def rdap_server(self, domain: str) -> Optional[str]:
+        """URL de base RDAP pour le TLD (ou suffixe) d'un domaine"""
+        servers = self._rdap_bootstrap()
+        labels = domain.lower().rstrip('.').split('.')
+        for i in range(1, len(labels)):
+            server = servers.get('.'.join(labels[i:]))
+            if server:
+                return server
+        return None
+
+    # ------------------------------------------------------------------
+    # RDAP
+    # ------------------------------------------------------------------
+
+    def _rdap_lookup(self, domain: str, base: str) -> Optional[Dict[str, Any]]:
+        self.limiter.wait(base, self.rdap_interval)
+        resp = self.session.get(f"{base}domain/{domain}", timeout=self.timeout)
+        if resp.status_code == 404:
+            return {'domain': domain, 'registered': False, 'source': 'rdap'}
+        if resp.status_code != 200:
+            return None
+        return self._parse_rdap(domain, resp.json())
+
+    @staticmethod
+    def _vcard(entity: Dict[str, Any], field: str) -> Optional[str]:
+        for item in (entity.get('vcardArray') or [None, []])[1]:
+            if item and item[0] == field:
+                value = item[3]
+                if field == 'adr' and isinstance(value, list):
+                    return value[-1] or None
+                return value if isinstance(value, str) else None
+        return None
+
+    def _parse_rdap(self, domain: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Normaliser une réponse RDAP au format verify_domain_registration"""
+        events = {e.get('eventAction'): e.get('eventDate') for e in data.get('events', [])}
+
+        registrar = org = country = None
+        emails = []
+
+        def walk(entities):
+            nonlocal registrar, org, country
+            for entity in entities or []:
+                roles = entity.get('roles', [])
+                if 'registrar' in roles and not registrar:
+                    registrar = self._vcard(entity, 'fn')
+                if 'registrant' in roles:
+                    org = org or self._vcard(entity, 'org') or self._vcard(entity, 'fn')
+                    country = country or self._vcard(entity, 'adr')
+                email = self._vcard(entity, 'email')
+                if email and email not in emails:
+                    emails.append(email)
+                walk(entity.get('entities'))
+
+        walk(data.get('entities'))
+
+        return {
+            'domain': domain,
+            'registered': True,
+            'registrar': registrar,
+            'creation_date': events.get('registration'),
+            'expiration_date': events.get('expiration'),
+            'updated_date': events.get('last changed'),
+            'status': data.get('status', []),
+            'name_servers': [ns.get('ldhName', '').lower() for ns in data.get('nameservers', []) if ns.get('ldhName')],
+            'org': org,
+            'emails': emails,
+            'country': country,
+            'source': 'rdap',
+        }
+
+    # ------------------------------------------------------------------
+    # WHOIS
+    # ------------------------------------------------------------------
+
+    def _whois_query(self, server: str, query: str) -> str:
+        """Requête WHOIS brute (port 43), limitée par serveur"""
+        self.limiter.wait(server, self.whois_interval)
+        with socket.create_connection((server, 43), timeout=self.timeout) as sock:
+            sock.sendall(f"{query}\r\n".encode())
+            chunks = []
+            while True:
+                data = sock.recv(4096)
+                if not data:
+                    break
+                chunks.append(data)
+        return b''.join(chunks).decode('utf-8', errors='replace')
+
+    def whois_server(self, tld: str) -> Optional[str]:
+        """Serveur WHOIS d'un TLD (référence IANA mise en cache sur disque)"""
+        tld = tld.lower()
+        with self._lock:
+            if tld in self._whois_servers:
+                return self._whois_servers[tld]
+            if time.time() < self._missing_servers.get(tld, 0):
+                return None
+
+        server = None
+        try:
+            text = self._whois_query(IANA_WHOIS, tld)
+            match = re.search(r'^(?:refer|whois):\s*(\S+)', text, re.IGNORECASE | re.MULTILINE)
+            server = match.group(1).lower() if match else None
+        except OSError as e:
+            logger.debug(f"Référence WHOIS {tld} erreur: {e}")
+            return None
+
+        with self._lock:
+            if server is None:
+                # Absence de référence gardée en mémoire seulement, le temps de `missing_server_ttl`
+                self._missing_servers[tld] = time.time() + self.missing_server_ttl
+            else:
+                self._whois_servers[tld] = server
+                self._save_json(self.referrals_file, self._whois_servers)
+        return server
+
+    @staticmethod
+    def parse_whois(domain: str, text: str) -> Dict[str, Any]:
+        """Extraire les champs utiles d'une réponse WHOIS texte"""
+        fields: Dict[str, List[str]] = {}
+        for line in text.splitlines():
+            key, sep, value = line.partition(':')
+            key, value = key.strip().lower(), value.strip()
+            if sep and value and not key.startswith('%') and not key.startswith('>>>'):
+                fields.setdefault(key, []).append(value)
+
+        def first(keys):
+            for key in keys:
+                if key in fields:
+                    return fields[key][0]
+            return None
+
+        result = {'domain': domain, 'source': 'whois'}
+        for name, keys in WHOIS_FIELDS.items():
+            result[name] = first(keys)
+
+        result['status'] = [s.split()[0] for s in fields.get('domain status', fields.get('status', []))]
+        result['name_servers'] = list(dict.fromkeys(
+            ns.split()[0].lower().rstrip('.')
+            for ns in fields.get('name server', []) + fields.get('nserver', [])
+        ))
+        result['emails'] = list(dict.fromkeys(re.findall(r'[\w.+-]+@[\w-]+\.[\w.-]+', text)))
+        result['registered'] = not WHOIS_NOT_FOUND.search(text) and bool(
+            result['registrar'] or result['creation_date'] or result['name_servers']
+        )
+        return result
+
+    def _whois_lookup(self, domain: str) -> Optional[Dict[str, Any]]:
+        server = self.whois_server(domain.rsplit('.', 1)[-1])
+        if not server:
+            return None
+
+        text = self._whois_query(server, domain)
+        # Registres « thin » (.com/.net) : suivre la référence vers le registrar
+        match = re.search(r'Registrar WHOIS Server:\s*(\S+)', text, re.IGNORECASE)
+        if match and match.group(1).lower() != server:
+            try:
+                text = text + '\n' + self._whois_query(match.group(1).lower(), domain)
+            except OSError as e:
+                logger.debug(f"Référence registrar {match.group(1)} erreur: {e}")
+        return self.parse_whois(domain, text)
+
+    # ------------------------------------------------------------------
+    # API publique
+    # ------------------------------------------------------------------
+
+    def lookup(self, domain: str, ttl_hours: int = 24) -> Dict[str, Any]:
+        """Enregistrement d'un domaine (cache par domaine, RDAP puis WHOIS)"""
+        domain = domain.lower().rstrip('.')
+        cached = self.db.get_domain(domain, ttl_hours)
+        if cached:
+            cached['from_cache'] = True
+            return cached
+
+        result = None
+        base = self.rdap_server(domain)
+        if base:
+            try:
+                result = self._rdap_lookup(domain, base)
+            except Exception as e:
+                logger.debug(f"RDAP {domain} erreur: {e}")
+
+        if result is None:
+            try:
+                result = self._whois_lookup(domain)
+            except Exception as e:
+                logger.debug(f"WHOIS {domain} erreur: {e}")
+
+        if result is None:
+            return {}
+
+        self.db.save_domain(domain, result)
+        return result
+
+    def _server_key(self, domain: str) -> str:
+        """Clé de limitation : serveur RDAP ou WHOIS probable du domaine"""
+        base = self.rdap_server(domain)
+        if base:
+            return base
+        with self._lock:
+            server = self._whois_servers.get(domain.rsplit('.', 1)[-1].lower())
+        return f"whois://{server or IANA_WHOIS}/"
+
+    def lookup_many(self, domains: Iterable[str], per_server: int = 2,
+                    max_workers: int = 10) -> Dict[str, Dict[str, Any]]:
+        """Enregistrements de plusieurs domaines en parallèle, limités par serveur"""
+        domains = list(dict.fromkeys(d.lower().rstrip('.') for d in domains))
+        tasks = [(domain, self._server_key(domain), self.lookup, (domain,)) for domain in domains]
+        scheduler = HostScheduler(max_workers=max_workers, per_host=per_server)
+        return {domain: result or {} for domain, result, _ in scheduler.run(tasks)}
+
+
+# Client partagé (créé au premier usage)
+_registration_client = None
+_registration_lock = threading.Lock()
+
+def get_registration_client() -> RegistrationClient:
+    """Obtenir le client d'enregistrement partagé"""
+    global _registration_client
+    with _registration_lock:
+        if _registration_client is None:
+            _registration_client = RegistrationClient()
+        return _registration_client
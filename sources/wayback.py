@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+wayback.py - Client de l'API CDX de la Wayback Machine
+Limite, filtres et regroupement appliqués côté serveur, pages lues à la
+demande (clé de reprise) ou en parallèle quand leur nombre est connu
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.http import CachedSession
+from core.scheduler import HostScheduler
+
+logger = logging.getLogger(__name__)
+
+CDX_URL = "https://web.archive.org/cdx/search/cdx"
+DEFAULT_FIELDS = ('original', 'timestamp', 'mimetype', 'statuscode')
+
+
+def archive_url(timestamp: str, original: str) -> str:
+    """URL de la capture archivée"""
+    return f"https://web.archive.org/web/{timestamp}/{original}"
+
+
+class WaybackCDXClient:
+    """Captures d'une URL (ou d'un préfixe) depuis l'index CDX
+
+    Seul ce qui est conservé transite : `limit`, `filter` et `collapse`
+    sont transmis au serveur, et les résultats sont demandés page par page.
+    """
+
+    def __init__(self, timeout: int = 30, page_size: int = 500, max_workers: int = 4):
+        self.timeout = timeout
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self.session = CachedSession()
+        self.session.headers.update({'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36'})
+
+    @staticmethod
+    def _query(url: str, match_type: str = None, fields: Iterable[str] = DEFAULT_FIELDS,
+               filters: Iterable[str] = None, collapse: str = 'urlkey',
+               from_ts: str = None, to_ts: str = None) -> List[Tuple[str, Any]]:
+        # Liste de couples : `filter` peut être répété
+        params = [('url', url), ('output', 'json'), ('fl', ','.join(fields))]
+        if match_type:
+            params.append(('matchType', match_type))
+        if collapse:
+            params.append(('collapse', collapse))
+        for expression in filters or ():
+            params.append(('filter', expression))
+        if from_ts:
+            params.append(('from', from_ts))
+        if to_ts:
+            params.append(('to', to_ts))
+        return params
+
+    def _get(self, params: List[Tuple[str, Any]]) -> Any:
+        resp = self.session.get(CDX_URL, params=params, timeout=self.timeout)
+        if resp.status_code != 200:
+            raise ValueError(f"CDX réponse: {resp.status_code}")
+        text = resp.text.strip()
+        return resp.json() if text else []
+
+    @staticmethod
+    def _rows(data: List[List[str]]) -> Tuple[List[Dict[str, str]], Optional[str]]:
+        """Lignes JSON -> (captures, clé de reprise) ; la 1re ligne porte les noms de champs"""
+        resume_key = None
+        # Avec showResumeKey, la réponse se termine par une ligne vide puis [clé]
+        if len(data) >= 2 and data[-2] == [] and len(data[-1]) == 1:
+            resume_key = data[-1][0]
+            data = data[:-2]
+        if not data:
+            return [], resume_key
+        header = data[0]
+        captures = []
+        for row in data[1:]:
+            if len(row) != len(header):
+                continue
+            capture = dict(zip(header, row))
+            if 'timestamp' in capture and 'original' in capture:
+                capture['archive_url'] = archive_url(capture['timestamp'], capture['original'])
+            captures.append(capture)
+        return captures, resume_key
+
+    def fetch_page(self, url: str, limit: int = None, resume_key: str = None,
+                   **query) -> Tuple[List[Dict[str, str]], Optional[str]]:
+        """Une page de captures et la clé de la suivante (None en fin d'index)"""
+        params = self._query(url, **query)
+        params += [('limit', limit or self.page_size), ('showResumeKey', 'true')]
+        if resume_key:
+            params.append(('resumeKey', resume_key))
+        return self._rows(self._get(params))
+
+    def iter_captures(self, url: str, limit: int = None, resume_key: str = None,
+                      on_page: Callable[[Optional[str]], None] = None, **query) -> Iterator[Dict[str, str]]:
+        """Produire les captures page par page, au plus `limit` au total
+
+        `on_page` reçoit la clé de reprise après chaque page consommée :
+        la passer en `resume_key` poursuit une lecture interrompue.
+        """
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = self.page_size if remaining is None else min(self.page_size, remaining)
+            captures, resume_key = self.fetch_page(url, limit=size, resume_key=resume_key, **query)
+            for capture in captures[:size]:
+                yield capture
+            if remaining is not None:
+                remaining -= min(len(captures), size)
+            if on_page:
+                on_page(resume_key)
+            if not resume_key or not captures:
+                break
+
+    def num_pages(self, url: str, page_size: int = None, **query) -> int:
+        """Nombre de pages de l'index pour la requête (API de pagination)"""
+        params = self._query(url, **query) + [('showNumPages', 'true')]
+        if page_size:
+            params.append(('pageSize', page_size))
+        return int(self._get(params) or 0)
+
+    def iter_pages(self, url: str, pages: Iterable[int] = None, page_size: int = None,
+                   deadline: float = None, **query) -> Iterator[Dict[str, str]]:
+        """Produire les captures de plusieurs pages téléchargées en parallèle
+
+        Les pages sont produites dans l'ordre ; sans `pages`, toutes celles
+        annoncées par `num_pages` sont lues. `deadline` est un timestamp
+        time.monotonic au-delà duquel les pages manquantes sont ignorées.
+        """
+        if pages is None:
+            pages = range(self.num_pages(url, page_size=page_size, **query))
+        pages = list(pages)
+        base = self._query(url, **query)
+        if page_size:
+            base.append(('pageSize', page_size))
+
+        def fetch(page: int) -> List[Dict[str, str]]:
+            return self._rows(self._get(base + [('page', page)]))[0]
+
+        tasks = ((page, CDX_URL, fetch, (page,)) for page in pages)
+        scheduler = HostScheduler(max_workers=self.max_workers, per_host=self.max_workers)
+        pending: Dict[int, List[Dict[str, str]]] = {}
+        order = iter(pages)
+        expected = next(order, None)
+        for page, captures, error in scheduler.run(tasks, deadline):
+            if error:
+                logger.debug(f"CDX page {page} erreur: {error}")
+            pending[page] = captures or []
+            # Produire les pages contiguës déjà reçues
+            while expected is not None and expected in pending:
+                yield from pending.pop(expected)
+                expected = next(order, None)
+
+
+# Client partagé (créé au premier usage)
+_wayback_client = None
+_wayback_client_lock = threading.Lock()
+
+def get_wayback_client() -> WaybackCDXClient:
+    """Obtenir le client CDX partagé"""
+    global _wayback_client
+    with _wayback_client_lock:
+        if _wayback_client is None:
+            _wayback_client = WaybackCDXClient()
+        return _wayback_client
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+BreachCatalog - Catalogue local des métadonnées de fuites (HIBP /breaches)
+Stocké dans ~/.raven_trace/cache/breach_catalog.db, synchronisé incrémentalement
+"""
+
+import sqlite3
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+CATALOG_URL = "https://haveibeenpwned.com/api/v3/breaches"
+
+# Champs HIBP -> colonnes
+COLUMNS = {
+    'Name': 'name',
+    'Title': 'title',
+    'Domain': 'domain',
+    'BreachDate': 'breach_date',
+    'AddedDate': 'added_date',
+    'ModifiedDate': 'modified_date',
+    'PwnCount': 'pwn_count',
+    'Description': 'description',
+    'IsVerified': 'is_verified',
+    'IsFabricated': 'is_fabricated',
+    'IsSensitive': 'is_sensitive',
+    'IsRetired': 'is_retired',
+    'IsSpamList': 'is_spam_list',
+    'LogoPath': 'logo_path',
+}
+BOOL_COLUMNS = ('is_verified', 'is_fabricated', 'is_sensitive', 'is_retired', 'is_spam_list')
+
+
+class BreachCatalog:
+    """Métadonnées des fuites indexées par nom, domaine et type de donnée"""
+
+    def __init__(self, db_path: str = None):
+        if db_path is None:
+            cache_dir = Path.home() / '.raven_trace' / 'cache'
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            db_path = cache_dir / 'breach_catalog.db'
+
+        self.db_path = str(db_path)
+        self.timeout = 20
+        self._sync_lock = threading.Lock()
+        self.init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def init_db(self):
+        """Initialiser la base de données"""
+        try:
+            conn = self._connect()
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS breaches (
+                    name TEXT PRIMARY KEY,
+                    title TEXT,
+                    domain TEXT,
+                    breach_date TEXT,
+                    added_date TEXT,
+                    modified_date TEXT,
+                    pwn_count INTEGER,
+                    description TEXT,
+                    data_classes TEXT NOT NULL,
+                    is_verified INTEGER,
+                    is_fabricated INTEGER,
+                    is_sensitive INTEGER,
+                    is_retired INTEGER,
+                    is_spam_list INTEGER,
+                    logo_path TEXT
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS breach_data_classes (
+                    name TEXT NOT NULL,
+                    data_class TEXT NOT NULL,
+                    PRIMARY KEY (name, data_class)
+                )
+            ''')
+            # Résultats par email : uniquement les noms de fuites
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS email_breaches (
+                    email TEXT PRIMARY KEY,
+                    breach_names TEXT NOT NULL,
+                    checked_at REAL NOT NULL
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS catalog_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_breach_domain ON breaches(domain)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_breach_data_class ON breach_data_classes(data_class)')
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Erreur init breach catalog: {e}")
+
+    # ------------------------------------------------------------------
+    # Synchronisation
+    # ------------------------------------------------------------------
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        try:
+            conn = self._connect()
+            row = conn.execute('SELECT value FROM catalog_meta WHERE key = ?', (key,)).fetchone()
+            conn.close()
+            return row[0] if row else None
+        except Exception as e:
+            logger.debug(f"Erreur meta breach catalog: {e}")
+            return None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        try:
+            conn = self._connect()
+            conn.execute('INSERT OR REPLACE INTO catalog_meta (key, value) VALUES (?, ?)', (key, value))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.debug(f"Erreur meta breach catalog: {e}")
+
+    def last_sync(self) -> float:
+        """Timestamp de la dernière synchronisation réussie (0 si jamais)"""
+        return float(self._get_meta('last_sync') or 0)
+
+    def upsert_breaches(self, records: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """Insérer les fuites nouvelles ou modifiées (comparaison sur ModifiedDate)"""
+        stats = {'added': 0, 'updated': 0, 'unchanged': 0}
+        try:
+            conn = self._connect()
+            known = dict(conn.execute('SELECT name, modified_date FROM breaches'))
+
+            for record in records:
+                name = record.get('Name')
+                if not name:
+                    continue
+                if name in known and known[name] == record.get('ModifiedDate'):
+                    stats['unchanged'] += 1
+                    continue
+
+                row = {col: record.get(field) for field, col in COLUMNS.items()}
+                row['domain'] = (row['domain'] or '').lower() or None
+                for col in BOOL_COLUMNS:
+                    row[col] = int(bool(row[col]))
+                classes = record.get('DataClasses') or []
+                row['data_classes'] = json.dumps(classes, ensure_ascii=False)
+
+                cols = ', '.join(row)
+                conn.execute(f'INSERT OR REPLACE INTO breaches ({cols}) VALUES ({", ".join("?" * len(row))})',
+                             tuple(row.values()))
+                conn.execute('DELETE FROM breach_data_classes WHERE name = ?', (name,))
+                conn.executemany('INSERT OR IGNORE INTO breach_data_classes (name, data_class) VALUES (?, ?)',
+                                 [(name, c) for c in classes])
+                stats['updated' if name in known else 'added'] += 1
+
+            conn.execute("INSERT OR REPLACE INTO catalog_meta (key, value) VALUES ('last_sync', ?)",
+                         (str(time.time()),))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Erreur upsert breach catalog: {e}")
+        return stats
+
+    def sync(self, session=None, max_age_hours: float = 24, force: bool = False,
+             min_force_interval: float = 3600) -> Dict[str, int]:
+        """Rafraîchir le catalogue depuis HIBP s'il date de plus de `max_age_hours`
+
+        La requête passe par le cache HTTP : un catalogue inchangé coûte un 304.
+        `force` ignore l'âge du catalogue, mais au plus une fois toutes les
+        `min_force_interval` secondes (date mémorisée entre deux exécutions).
+        """
+        with self._sync_lock:
+            now = time.time()
+            if force:
+                if now - float(self._get_meta('last_forced_sync') or 0) < min_force_interval:
+                    return {'added': 0, 'updated': 0, 'unchanged': 0, 'skipped': 1}
+                self._set_meta('last_forced_sync', str(now))
+            elif now - self.last_sync() < max_age_hours * 3600:
+                return {'added': 0, 'updated': 0, 'unchanged': 0, 'skipped': 1}
+
+            if session is None:
+                from core.http import CachedSession
+                session = CachedSession()
+            try:
+                resp = session.get(CATALOG_URL, headers={'User-Agent': 'RavenTrace-OSINT/1.0'},
+                                   timeout=self.timeout)
+                if resp.status_code != 200:
+                    logger.debug(f"Catalogue HIBP réponse: {resp.status_code}")
+                    return {'added': 0, 'updated': 0, 'unchanged': 0, 'error': resp.status_code}
+                stats = self.upsert_breaches(resp.json())
+                logger.info(f"Catalogue fuites: {stats['added']} ajoutées, {stats['updated']} mises à jour")
+                return stats
+            except Exception as e:
+                logger.debug(f"Sync catalogue HIBP erreur: {e}")
+                return {'added': 0, 'updated': 0, 'unchanged': 0, 'error': str(e)}
+
+    # ------------------------------------------------------------------
+    # Consultation
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        breach = dict(row)
+        breach['data_classes'] = json.loads(breach['data_classes'])
+        for col in BOOL_COLUMNS:
+            breach[col] = bool(breach[col])
+        return breach
+
+    def _query(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        try:
+            conn = self._connect()
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(sql, params).fetchall()
+            conn.close()
+            return [self._row_to_dict(row) for row in rows]
+        except Exception as e:
+            logger.debug(f"Erreur requête breach catalog: {e}")
+            return []
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Métadonnées d'une fuite (nom insensible à la casse)"""
+        rows = self._query('SELECT * FROM breaches WHERE name = ? COLLATE NOCASE', (name,))
+        return rows[0] if rows else None
+
+    def get_many(self, names: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Métadonnées de plusieurs fuites en une requête"""
+        names = list(dict.fromkeys(names))
+        if not names:
+            return {}
+        rows = self._query(f'SELECT * FROM breaches WHERE name IN ({", ".join("?" * len(names))})',
+                           tuple(names))
+        return {row['name']: row for row in rows}
+
+    def by_domain(self, domain: str) -> List[Dict[str, Any]]:
+        """Fuites d'un domaine"""
+        return self._query('SELECT * FROM breaches WHERE domain = ? ORDER BY breach_date DESC',
+                           (domain.lower(),))
+
+    def by_data_class(self, data_class: str) -> List[Dict[str, Any]]:
+        """Fuites exposant un type de donnée (ex: 'Passwords')"""
+        return self._query('''
+            SELECT b.* FROM breaches b
+            JOIN breach_data_classes d ON d.name = b.name
+            WHERE d.data_class = ? COLLATE NOCASE
+            ORDER BY b.pwn_count DESC
+        ''', (data_class,))
+
+    # ------------------------------------------------------------------
+    # Résultats par email
+    # ------------------------------------------------------------------
+
+    def save_email_breaches(self, email: str, names: List[str]):
+        """Mémoriser les noms de fuites trouvés pour un email"""
+        try:
+            conn = self._connect()
+            conn.execute('INSERT OR REPLACE INTO email_breaches (email, breach_names, checked_at) VALUES (?, ?, ?)',
+                         (email.lower(), json.dumps(names), time.time()))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.debug(f"Erreur save email breaches: {e}")
+
+    def get_email_breaches(self, email: str, ttl_hours: float = 24) -> Optional[List[str]]:
+        """Noms de fuites mémorisés pour un email (None si absent ou expiré)"""
+        try:
+            conn = self._connect()
+            row = conn.execute('SELECT breach_names FROM email_breaches WHERE email = ? AND checked_at > ?',
+                               (email.lower(), time.time() - ttl_hours * 3600)).fetchone()
+            conn.close()
+            return json.loads(row[0]) if row else None
+        except Exception as e:
+            logger.debug(f"Erreur get email breaches: {e}")
+            return None
+
+    def clear_old_cache(self, days: int = 7):
+        """Supprimer les résultats par email plus vieux que `days` jours"""
+        try:
+            conn = self._connect()
+            conn.execute('DELETE FROM email_breaches WHERE checked_at < ?', (time.time() - days * 86400,))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Erreur clear breach catalog: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Nombre de fuites au catalogue et date de synchronisation"""
+        try:
+            conn = self._connect()
+            breaches = conn.execute('SELECT COUNT(*) FROM breaches').fetchone()[0]
+            emails = conn.execute('SELECT COUNT(*) FROM email_breaches').fetchone()[0]
+            conn.close()
+            return {'breaches': breaches, 'emails': emails, 'last_sync': self.last_sync()}
+        except Exception as e:
+            logger.error(f"Erreur stats breach catalog: {e}")
+            return {'breaches': 0, 'emails': 0, 'last_sync': 0}
+
+
+# Catalogue partagé (créé au premier usage)
+_breach_catalog = None
+_breach_catalog_lock = threading.Lock()
+
+def get_breach_catalog() -> BreachCatalog:
+    """Obtenir le catalogue de fuites partagé"""
+    global _breach_catalog
+    with _breach_catalog_lock:
+        if _breach_catalog is None:
+            _breach_catalog = BreachCatalog()
+        return _breach_catalog
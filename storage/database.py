@@ -62,6 +62,27 @@ class CacheDB:
                 )
             ''')
             
+            # Table pour enregistrements de domaines (RDAP/WHOIS)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS domain_cache (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    domain TEXT UNIQUE NOT NULL,
+                    results TEXT NOT NULL,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Table pour sorties analysées des outils externes (clé: outil, version, arguments)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS tool_cache (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    cache_key TEXT UNIQUE NOT NULL,
+                    tool TEXT NOT NULL,
+                    results TEXT NOT NULL,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
             # Créer des index pour améliorer les performances
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_email ON email_cache(email)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_email_timestamp ON email_cache(timestamp)')
@@ -69,6 +90,8 @@ class CacheDB:
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_phone_timestamp ON phone_cache(timestamp)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_username ON username_cache(username)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_username_timestamp ON username_cache(timestamp)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_domain_timestamp ON domain_cache(timestamp)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_tool_timestamp ON tool_cache(timestamp)')
             
             conn.commit()
             conn.close()
@@ -202,6 +225,87 @@ class CacheDB:
             logger.error(f"Erreur get username cache: {e}")
             return None
     
+    def save_domain(self, domain: str, results: Dict[str, Any]):
+        """Sauvegarder l'enregistrement d'un domaine"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            results_json = json.dumps(results, ensure_ascii=False)
+            
+            cursor.execute('''
+                INSERT OR REPLACE INTO domain_cache (domain, results, timestamp)
+                VALUES (?, ?, datetime('now'))
+            ''', (domain, results_json))
+            
+            conn.commit()
+            conn.close()
+            logger.debug(f"Domain cache sauvegardé: {domain}")
+        except Exception as e:
+            logger.error(f"Erreur save domain cache: {e}")
+    
+    def get_domain(self, domain: str, ttl_hours: int = 24) -> Optional[Dict[str, Any]]:
+        """Récupérer l'enregistrement en cache d'un domaine"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT results FROM domain_cache 
+                WHERE domain = ? AND timestamp > datetime('now', '-' || ? || ' hours')
+            ''', (domain, ttl_hours))
+            
+            row = cursor.fetchone()
+            conn.close()
+            
+            if row:
+                logger.debug(f"Domain cache récupéré: {domain}")
+                return json.loads(row[0])
+            return None
+        except Exception as e:
+            logger.error(f"Erreur get domain cache: {e}")
+            return None
+    
+    def save_tool_output(self, cache_key: str, tool: str, results: Any):
+        """Sauvegarder la sortie analysée d'un outil externe"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            results_json = json.dumps(results, ensure_ascii=False)
+            
+            cursor.execute('''
+                INSERT OR REPLACE INTO tool_cache (cache_key, tool, results, timestamp)
+                VALUES (?, ?, ?, datetime('now'))
+            ''', (cache_key, tool, results_json))
+            
+            conn.commit()
+            conn.close()
+            logger.debug(f"Tool cache sauvegardé: {tool}")
+        except Exception as e:
+            logger.error(f"Erreur save tool cache: {e}")
+    
+    def get_tool_output(self, cache_key: str, ttl_hours: int = 24) -> Optional[Any]:
+        """Récupérer la sortie analysée d'un outil (None si absente ou expirée)"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT results FROM tool_cache 
+                WHERE cache_key = ? AND timestamp > datetime('now', '-' || ? || ' hours')
+            ''', (cache_key, ttl_hours))
+            
+            row = cursor.fetchone()
+            conn.close()
+            
+            if row:
+                return json.loads(row[0])
+            return None
+        except Exception as e:
+            logger.error(f"Erreur get tool cache: {e}")
+            return None
+    
     def clear_old_cache(self, days: int = 7):
         """Nettoyer le cache expiré"""
         try:
@@ -224,6 +328,16 @@ class CacheDB:
                 WHERE timestamp < datetime('now', '-' || ? || ' days')
             ''', (days,))
             
+            cursor.execute('''
+                DELETE FROM domain_cache 
+                WHERE timestamp < datetime('now', '-' || ? || ' days')
+            ''', (days,))
+            
+            cursor.execute('''
+                DELETE FROM tool_cache 
+                WHERE timestamp < datetime('now', '-' || ? || ' days')
+            ''', (days,))
+            
             conn.commit()
             
             # Optimiser la base de données après suppression
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+HTTPCache - Cache disque des réponses HTTP (corps + validateurs)
+Stocké dans ~/.raven_trace/cache/http_cache.db
+"""
+
+import sqlite3
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class HTTPCache:
+    """Stockage SQLite des réponses HTTP réutilisables"""
+
+    def __init__(self, db_path: str = None):
+        if db_path is None:
+            cache_dir = Path.home() / '.raven_trace' / 'cache'
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            db_path = cache_dir / 'http_cache.db'
+
+        self.db_path = str(db_path)
+        self.init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def init_db(self):
+        """Initialiser la base de données"""
+        try:
+            conn = self._connect()
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS http_cache (
+                    key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    status INTEGER NOT NULL,
+                    headers TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    stored_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_http_stored ON http_cache(stored_at)')
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Erreur init HTTP cache: {e}")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Récupérer une entrée (même périmée : elle sert à la revalidation)"""
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                'SELECT url, status, headers, body, stored_at, expires_at FROM http_cache WHERE key = ?',
+                (key,)
+            ).fetchone()
+            conn.close()
+
+            if row:
+                return {
+                    'url': row[0],
+                    'status': row[1],
+                    'headers': json.loads(row[2]),
+                    'body': row[3],
+                    'stored_at': row[4],
+                    'expires_at': row[5],
+                }
+        except Exception as e:
+            logger.debug(f"Erreur get HTTP cache: {e}")
+        return None
+
+    def put(self, key: str, url: str, status: int, headers: Dict[str, str], body: bytes, expires_at: float):
+        """Enregistrer une réponse"""
+        try:
+            conn = self._connect()
+            conn.execute('''
+                INSERT OR REPLACE INTO http_cache (key, url, status, headers, body, stored_at, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (key, url, status, json.dumps(headers), sqlite3.Binary(body), time.time(), expires_at))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.debug(f"Erreur put HTTP cache: {e}")
+
+    def refresh(self, key: str, headers: Dict[str, str], expires_at: float):
+        """Mettre à jour en-têtes et fraîcheur après un 304"""
+        try:
+            conn = self._connect()
+            conn.execute(
+                'UPDATE http_cache SET headers = ?, stored_at = ?, expires_at = ? WHERE key = ?',
+                (json.dumps(headers), time.time(), expires_at, key)
+            )
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.debug(f"Erreur refresh HTTP cache: {e}")
+
+    def clear_old_cache(self, days: int = 7):
+        """Supprimer les entrées non revalidées depuis `days` jours"""
+        try:
+            conn = self._connect()
+            conn.execute('DELETE FROM http_cache WHERE stored_at < ?', (time.time() - days * 86400,))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Erreur clear HTTP cache: {e}")
+
+    def get_stats(self) -> Dict[str, int]:
+        """Nombre d'entrées et volume des corps stockés"""
+        try:
+            conn = self._connect()
+            count, size = conn.execute('SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM http_cache').fetchone()
+            conn.close()
+            return {'entries': count, 'body_bytes': size}
+        except Exception as e:
+            logger.error(f"Erreur stats HTTP cache: {e}")
+            return {'entries': 0, 'body_bytes': 0}
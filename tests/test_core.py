@@ -15,9 +15,16 @@ from core.validators import (
     normalize_email, normalize_phone, normalize_username
 )
 from core.engine import SearchEngine
+from core.scheduler import HostScheduler
+from modules.username_lookup import UsernameLookup
+from modules.email_lookup import EmailLookup
+from sources.github_api import GitHubClient
+from core.http import CachedSession, freshness_deadline
+from storage.http_cache import HTTPCache
+from core.resolver import DNSResolver
 from utils.helpers import (
     is_valid_email_format, extract_domain, hash_string,
-    is_phone_like, is_url
+    is_phone_like, is_url, extract_urls
 )
 
 
@@ -87,6 +94,10 @@ class TestHelpers(unittest.TestCase):
         """Test détection téléphone"""
         self.assertTrue(is_phone_like("0612345678"))
         self.assertFalse(is_phone_like("abc"))
+    
+    def test_extract_urls(self):
+        """Test extraction URLs"""
+        self.assertEqual(extract_urls("voir https://a.com et https://a.com"), ["https://a.com"])
 
 
 class TestSearchEngine(unittest.TestCase):
@@ -107,5 +118,1274 @@ class TestSearchEngine(unittest.TestCase):
         self.assertIn("error", result)
 
 
+class TestHostScheduler(unittest.TestCase):
+    """Tests pour l'ordonnanceur par hôte"""
+    
+    def test_per_host_limit(self):
+        """Test limite de concurrence par hôte respectée"""
+        import threading
+        import time
+        
+        lock = threading.Lock()
+        active = {}
+        peaks = {}
+        
+        def probe(host):
+            with lock:
+                active[host] = active.get(host, 0) + 1
+                peaks[host] = max(peaks.get(host, 0), active[host])
+            time.sleep(0.01)
+            with lock:
+                active[host] -= 1
+            return host
+        
+        tasks = [
+            (i, f"https://{host}/{i}", probe, (host,))
+            for i in range(12) for host in ('a.test', 'b.test')
+        ]
+        results = list(HostScheduler(max_workers=8, per_host=2).run(tasks))
+        
+        self.assertEqual(len(results), 24)
+        self.assertTrue(all(error is None for _, _, error in results))
+        self.assertLessEqual(max(peaks.values()), 2)
+    
+    def test_deadline(self):
+        """Test tâches non terminées signalées en timeout"""
+        import time
+        
+        tasks = [(i, "https://slow.test/", time.sleep, (0.5,)) for i in range(3)]
+        deadline = time.monotonic() + 0.1
+        results = list(HostScheduler(per_host=1).run(tasks, deadline=deadline))
+        
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(error == 'timeout' for _, _, error in results))
+
+
+class TestUsernameSweep(unittest.TestCase):
+    """Tests pour le balayage multi-pseudos"""
+    
+    def test_sweep_matrix_sparse(self):
+        """Test matrice creuse des profils trouvés"""
+        lookup = UsernameLookup()
+        
+        def fake_check(username, platform, url):
+            return {'platform': platform, 'username': username, 'url': url,
+                    'found': username == 'alice' and platform == 'github'}
+        
+        with patch.object(lookup, 'check_platform', side_effect=fake_check):
+            matrix = lookup.sweep_matrix(['alice', 'bob'], ['github', 'gitlab'])
+        
+        self.assertEqual(matrix, {'alice': {'github': 'https://github.com/alice'}})
+
+    
+    def test_generate_variants_ranked_and_unique(self):
+        """Test variantes dédupliquées et triées par probabilité"""
+        lookup = UsernameLookup()
+        variants = list(lookup.generate_variants('john_doe', 'John', 'Doe', 'john.doe@example.com'))
+        names = [v for v, _ in variants]
+        priors = [p for _, p in variants]
+        
+        self.assertEqual(names[0], 'john_doe')
+        self.assertEqual(len(names), len(set(names)))
+        self.assertEqual(priors, sorted(priors, reverse=True))
+        self.assertIn('jdoe', names)
+        self.assertIn('j0hn_d03', names)
+    
+    def test_probe_variants_budget_and_early_stop(self):
+        """Test budget de requêtes et arrêt anticipé"""
+        lookup = UsernameLookup()
+        platforms = ['github', 'gitlab', 'reddit']
+        
+        def miss(username, platform, url):
+            return {'platform': platform, 'username': username, 'url': url, 'found': False}
+        
+        with patch.object(lookup, 'check_platform', side_effect=miss):
+            result = lookup.probe_variants('john_doe', 'John', 'Doe', platforms=platforms, budget=20)
+        self.assertLessEqual(result['requests'], 20)
+        self.assertEqual(len(result['probed']), 6)
+        self.assertFalse(result['stopped_early'])
+        
+        def hit(username, platform, url):
+            return {'platform': platform, 'username': username, 'url': url, 'found': username == 'john_doe'}
+        
+        with patch.object(lookup, 'check_platform', side_effect=hit):
+            result = lookup.probe_variants('john_doe', 'John', 'Doe', platforms=platforms, budget=200)
+        self.assertTrue(result['stopped_early'])
+        self.assertEqual(result['matches']['john_doe']['confidence'], 1.0)
+        
+        empty = lookup.probe_variants('john_doe', platforms=[])
+        self.assertEqual((empty['requests'], empty['probed']), (0, []))
+
+
+class TestGitHubClient(unittest.TestCase):
+    """Tests pour le client GitHub"""
+    
+    @staticmethod
+    def _response(status, body=None, headers=None):
+        resp = MagicMock()
+        resp.status_code = status
+        resp.json.return_value = body
+        resp.headers = headers or {}
+        return resp
+    
+    def test_exhausted_quota_parks_or_gives_up(self):
+        """Test quota épuisé : abandon si le reset dépasse max_wait"""
+        import time
+        
+        client = GitHubClient(token='', max_wait=1)
+        client._limits['core'] = {'remaining': 0, 'reset': time.time() + 3600}
+        self.assertFalse(client._acquire('core'))
+        
+        client._limits['core'] = {'remaining': 0, 'reset': time.time() - 1}
+        self.assertTrue(client._acquire('core'))
+    
+    def test_cache_hits_and_304_do_not_burn_quota(self):
+        """Test quota rendu sur un hit du cache, resynchronisé sur un 304"""
+        import time
+        
+        client = GitHubClient(token='')
+        client._limits['core'] = {'remaining': 5, 'reset': time.time() + 3600}
+        hit = self._response(200, {'login': 'alice'})
+        hit.cache_status = 'hit'
+        with patch.object(client.session, 'request', return_value=hit):
+            client.get_json('https://api.github.com/users/alice')
+        self.assertEqual(client._limits['core']['remaining'], 5)
+        
+        revalidated = self._response(200, {'login': 'alice'}, {'X-RateLimit-Remaining': '5',
+                                                               'X-RateLimit-Reset': str(time.time() + 3600)})
+        revalidated.cache_status = 'revalidated'
+        with patch.object(client.session, 'request', return_value=revalidated):
+            client.get_json('https://api.github.com/users/alice')
+        self.assertEqual(client._limits['core']['remaining'], 5)
+    
+    def test_graphql_batch_mapped_to_rest_shape(self):
+        """Test lot GraphQL converti au format REST"""
+        client = GitHubClient(token='t')
+        body = {'data': {
+            'u0': {'login': 'alice', 'url': 'https://github.com/alice', 'followers': {'totalCount': 3}},
+            'u1': None,
+        }}
+        
+        with patch.object(client.session, 'request', return_value=self._response(200, body)) as request:
+            users = client.get_users(['alice', 'ghost'])
+        
+        self.assertEqual(request.call_count, 1)
+        self.assertEqual(users['alice']['followers'], 3)
+        self.assertEqual(users['alice']['html_url'], 'https://github.com/alice')
+        self.assertIsNone(users['ghost'])
+
+
+class TestHTTPCache(unittest.TestCase):
+    """Tests pour le cache HTTP conditionnel"""
+    
+    def setUp(self):
+        import tempfile
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.session = CachedSession(cache=HTTPCache(Path(self.tmpdir.name) / 'http.db'))
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    @staticmethod
+    def _response(status, body=b'', headers=None):
+        import requests
+        from requests.structures import CaseInsensitiveDict
+        resp = requests.Response()
+        resp.status_code = status
+        resp._content = body
+        resp.headers = CaseInsensitiveDict(headers or {})
+        return resp
+    
+    def test_revalidation_304_served_from_disk(self):
+        """Test ETag envoyé puis 304 servi depuis le disque"""
+        import requests
+        first = self._response(200, b'{"a": 1}', {'ETag': '"v1"'})
+        second = self._response(304, b'', {'ETag': '"v1"'})
+        
+        with patch.object(requests.Session, 'request', side_effect=[first, second]) as request:
+            self.session.get('https://api.test/x')
+            resp = self.session.get('https://api.test/x')
+        
+        self.assertEqual(request.call_args.kwargs['headers'], {'If-None-Match': '"v1"'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.cache_status, 'revalidated')
+        self.assertEqual(resp.json(), {'a': 1})
+    
+    def test_fresh_hit_and_no_store(self):
+        """Test max-age servi sans réseau, no-store jamais stocké"""
+        import requests
+        fresh = self._response(200, b'ok', {'Cache-Control': 'max-age=60'})
+        with patch.object(requests.Session, 'request', return_value=fresh) as request:
+            self.session.get('https://api.test/fresh')
+            resp = self.session.get('https://api.test/fresh')
+        self.assertEqual(request.call_count, 1)
+        self.assertEqual(resp.cache_status, 'hit')
+        
+        private = self._response(200, b'secret', {'Cache-Control': 'no-store', 'ETag': '"x"'})
+        with patch.object(requests.Session, 'request', return_value=private) as request:
+            self.session.get('https://api.test/private')
+            self.session.get('https://api.test/private')
+        self.assertEqual(request.call_count, 2)
+    
+    def test_api_keys_and_vary_respected(self):
+        """Test réponses séparées par clé d'API, Vary comparé à la requête"""
+        import requests
+        fresh = self._response(200, b'ok', {'Cache-Control': 'max-age=60'})
+        with patch.object(requests.Session, 'request', return_value=fresh) as request:
+            self.session.get('https://api.test/k', headers={'hibp-api-key': 'one'})
+            self.session.get('https://api.test/k', headers={'hibp-api-key': 'two'})
+            self.session.get('https://api.test/k', headers={'X-API-Key': 'three'})
+            hit = self.session.get('https://api.test/k', headers={'hibp-api-key': 'one'})
+        self.assertEqual(request.call_count, 3)
+        self.assertEqual(hit.cache_status, 'hit')
+        
+        varying = self._response(200, b'ok', {'Cache-Control': 'max-age=60', 'Vary': 'User-Agent'})
+        with patch.object(requests.Session, 'request', return_value=varying) as request:
+            self.session.get('https://api.test/v', headers={'User-Agent': 'a'})
+            hit = self.session.get('https://api.test/v', headers={'User-Agent': 'a'})
+            self.session.get('https://api.test/v', headers={'User-Agent': 'b'})
+        self.assertEqual(request.call_count, 2)
+        self.assertEqual(hit.cache_status, 'hit')
+        self.assertNotIn('X-Raven-Vary-Values', hit.headers)
+        
+        wildcard = self._response(200, b'ok', {'Cache-Control': 'max-age=60', 'Vary': '*'})
+        with patch.object(requests.Session, 'request', return_value=wildcard) as request:
+            self.session.get('https://api.test/w')
+            self.session.get('https://api.test/w')
+        self.assertEqual(request.call_count, 2)
+    
+    def test_github_vary_revalidated(self):
+        """Test Vary de l'API GitHub : ETag renvoyé et 304 servi depuis le disque"""
+        import requests
+        vary = 'Accept, Authorization, Cookie, X-GitHub-OTP, Accept-Encoding, Accept, X-Requested-With'
+        first = self._response(200, b'{"login": "octocat"}', {'ETag': '"gh1"', 'Vary': vary,
+                                                              'Cache-Control': 'private, max-age=0'})
+        second = self._response(304, b'', {'ETag': '"gh1"', 'X-RateLimit-Remaining': '59'})
+        headers = {'Accept': 'application/vnd.github+json'}
+        
+        with patch.object(requests.Session, 'request', side_effect=[first, second]) as request:
+            self.session.get('https://api.github.com/users/octocat', headers=headers)
+            resp = self.session.get('https://api.github.com/users/octocat', headers=headers)
+        
+        self.assertEqual(request.call_args.kwargs['headers']['If-None-Match'], '"gh1"')
+        self.assertEqual(resp.cache_status, 'revalidated')
+        self.assertEqual(resp.json(), {'login': 'octocat'})
+    
+    def test_freshness_deadline(self):
+        """Test calcul de fraîcheur Cache-Control / Age"""
+        self.assertEqual(freshness_deadline({'Cache-Control': 'max-age=60', 'Age': '10'}, now=1000), 1050)
+        self.assertEqual(freshness_deadline({'Cache-Control': 'no-cache, max-age=60'}, now=1000), 0)
+        self.assertEqual(freshness_deadline({}, now=1000), 0)
+
+
+class TestEmailSocialProfiles(unittest.TestCase):
+    """Tests pour les vérifications sociales parallèles"""
+    
+    def test_checks_run_concurrently_with_deadline(self):
+        """Test vérifications parallèles et délai par vérification"""
+        import time
+        
+        lookup = EmailLookup()
+        lookup.social_check_timeout = 0.3
+        
+        def slow(email):
+            time.sleep(1)
+            return {'platform': 'gravatar', 'found': True}
+        
+        def fast(platform):
+            def check(email):
+                time.sleep(0.1)
+                return {'platform': platform, 'found': True}
+            return check
+        
+        with patch.object(lookup, '_check_gravatar', side_effect=slow), \
+             patch.object(lookup, '_check_github_email', side_effect=fast('github')), \
+             patch.object(lookup, '_check_keybase', side_effect=fast('keybase')), \
+             patch('modules.kali_tools.kali_tools.tools_available', {}):
+            start = time.monotonic()
+            profiles = lookup.search_social_profiles('john@example.com')
+            elapsed = time.monotonic() - start
+        
+        by_platform = {p['platform']: p for p in profiles}
+        self.assertLess(elapsed, 0.8)
+        self.assertTrue(by_platform['github']['found'])
+        self.assertTrue(by_platform['keybase']['found'])
+        self.assertEqual(by_platform['gravatar']['status'], 'timeout')
+
+
+class TestDNSResolver(unittest.TestCase):
+    """Tests pour le résolveur DNS asynchrone"""
+    
+    def test_parallel_and_ttl_cache(self):
+        """Test requêtes parallèles puis servies depuis le cache"""
+        import asyncio
+        import time
+        import dns.resolver
+        
+        calls = []
+        
+        async def fake_resolve(name, rdtype):
+            calls.append((name, rdtype))
+            await asyncio.sleep(0.2)
+            if name.startswith('_dmarc'):
+                raise dns.resolver.NXDOMAIN()
+            answer = MagicMock()
+            answer.__iter__.return_value = iter([f"{rdtype}-record"])
+            answer.expiration = time.time() + 60
+            return answer
+        
+        resolver = DNSResolver()
+        resolver.resolver.resolve = fake_resolve
+        queries = [('example.com', t) for t in ('MX', 'TXT', 'A', 'AAAA', 'NS')] + [('_dmarc.example.com', 'TXT')]
+        
+        start = time.monotonic()
+        results = resolver.resolve_many(queries)
+        self.assertLess(time.monotonic() - start, 0.6)
+        self.assertEqual(results[('example.com', 'MX')]['records'], ['MX-record'])
+        self.assertEqual(results[('_dmarc.example.com', 'TXT')]['status'], 'NXDOMAIN')
+        
+        resolver.resolve_many(queries)
+        self.assertEqual(len(calls), 6)
+    
+    def test_resolve_many_inside_event_loop(self):
+        """Test appel bloquant depuis une boucle active : erreur explicite"""
+        import asyncio
+        
+        async def call():
+            with self.assertRaisesRegex(RuntimeError, 'resolve_many_async'):
+                DNSResolver().resolve_many([('example.com', 'A')])
+        
+        asyncio.run(call())
+    
+    def test_dead_domain_skips_expensive_sources(self):
+        """Test domaine sans courrier : HIBP, WHOIS et holehe ignorés"""
+        answers = {
+            ('dead.example.com', 'MX'): {'records': [], 'status': 'NXDOMAIN'},
+            ('live.example.com', 'MX'): {'records': [MagicMock(exchange='mx.live.example.com.')], 'status': 'NOERROR'},
+        }
+        resolver = MagicMock()
+        resolver.resolve.side_effect = lambda name, rdtype: answers[(name, rdtype)]
+        
+        engine = SearchEngine()
+        engine.cache.get_email = MagicMock(return_value=None)
+        engine.cache.save_email = MagicMock()
+        lookup = engine.email_lookup
+        
+        with patch('modules.email_lookup.get_resolver', return_value=resolver), \
+             patch.object(lookup, 'check_reputation', return_value={}), \
+             patch.object(lookup, 'check_dns', return_value={}), \
+             patch.object(lookup, 'search_social_profiles', return_value=[]) as social, \
+             patch.object(lookup, 'breach_report', return_value={'breaches': [], 'providers': {}}) as breaches, \
+             patch.object(lookup, 'prefetch_registrations', return_value={}) as registrations, \
+             patch.object(lookup, 'verify_domain_registration', return_value={}) as whois:
+            results = engine.search_email_batch(['a@dead.example.com', 'b@live.example.com'])
+        
+        self.assertEqual([r['domain_status']['status'] for r in results], ['dead', 'valid'])
+        self.assertEqual(results[0]['skipped_sources'], ['breaches', 'domain', 'holehe'])
+        breaches.assert_called_once_with('b@live.example.com')
+        whois.assert_called_once_with('b@live.example.com')
+        self.assertEqual(list(registrations.call_args.args[0]), ['live.example.com'])
+        self.assertEqual([c.args[2] for c in social.call_args_list].count(False), 1)
+        # Résultat partiel du domaine mort : jamais mis en cache
+        self.assertEqual([c.args[0] for c in engine.cache.save_email.call_args_list], ['b@live.example.com'])
+
+class TestMailSecurity(unittest.TestCase):
+    """Tests pour l'analyse SPF/DMARC"""
+    
+    def _analyzer(self, txt):
+        from modules.mail_security import MailSecurityAnalyzer
+        analyzer = MailSecurityAnalyzer()
+        analyzer.resolver = MagicMock()
+        analyzer.resolver.records.side_effect = lambda name, rdtype: txt.get(name, [])
+        return analyzer
+    
+    def test_spf_tree_memoized_across_domains(self):
+        """Test include partagé résolu une seule fois et comptage des requêtes"""
+        txt = {
+            'a.example': ['v=spf1 include:_spf.shared.example mx -all'],
+            'b.example': ['v=spf1 include:_spf.shared.example ~all'],
+            '_spf.shared.example': ['v=spf1 include:_netblocks.shared.example ip4:10.0.0.0/8 ~all'],
+            '_netblocks.shared.example': ['v=spf1 ip4:192.0.2.0/24 ip6:2001:db8::/32 ~all'],
+        }
+        analyzer = self._analyzer(txt)
+        
+        spf_a = analyzer.analyze_spf('a.example')
+        spf_b = analyzer.analyze_spf('b.example')
+        
+        self.assertEqual(spf_a['dns_lookups'], 3)
+        self.assertEqual(spf_a['all_policy'], 'fail')
+        self.assertEqual(spf_b['all_policy'], 'softfail')
+        self.assertEqual((spf_a['ip4_count'], spf_a['ip6_count']), (2, 1))
+        queried = [c.args[0] for c in analyzer.resolver.records.call_args_list]
+        self.assertEqual(queried.count('_spf.shared.example'), 1)
+    
+    def test_spf_lookup_limit_and_dmarc_tags(self):
+        """Test dépassement de la limite de 10 requêtes et tags DMARC"""
+        includes = ' '.join(f'include:s{i}.example' for i in range(11))
+        txt = {'big.example': [f'v=spf1 {includes} -all'],
+               '_dmarc.big.example': ['v=DMARC1; p=reject; pct=50; rua=mailto:d@big.example']}
+        txt.update({f's{i}.example': ['v=spf1 -all'] for i in range(11)})
+        analyzer = self._analyzer(txt)
+        
+        self.assertTrue(analyzer.analyze_spf('big.example')['exceeds_lookup_limit'])
+        dmarc = analyzer.analyze_dmarc('big.example')
+        self.assertEqual((dmarc['policy'], dmarc['pct']), ('reject', 50))
+        self.assertEqual(dmarc['rua'], ['mailto:d@big.example'])
+        self.assertTrue(dmarc['enforced'])
+    
+    def test_spf_expansion_stops_at_lookup_limit(self):
+        """Test chaîne d'include sans fin : expansion arrêtée après 10 requêtes"""
+        from modules.mail_security import SPF_LOOKUP_LIMIT
+        txt = {f'l{i}.example': [f'v=spf1 include:l{i + 1}.example a mx -all'] for i in range(200)}
+        analyzer = self._analyzer(txt)
+        
+        spf = analyzer.analyze_spf('l0.example')
+        self.assertTrue(spf['exceeds_lookup_limit'])
+        self.assertTrue(any('permerror' in e for e in spf['errors']))
+        self.assertLessEqual(analyzer.resolver.records.call_count, SPF_LOOKUP_LIMIT + 1)
+        # Arbre tronqué non mémoïsé : le sous-arbre reste évaluable seul
+        self.assertNotIn('l0.example', analyzer._spf_trees)
+
+class TestRegistrationClient(unittest.TestCase):
+    """Tests pour le client RDAP/WHOIS"""
+    
+    def setUp(self):
+        import tempfile
+        from sources.registration import RegistrationClient
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.client = RegistrationClient(cache_dir=self.tmpdir.name, whois_interval=0, rdap_interval=0)
+        self.client.db = MagicMock()
+        self.client.db.get_domain.return_value = None
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_rdap_bootstrap_and_parsing(self):
+        """Test bootstrap IANA mis en cache et normalisation RDAP"""
+        bootstrap = {'services': [[['com', 'net'], ['https://rdap.example.com/']]]}
+        rdap = {
+            'status': ['client transfer prohibited'],
+            'events': [{'eventAction': 'registration', 'eventDate': '1997-09-15T04:00:00Z'}],
+            'nameservers': [{'ldhName': 'NS1.EXAMPLE.COM'}],
+            'entities': [{'roles': ['registrar'], 'vcardArray': ['vcard', [['fn', {}, 'text', 'Example Registrar']]]}],
+        }
+        
+        def fake_get(url, **kwargs):
+            resp = MagicMock(status_code=200)
+            resp.json.return_value = bootstrap if url.endswith('dns.json') else rdap
+            return resp
+        
+        with patch.object(self.client.session, 'get', side_effect=fake_get) as get:
+            result = self.client.lookup('Example.com')
+            self.client._rdap_servers = None
+            self.client.rdap_server('other.net')
+        
+        self.assertEqual(result['source'], 'rdap')
+        self.assertEqual(result['registrar'], 'Example Registrar')
+        self.assertEqual(result['creation_date'], '1997-09-15T04:00:00Z')
+        self.assertEqual(result['name_servers'], ['ns1.example.com'])
+        # Le bootstrap est relu depuis le disque, pas retéléchargé
+        self.assertEqual([c.args[0].endswith('dns.json') for c in get.call_args_list].count(True), 1)
+        self.client.db.save_domain.assert_called_once()
+    
+    def test_whois_referral_cached_per_tld(self):
+        """Test référence IANA mise en cache par TLD et repli WHOIS"""
+        answers = {
+            'whois.iana.org': 'refer:        whois.nic.example\n',
+            'whois.nic.example': 'Domain Name: A.EXAMPLE\nRegistrar: Reg Inc\n'
+                                 'Creation Date: 2001-01-01\nName Server: NS1.A.EXAMPLE\n',
+        }
+        self.client._rdap_servers = {}
+        with patch.object(self.client, '_whois_query', side_effect=lambda server, q: answers[server]) as query:
+            first = self.client.lookup('a.example')
+            self.client.lookup('b.example')
+        
+        self.assertEqual(first['source'], 'whois')
+        self.assertTrue(first['registered'])
+        self.assertEqual(first['registrar'], 'Reg Inc')
+        self.assertEqual(first['name_servers'], ['ns1.a.example'])
+        servers = [c.args[0] for c in query.call_args_list]
+        self.assertEqual(servers.count('whois.iana.org'), 1)
+        self.assertTrue(self.client.referrals_file.exists())
+    
+    def test_missing_whois_referral_expires(self):
+        """Test TLD sans référence : non persisté, réessayé après expiration"""
+        import json
+        with patch.object(self.client, '_whois_query', return_value='% no referral\n') as query:
+            self.assertIsNone(self.client.whois_server('zz'))
+            self.assertIsNone(self.client.whois_server('zz'))
+            self.assertEqual(query.call_count, 1)
+            self.client._missing_servers['zz'] = 0
+            self.client.whois_server('zz')
+            self.assertEqual(query.call_count, 2)
+        
+        self.client.referrals_file.write_text(json.dumps({'zz': None, 'example': 'whois.nic.example'}))
+        from sources.registration import RegistrationClient
+        reloaded = RegistrationClient(cache_dir=self.tmpdir.name)
+        self.assertEqual(reloaded._whois_servers, {'example': 'whois.nic.example'})
+
+class TestBreachCatalog(unittest.TestCase):
+    """Tests pour le catalogue local des fuites"""
+    
+    BREACHES = [
+        {'Name': 'Adobe', 'Title': 'Adobe', 'Domain': 'adobe.com', 'BreachDate': '2013-10-04',
+         'ModifiedDate': '2022-05-15T23:52:49Z', 'PwnCount': 152445165,
+         'DataClasses': ['Email addresses', 'Passwords'], 'IsSensitive': False},
+        {'Name': 'Ashley', 'Title': 'Ashley Madison', 'Domain': 'ashleymadison.com', 'BreachDate': '2015-07-19',
+         'ModifiedDate': '2017-12-10T21:44:27Z', 'PwnCount': 30811934,
+         'DataClasses': ['Email addresses', 'Sexual preferences'], 'IsSensitive': True},
+    ]
+    
+    def setUp(self):
+        import tempfile
+        from storage.breach_catalog import BreachCatalog
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.catalog = BreachCatalog(Path(self.tmpdir.name) / 'catalog.db')
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_incremental_upsert_and_indexes(self):
+        """Test mise à jour incrémentale et recherche par domaine / type de donnée"""
+        self.assertEqual(self.catalog.upsert_breaches(self.BREACHES)['added'], 2)
+        
+        modified = dict(self.BREACHES[0], ModifiedDate='2024-01-01T00:00:00Z', PwnCount=1)
+        stats = self.catalog.upsert_breaches([modified, self.BREACHES[1]])
+        self.assertEqual((stats['updated'], stats['unchanged']), (1, 1))
+        
+        self.assertEqual(self.catalog.get('adobe')['pwn_count'], 1)
+        self.assertEqual([b['name'] for b in self.catalog.by_domain('ADOBE.com')], ['Adobe'])
+        self.assertEqual([b['name'] for b in self.catalog.by_data_class('passwords')], ['Adobe'])
+        self.assertTrue(self.catalog.get('Ashley')['is_sensitive'])
+    
+    def test_email_results_enriched_from_catalog(self):
+        """Test résultats HIBP par email réduits aux noms puis enrichis localement"""
+        from modules.breaches import BreachChecker
+        self.catalog.upsert_breaches(self.BREACHES)
+        checker = BreachChecker(providers=['hibp'])
+        
+        resp = MagicMock(status_code=200)
+        resp.json.return_value = [{'Name': 'Ashley'}]
+        with patch('modules.breaches.get_breach_catalog', return_value=self.catalog), \
+             patch.object(checker.session, 'get', return_value=resp) as get:
+            first = checker.check_breaches('user@example.com')
+            second = checker.aggregate('user@example.com')
+        
+        self.assertEqual(first[0]['title'], 'Ashley Madison')
+        self.assertEqual(first[0]['severity'], 'CRITICAL')
+        self.assertEqual(self.catalog.get_email_breaches('user@example.com'), ['Ashley'])
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(second['providers']['hibp']['status'], 'cached')
+        self.assertEqual(second['breaches'][0]['data_classes'], first[0]['data_classes'])
+    
+    def test_forced_sync_rate_limited(self):
+        """Test resynchronisation forcée limitée à une par intervalle"""
+        resp = MagicMock(status_code=200)
+        resp.json.return_value = self.BREACHES
+        session = MagicMock()
+        session.get.return_value = resp
+        
+        self.assertEqual(self.catalog.sync(session, force=True)['added'], 2)
+        self.assertEqual(self.catalog.sync(session, force=True).get('skipped'), 1)
+        self.assertEqual(session.get.call_count, 1)
+
+class TestHashListIndex(unittest.TestCase):
+    """Tests pour la recherche mmap dans une liste de hachages triée"""
+    
+    def test_lookup_many_with_and_without_prefix_index(self):
+        """Test recherche groupée, comptes et index des préfixes réutilisé"""
+        import tempfile
+        from modules.breaches import HashListIndex, hash_password
+        
+        hashes = sorted(hash_password(f"password{i}") for i in range(2000))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / 'pwned.txt'
+            path.write_bytes(b''.join(f"{h}:{i + 1}\r\n".encode() for i, h in enumerate(hashes)))
+            queries = [hashes[0], hashes[1234].lower(), hashes[1234], hashes[-1], hash_password('absent-password')]
+            
+            with HashListIndex(path, build_index=False) as plain, HashListIndex(path, index_prefix=2) as indexed:
+                for index in (plain, indexed):
+                    results = index.lookup_many(queries)
+                    self.assertEqual(results[hashes[0]], 1)
+                    self.assertEqual(results[hashes[1234].lower()], 1235)
+                    self.assertEqual(results[hashes[1234]], 1235)
+                    self.assertEqual(results[hashes[-1]], 2000)
+                    self.assertIsNone(results[hash_password('absent-password')])
+                    # Requête non hexadécimale : absente, sans interrompre le lot
+                    self.assertIsNone(index.lookup('Z' * 40))
+                    self.assertIsNone(index.lookup('ZZZZ' + hashes[0][4:]))
+            
+            self.assertTrue((Path(tmpdir) / 'pwned.txt.idx').exists())
+            with HashListIndex(path, index_prefix=2) as reloaded:
+                self.assertEqual(reloaded.lookup(hashes[500]), 501)
+
+class TestBreachAggregator(unittest.TestCase):
+    """Tests pour l'agrégation concurrente des fournisseurs de fuites"""
+    
+    def test_providers_concurrent_and_deduplicated(self):
+        """Test fournisseurs en parallèle, fusion par nom et statut par fournisseur"""
+        import time
+        from modules.breaches import BreachChecker, breach_entry
+        checker = BreachChecker()
+        
+        def slow(provider, entries, status='ok'):
+            def run(email, api_key):
+                time.sleep(0.3)
+                return status, entries
+            return run
+        
+        checker._check_hibp = slow('hibp', [breach_entry('hibp', 'Adobe', date='2013-10-04',
+                                                          data_classes=['Passwords'])])
+        checker._check_leakcheck = slow('leakcheck', [breach_entry('leakcheck', 'adobe', data_classes=['Usernames']),
+                                                      breach_entry('leakcheck', 'Canva')])
+        checker._check_breachdirectory = slow('breachdirectory', [], 'rate_limited')
+        
+        start = time.monotonic()
+        report = checker.aggregate('user@example.com')
+        
+        self.assertLess(time.monotonic() - start, 0.8)
+        names = [b['breach_name'] for b in report['breaches']]
+        self.assertEqual(names, ['Adobe', 'Canva'])
+        adobe = report['breaches'][0]
+        self.assertEqual(adobe['sources'], ['Have I Been Pwned', 'LeakCheck'])
+        self.assertEqual(adobe['data_classes'], ['Passwords', 'Usernames'])
+        self.assertEqual(report['providers']['breachdirectory']['status'], 'rate_limited')
+        self.assertGreaterEqual(report['providers']['hibp']['latency_ms'], 300)
+    
+    def test_string_data_classes_normalized(self):
+        """Test types de données en chaîne convertis en liste avant fusion"""
+        from modules.breaches import BreachChecker, breach_entry
+        found = {}
+        BreachChecker._merge(found, breach_entry('hibp', 'Adobe', data_classes=['Passwords']))
+        BreachChecker._merge(found, breach_entry('breachdirectory', 'Adobe', data_classes='Email, Passwords'))
+        self.assertEqual(found['adobe']['data_classes'], ['Passwords', 'Email'])
+
+class TestDumpScanner(unittest.TestCase):
+    """Tests pour le scan multi-motifs des dumps locaux"""
+    
+    def test_single_pass_finds_all_targets_across_segments(self):
+        """Test cibles multiples, bornes de mots, téléphones et segments"""
+        import tempfile
+        from modules.dump_scanner import DumpScanner
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dump = Path(tmpdir) / 'combo.txt'
+            dump.write_bytes(
+                b'x' * 50 + b'\nJohn.Doe@Example.com:hunter2\n'
+                b'alice;0612345678;Paris\n'
+                b'malice_42 should not match\n'
+                b'user alice posted\n'
+                b'bob,+33612345678\n'
+            )
+            scanner = DumpScanner(['john.doe@example.com', 'alice', '+33 6 12 34 56 78'],
+                                  workers=1, segment_size=64)
+            results = scanner.scan([tmpdir])
+        
+        hits = results['hits']
+        self.assertEqual(len(hits['john.doe@example.com']), 1)
+        self.assertEqual(hits['john.doe@example.com'][0]['context'], 'John.Doe@Example.com:hunter2')
+        self.assertEqual(len(hits['alice']), 2)
+        self.assertEqual([h['matched'] for h in hits['+33612345678']], ['0612345678', '+33612345678'])
+        self.assertEqual(results['targets']['+33612345678']['type'], 'phone')
+        self.assertEqual(results['files_scanned'], 1)
+
+class TestIdentifierExtractor(unittest.TestCase):
+    """Tests pour l'extraction d'identifiants en un passage"""
+    
+    def test_single_pass_extraction(self):
+        """Test classement des identifiants, validation des téléphones et dédoublonnage"""
+        from utils.extractor import extract_identifiers
+        text = ("Contact <John.Doe@Example.com> or john.doe@example.com, see https://www.site.org/p?id=1. "
+                "Server 192.168.1.10:80 on mail.example.com. Follow @alice_dev. Call +33 6 12 34 56 78, "
+                "date 2024-01-01, file index.html")
+        found = extract_identifiers(text)
+        
+        self.assertEqual(found['emails'], ['john.doe@example.com'])
+        self.assertEqual(found['urls'], ['https://www.site.org/p?id=1'])
+        self.assertEqual(found['ips'], ['192.168.1.10'])
+        self.assertEqual(found['handles'], ['alice_dev'])
+        self.assertEqual(found['phones'], ['+33612345678'])
+        self.assertIn('mail.example.com', found['domains'])
+        self.assertNotIn('index.html', found['domains'])
+    
+    def test_candidate_pattern_portable(self):
+        """Test motif sans quantificateurs possessifs (Python < 3.11)"""
+        from utils.extractor import CANDIDATE_PATTERN
+        self.assertNotRegex(CANDIDATE_PATTERN.pattern, r'[*+?}]\+')
+        self.assertEqual(CANDIDATE_PATTERN.findall("a " + "x" * 5000 + " b.c"), ['b.c'])
+    
+    def test_stream_chunks_do_not_split_identifiers(self):
+        """Test flux découpé au milieu d'un identifiant"""
+        from utils.extractor import extract_from_stream
+        text = "first line\nuser: someone@example.org\nhost api.example.org\n" * 3
+        chunks = [text[i:i + 7] for i in range(0, len(text), 7)]
+        
+        found = list(extract_from_stream(chunks, kinds=('emails', 'domains')))
+        
+        self.assertEqual(found, [('emails', 'someone@example.org'), ('domains', 'example.org'),
+                                 ('domains', 'api.example.org')])
+
+class TestPhoneContext(unittest.TestCase):
+    """Tests pour le contexte de numéro partagé"""
+    
+    def test_search_phone_parses_once(self):
+        """Test un seul parse par recherche et sources locales hors executor"""
+        import phonenumbers
+        engine = SearchEngine()
+        lookup = engine.phone_lookup
+        engine.cache = MagicMock()
+        engine.cache.get_phone.return_value = None
+        
+        with patch('phonenumbers.parse', wraps=phonenumbers.parse) as parse, \
+             patch.object(lookup, 'check_reputation', return_value={}), \
+             patch.object(lookup, 'search_data_brokers', return_value=[]), \
+             patch.object(lookup, 'check_spam_reports', return_value={}), \
+             patch.object(engine.executor, 'submit', wraps=engine.executor.submit) as submit:
+            results = engine.search_phone('+33 6 12 34 56 78')
+        
+        self.assertEqual(parse.call_count, 1)
+        self.assertEqual(results['carrier_info']['country'], 'FR')
+        self.assertTrue(results['carrier_info']['valid'])
+        self.assertEqual(results['timezone'], ['Europe/Paris'])
+        self.assertFalse(results['voip_info']['is_voip'])
+        # Seules les 4 sources réseau passent par l'executor
+        self.assertEqual(submit.call_count, 4)
+
+class TestPhoneEnrich(unittest.TestCase):
+    """Tests de l'enrichissement en masse"""
+
+    def test_enrich_chunks_and_prefix_memo(self):
+        """Sortie en colonnes, ordre conservé, métadonnées mémoïsées par préfixe"""
+        from modules import phone_enrich
+        phone_enrich._prefix_memo.clear()
+        enricher = phone_enrich.PhoneEnricher(region='FR', workers=1, chunk_size=2)
+        numbers = ['06 12 34 56 78', '+33612345679', 'abc']
+
+        with patch.object(phone_enrich.carrier, 'name_for_number', return_value='SFR') as name_for_number:
+            chunks = list(enricher.enrich(numbers))
+
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(chunks[0]['e164'], ['+33612345678', '+33612345679'])
+        self.assertEqual(chunks[0]['carrier'], ['SFR', 'SFR'])
+        self.assertEqual(chunks[1]['valid'], [False])
+        self.assertEqual(name_for_number.call_count, 1)
+
+class TestPrefixClassifier(unittest.TestCase):
+    """Tests du trie de préfixes opérateur / VoIP"""
+
+    def test_longest_prefix_and_roundtrip(self):
+        """Plus long préfixe, plages utilisateur prioritaires, rechargement depuis le disque"""
+        import tempfile
+        from modules.phone_prefixes import PrefixClassifier, load_classifier
+
+        with tempfile.TemporaryDirectory() as tmp:
+            ranges = Path(tmp) / 'ranges.csv'
+            ranges.write_text('# plages\n+339,voip,Box\n+33612,mvno,MVNO Test\n', encoding='utf-8')
+            cache_path = Path(tmp) / 'prefixes.bin'
+            classifier = load_classifier(str(ranges), cache_path)
+
+            self.assertEqual(classifier.lookup('+33912345678')['category'], 'voip')
+            self.assertEqual(classifier.lookup('+33612345678')['name'], 'MVNO Test')
+            self.assertEqual(classifier.lookup('+33652345678')['category'], 'mobile')
+            self.assertIsNone(classifier.lookup('+999'))
+
+            with patch.object(PrefixClassifier, 'build') as build:
+                reloaded = load_classifier(str(ranges), cache_path)
+            build.assert_not_called()
+            self.assertEqual(reloaded.lookup_many(['+33912345678', '+999']),
+                             classifier.lookup_many(['+33912345678', '+999']))
+
+class TestBrokerFanOut(unittest.TestCase):
+    """Tests du sondage concurrent des agrégateurs"""
+
+    def test_brokers_concurrent_ordered_with_deadline(self):
+        """Requêtes en parallèle, ordre stable, plateformes lentes marquées timeout"""
+        import time
+        from modules.phone_lookup import PhoneLookup
+
+        def head(url, **kwargs):
+            time.sleep(2 if 'truecaller' in url else 0.2)
+            return MagicMock(status_code=200)
+
+        lookup = PhoneLookup()
+        with patch('modules.phone_lookup.requests.head', side_effect=head):
+            start = time.monotonic()
+            brokers = lookup.search_data_brokers('+33612345678', deadline=0.6)
+            elapsed = time.monotonic() - start
+
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual([b['platform'] for b in brokers],
+                         ['whitepages', 'spokeo', 'truecaller', 'peoplefinder'])
+        self.assertEqual(brokers[2]['status'], 'timeout')
+        self.assertTrue(brokers[3]['reachable'])
+
+class TestColdStart(unittest.TestCase):
+    """Tests du démarrage à froid et de la découverte d'outils"""
+
+    def test_cli_import_is_lazy(self):
+        """Importer la CLI ne charge ni le moteur, ni phonenumbers, ni fake_useragent"""
+        import subprocess
+        root = Path(__file__).parent.parent
+        heavy = ['core.engine', 'phonenumbers', 'fake_useragent', 'modules.kali_tools', 'requests']
+        code = ("import sys, time; start = time.perf_counter(); import main; "
+                "print(time.perf_counter() - start); "
+                f"print([m for m in {heavy!r} if m in sys.modules])")
+        timings = []
+        for _ in range(3):
+            out = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True,
+                                 text=True, check=True).stdout.splitlines()
+            self.assertEqual(out[-1], '[]')
+            timings.append(float(out[-2]))
+        # Budget de démarrage : meilleur de trois essais, large pour les machines chargées
+        self.assertLess(min(timings), 1.0)
+
+    def test_tool_locator_cached_on_disk(self):
+        """shutil.which appelé une seule fois entre deux instances"""
+        import tempfile
+        from core.tools import ToolLocator
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_path = Path(tmp) / 'tools.json'
+            with patch('core.tools.shutil.which', return_value=None) as which:
+                self.assertIsNone(ToolLocator(cache_path).which('theHarvester'))
+                self.assertIsNone(ToolLocator(cache_path).which('theHarvester'))
+            self.assertEqual(which.call_count, 1)
+
+class TestHarvesterStreaming(unittest.TestCase):
+    """Tests des backends theHarvester concurrents"""
+
+    def test_backends_concurrent_streamed_with_deadline(self):
+        """Backends en parallèle, hits signalés au fil de l'eau, backend lent interrompu"""
+        import os
+        import stat
+        import tempfile
+        import time
+        from modules.kali_tools import KaliToolsIntegration
+
+        script = (f"#!{sys.executable}\n"
+                  "import sys, time\n"
+                  "source = sys.argv[sys.argv.index('-b') + 1]\n"
+                  "print(f'{source}@example.com', flush=True)\n"
+                  "print(f'{source}.example.com', flush=True)\n"
+                  "time.sleep(5 if source == 'slow' else 0.3)\n"
+                  "print('shared.example.com 10.0.0.1', flush=True)\n")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tool = Path(tmp) / 'theHarvester'
+            tool.write_text(script)
+            tool.chmod(tool.stat().st_mode | stat.S_IEXEC)
+
+            kali = KaliToolsIntegration()
+            kali.tools_available = {'theharvester': True}
+            hits = []
+            with patch.dict(os.environ, {'PATH': f"{tmp}{os.pathsep}{os.environ.get('PATH', '')}"}):
+                start = time.monotonic()
+                results = kali.theharvester_search('example.com', sources=['bing', 'yahoo', 'slow'],
+                                                   timeout=1.5, on_hit=lambda k, v: hits.append(v))
+                elapsed = time.monotonic() - start
+
+        self.assertLess(elapsed, 3)
+        self.assertEqual(results['backends'], {'bing': 'ok', 'yahoo': 'ok', 'slow': 'timeout'})
+        self.assertEqual(sorted(results['emails']),
+                         ['bing@example.com', 'slow@example.com', 'yahoo@example.com'])
+        self.assertEqual(results['hosts'].count('shared.example.com'), 1)
+        self.assertEqual(results['ips'], ['10.0.0.1'])
+        self.assertIn('slow@example.com', hits)
+
+    def test_long_lines_skipped_and_exit_code_checked(self):
+        """Ligne trop longue ignorée sans perdre le reste, code de sortie non nul signalé"""
+        import os
+        import stat
+        import tempfile
+        from modules.kali_tools import KaliToolsIntegration
+
+        script = (f"#!{sys.executable}\n"
+                  "import sys\n"
+                  "source = sys.argv[sys.argv.index('-b') + 1]\n"
+                  "print('x' * 5000, flush=True)\n"
+                  "print(f'{source}@example.com', flush=True)\n"
+                  "sys.exit(2 if source == 'bad' else 0)\n")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tool = Path(tmp) / 'theHarvester'
+            tool.write_text(script)
+            tool.chmod(tool.stat().st_mode | stat.S_IEXEC)
+
+            kali = KaliToolsIntegration()
+            kali.tools_available = {'theharvester': True}
+            with patch.dict(os.environ, {'PATH': f"{tmp}{os.pathsep}{os.environ.get('PATH', '')}"}), \
+                 patch('modules.kali_tools.STREAM_LINE_LIMIT', 1024):
+                results = kali.theharvester_search('example.com', sources=['bing', 'bad'], timeout=10)
+
+        self.assertEqual(results['backends'], {'bing': 'ok', 'bad': 'partial'})
+        self.assertEqual(sorted(results['emails']), ['bad@example.com', 'bing@example.com'])
+
+class TestToolSupervisor(unittest.TestCase):
+    """Tests du superviseur d'outils externes"""
+
+    def test_cached_output_and_deadline_kill(self):
+        """Sortie analysée réutilisée, processus tué à l'échéance, concurrence bornée"""
+        import tempfile
+        import threading
+        import time
+        from core.supervisor import ToolSupervisor
+        from storage.database import CacheDB
+
+        with tempfile.TemporaryDirectory() as tmp:
+            supervisor = ToolSupervisor(max_concurrent=4, default_per_tool=1,
+                                        cache=CacheDB(Path(tmp) / 'cache.db'))
+            command = [sys.executable, '-c', 'print(6 * 7)']
+
+            first = supervisor.run(command, timeout=10, parser=lambda out: {'answer': int(out)})
+            second = supervisor.run(command, timeout=10, parser=lambda out: {'answer': int(out)})
+            self.assertEqual(first['output'], {'answer': 42})
+            self.assertFalse(first['cached'])
+            self.assertTrue(second['cached'])
+            self.assertEqual(second['output'], {'answer': 42})
+
+            # Un seul processus à la fois pour cet outil : le second attend puis expire
+            slow = [sys.executable, '-c', 'import time; time.sleep(5)']
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(
+                supervisor.run(slow, timeout=0.5, use_cache=False))) for _ in range(2)]
+            start = time.monotonic()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertLess(time.monotonic() - start, 2)
+            self.assertEqual([r['status'] for r in results], ['timeout', 'timeout'])
+            self.assertEqual(sum(r['returncode'] is None for r in results), 2)
+
+    def test_failed_run_not_cached(self):
+        """Code de sortie non nul : sortie analysée renvoyée (statut 'partial'), rien en cache"""
+        import tempfile
+        from core.supervisor import ToolSupervisor
+        from storage.database import CacheDB
+
+        with tempfile.TemporaryDirectory() as tmp:
+            supervisor = ToolSupervisor(cache=CacheDB(Path(tmp) / 'cache.db'))
+            command = [sys.executable, '-c', 'import sys; print("hit"); sys.exit(3)']
+            first = supervisor.run(command, timeout=10, parser=str.split)
+            second = supervisor.run(command, timeout=10, parser=str.split)
+            self.assertEqual((first['status'], first['returncode']), ('partial', 3))
+            self.assertEqual(first['output'], ['hit'])
+            self.assertFalse(second['cached'])
+
+    def test_stream_holds_slot_and_kills_group(self):
+        """Lecture en flux : place de l'outil tenue, groupe de processus tué à l'échéance"""
+        import asyncio
+        import tempfile
+        import time
+        from core.supervisor import ToolSupervisor
+        from modules.kali_tools import KaliToolsIntegration
+
+        with tempfile.TemporaryDirectory() as tmp:
+            pid_file = Path(tmp) / 'child.pid'
+            code = ("import subprocess, sys, time; "
+                    "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)']); "
+                    f"open({str(pid_file)!r}, 'a').write(str(child.pid) + ' '); "
+                    "print('started', flush=True); time.sleep(30)")
+            command = [sys.executable, '-c', code]
+            supervisor = ToolSupervisor(default_per_tool=1)
+
+            async def both():
+                loop = asyncio.get_running_loop()
+                deadline = loop.time() + 1.0
+                kali = KaliToolsIntegration()
+                return await asyncio.gather(kali._stream_command(command, lambda line: None, deadline),
+                                            kali._stream_command(command, lambda line: None, deadline))
+
+            start = time.monotonic()
+            with patch('modules.kali_tools.get_tool_supervisor', return_value=supervisor):
+                statuses = asyncio.run(both())
+            self.assertLess(time.monotonic() - start, 5)
+            self.assertEqual(sorted(statuses), ['timeout', 'timeout'])
+            # Un seul lancement : le second n'a jamais obtenu de place
+            children = pid_file.read_text().split()
+            self.assertEqual(len(children), 1)
+            time.sleep(0.2)
+            stat_file = Path(f'/proc/{children[0]}/stat')
+            alive = stat_file.exists() and stat_file.read_text().split(')')[-1].split()[0] != 'Z'
+            self.assertFalse(alive)
+
+class TestSherlockStreaming(unittest.TestCase):
+    """Tests de Sherlock lu au fil de l'eau et fusionné aux sondes natives"""
+
+    def test_streamed_results_merged_with_native(self):
+        """Lignes Sherlock transmises dès leur impression, sites natifs non dupliqués"""
+        import os
+        import stat
+        import tempfile
+        from modules.kali_tools import kali_tools
+        from modules.username_lookup import UsernameLookup
+
+        script = (f"#!{sys.executable}\n"
+                  "import sys, time\n"
+                  "time.sleep(0.3)\n"
+                  "print('[+] GitHub: https://github.com/' + sys.argv[1], flush=True)\n"
+                  "print('[+] Keybase: https://keybase.io/' + sys.argv[1], flush=True)\n"
+                  "print('[-] Pastebin: Not Found!', flush=True)\n"
+                  "print('[*] Search completed with 2 results', flush=True)\n")
+
+        def native(username, platform, url):
+            return {'platform': platform, 'username': username, 'found': platform == 'github',
+                    'url': url, 'status_code': 200 if platform == 'github' else 404, 'accessible': True}
+
+        lookup = UsernameLookup()
+        streamed = []
+        with tempfile.TemporaryDirectory() as tmp:
+            tool = Path(tmp) / 'sherlock'
+            tool.write_text(script)
+            tool.chmod(tool.stat().st_mode | stat.S_IEXEC)
+            with patch.dict(os.environ, {'PATH': f"{tmp}{os.pathsep}{os.environ.get('PATH', '')}"}), \
+                 patch.object(kali_tools, 'tools_available', {'sherlock': True}), \
+                 patch.object(lookup, 'check_platform', side_effect=native):
+                results = lookup.search_with_sherlock('alice', on_result=streamed.append)
+
+        platforms = [r['platform'] for r in results]
+        self.assertEqual(platforms.count('github') + platforms.count('GitHub'), 1)
+        self.assertIn('Keybase', platforms)
+        self.assertIn('Pastebin', platforms)
+        keybase = next(r for r in results if r['platform'] == 'Keybase')
+        self.assertTrue(keybase['found'])
+        self.assertEqual(keybase['source'], 'sherlock')
+        self.assertEqual(len(streamed), len(UsernameLookup.PLATFORMS) + 2)
+
+    def test_failed_native_probe_keeps_sherlock_answer(self):
+        """Sonde native en échec : ni masque ni remplace la réponse de Sherlock"""
+        from modules.kali_tools import kali_tools
+        from modules.username_lookup import UsernameLookup
+
+        def sherlock(username, on_result, covered, should_stop, timeout, sites):
+            for site in ('GitHub', 'GitLab'):
+                if not covered(site):
+                    on_result({'platform': site, 'username': username, 'found': True,
+                               'url': f'https://{site.lower()}.com/{username}', 'source': 'sherlock'})
+            return []
+
+        def native(username, platform, url):
+            ok = platform not in ('github', 'reddit')
+            return {'platform': platform, 'username': username, 'found': False, 'url': url,
+                    'status_code': 404 if ok else None, 'accessible': ok}
+
+        lookup = UsernameLookup()
+        with patch.object(kali_tools, 'sherlock_search', side_effect=sherlock), \
+             patch.object(lookup, 'check_platform', side_effect=native):
+            results = {r['platform']: r for r in lookup.search_with_sherlock('alice')}
+
+        self.assertEqual(results['GitHub']['source'], 'sherlock')
+        self.assertNotIn('github', results)
+        self.assertFalse(results['reddit']['accessible'])
+        self.assertNotIn('GitLab', results)
+        self.assertEqual(len(results), len(UsernameLookup.PLATFORMS))
+
+    def test_sherlock_stopped_once_remaining_sites_covered(self):
+        """Sherlock arrêté dès que les sites restants sont sondés nativement, évité s'il n'apporte rien"""
+        import time
+        from modules.kali_tools import kali_tools
+        from modules.username_lookup import UsernameLookup
+
+        stopped = []
+
+        def sherlock(username, on_result, covered, should_stop, timeout, sites):
+            on_result({'platform': 'Keybase', 'username': username, 'found': True,
+                       'url': f'https://keybase.io/{username}', 'source': 'sherlock'})
+            limit = time.monotonic() + 5
+            while not should_stop() and time.monotonic() < limit:
+                time.sleep(0.01)
+            stopped.append(time.monotonic() < limit)
+            return []
+
+        def native(username, platform, url):
+            return {'platform': platform, 'username': username, 'found': False, 'url': url,
+                    'status_code': 404, 'accessible': True}
+
+        lookup = UsernameLookup()
+        with patch.object(kali_tools, 'sherlock_search', side_effect=sherlock) as search, \
+             patch.object(lookup, 'check_platform', side_effect=native):
+            results = lookup.search_with_sherlock('alice', sites=['Keybase', 'GitHub', 'GitLab'])
+            self.assertEqual(stopped, [True])
+            self.assertIn('Keybase', [r['platform'] for r in results])
+
+            lookup.search_with_sherlock('alice', sites=['GitHub', 'GitLab'])
+            self.assertEqual(search.call_count, 1)
+
+class TestCTLogs(unittest.TestCase):
+    """Tests de l'ingestion Certificate Transparency en flux"""
+
+    def test_incremental_parse_suffix_match_and_resume(self):
+        """Tableau JSON découpé arbitrairement, suffixe strict, reprise après limite"""
+        import json
+        import tempfile
+        from sources.ct_logs import CTLogClient, iter_json_array
+
+        certs = [
+            {'id': 1, 'name_value': '*.a.example.com\nexample.com', 'issuer_name': 'CA'},
+            {'id': 2, 'name_value': 'notexample.com\nexample.com.evil.net', 'issuer_name': 'CA'},
+            {'id': 3, 'name_value': 'B.Example.com.\nuser@example.com', 'issuer_name': 'CA'},
+        ]
+        text = json.dumps(certs, indent=1)
+        chunks = [text[i:i + 7] for i in range(0, len(text), 7)]
+        self.assertEqual(list(iter_json_array(chunks)), certs)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            client = CTLogClient(cache_dir=tmp)
+            with patch.object(client, 'iter_entries', return_value=iter(certs)):
+                partial = client.subdomains('example.com', limit=1)
+            self.assertEqual([r['subdomain'] for r in partial], ['a.example.com', 'example.com'])
+
+            # Reprise : le certificat 1 déjà traité est sauté
+            with patch.object(client, 'iter_entries', return_value=iter(certs)):
+                names = [r['subdomain'] for r in client.subdomains('example.com')]
+            self.assertEqual(names, ['a.example.com', 'example.com', 'b.example.com'])
+
+            # Collecte complète : resservie depuis le cache sans réseau
+            with patch.object(client, 'iter_entries', side_effect=AssertionError):
+                self.assertEqual(len(client.subdomains('example.com')), 3)
+
+    def test_domains_downloaded_concurrently(self):
+        """Un téléchargement lent ne bloque pas la collecte d'un autre domaine"""
+        import tempfile
+        import threading
+        from sources.ct_logs import CTLogClient
+
+        release = threading.Event()
+
+        def entries(domain, exclude_expired=False):
+            if domain == 'slow.test':
+                release.wait(5)
+            yield {'id': 1, 'name_value': f'www.{domain}', 'issuer_name': 'CA'}
+
+        with tempfile.TemporaryDirectory() as tmp:
+            client = CTLogClient(cache_dir=tmp)
+            with patch.object(client, 'iter_entries', side_effect=entries):
+                slow = threading.Thread(target=client.subdomains, args=('slow.test',))
+                slow.start()
+                fast = client.subdomains('fast.test')
+                self.assertFalse(release.is_set())
+                release.set()
+                slow.join()
+            self.assertEqual([r['subdomain'] for r in fast], ['www.fast.test'])
+
+class TestWaybackCDX(unittest.TestCase):
+    """Tests du client CDX de la Wayback Machine"""
+
+    def _fake_index(self, total):
+        """Index CDX simulé : renvoie ce que le serveur renverrait pour les paramètres reçus"""
+        rows = [[f"http://example.com/p{i}", f"2020010100{i:04d}", 'text/html', '200'] for i in range(total)]
+        header = ['original', 'timestamp', 'mimetype', 'statuscode']
+        calls = []
+
+        def get(params):
+            calls.append(params)
+            query = dict(params)
+            if 'page' in query:
+                page = query['page']
+                return [header] + rows[page * 3:(page + 1) * 3]
+            start = int(query.get('resumeKey', 0))
+            end = start + query['limit']
+            data = [header] + rows[start:end]
+            if end < total:
+                data += [[], [str(end)]]
+            return data
+
+        return get, calls
+
+    def test_server_side_limit_and_resume(self):
+        """Limite transmise au serveur, pages suivies par clé de reprise"""
+        from sources.wayback import WaybackCDXClient
+
+        client = WaybackCDXClient(page_size=4)
+        get, calls = self._fake_index(10)
+        keys = []
+        with patch.object(client, '_get', side_effect=get):
+            captures = list(client.iter_captures('example.com/*', limit=6,
+                                                 filters=['statuscode:200', 'mimetype:text/html'],
+                                                 on_page=keys.append))
+        self.assertEqual([c['original'] for c in captures], [f"http://example.com/p{i}" for i in range(6)])
+        self.assertEqual([dict(p)['limit'] for p in calls], [4, 2])
+        self.assertEqual([v for k, v in calls[0] if k == 'filter'], ['statuscode:200', 'mimetype:text/html'])
+        self.assertEqual(keys, ['4', '6'])
+        self.assertTrue(captures[0]['archive_url'].startswith('https://web.archive.org/web/'))
+
+        # Reprise depuis la dernière clé : seul le reste de l'index est lu
+        with patch.object(client, '_get', side_effect=get):
+            rest = list(client.iter_captures('example.com/*', resume_key=keys[-1]))
+        self.assertEqual(len(rest), 4)
+
+    def test_parallel_pages_yield_in_order(self):
+        """Pages téléchargées en parallèle, produites dans l'ordre"""
+        from sources.wayback import WaybackCDXClient
+
+        client = WaybackCDXClient(max_workers=3)
+        get, _ = self._fake_index(10)
+        with patch.object(client, '_get', side_effect=get):
+            captures = list(client.iter_pages('example.com/*', pages=range(4)))
+        self.assertEqual([c['original'] for c in captures], [f"http://example.com/p{i}" for i in range(10)])
+
+class TestPortScanner(unittest.TestCase):
+    """Tests du scanner TCP asynchrone"""
+
+    def test_port_lists(self):
+        """Top-N sans doublons, plages et listes"""
+        from modules.port_scanner import TOP_PORTS, parse_ports, top_ports
+
+        self.assertEqual(top_ports(5), TOP_PORTS[:5])
+        ports = top_ports(len(TOP_PORTS) + 50)
+        self.assertEqual(len(ports), len(set(ports)))
+        self.assertEqual(len(ports), len(TOP_PORTS) + 50)
+        self.assertEqual(parse_ports('22, 80,8000-8002,80'), [22, 80, 8000, 8001, 8002])
+        with self.assertRaises(ValueError):
+            parse_ports('0-2')
+
+    def test_banner_read_on_confirming_connection(self):
+        """Une seule connexion par port ouvert, bannière lue dessus"""
+        import socket
+        import threading
+        from modules.port_scanner import PortScanner
+
+        server = socket.socket()
+        server.bind(('127.0.0.1', 0))
+        server.listen(8)
+        open_port = server.getsockname()[1]
+        accepted = []
+
+        def serve():
+            while True:
+                try:
+                    conn, _ = server.accept()
+                except OSError:
+                    return
+                accepted.append(conn)
+                conn.sendall(b'SSH-2.0-Test\r\n')
+                conn.close()
+
+        threading.Thread(target=serve, daemon=True).start()
+        closed = socket.socket()
+        closed.bind(('127.0.0.1', 0))
+        closed_port = closed.getsockname()[1]
+        closed.close()
+
+        try:
+            results = PortScanner(concurrency=4, timeout=1, banner_timeout=1, rate=100).scan(
+                '127.0.0.1', [closed_port, open_port])
+        finally:
+            server.close()
+        self.assertEqual([r['port'] for r in results], [open_port])
+        self.assertEqual(results[0]['banner'], 'SSH-2.0-Test')
+        self.assertEqual(len(accepted), 1)
+
+    def test_host_resolved_once(self):
+        """Un seul getaddrinfo par hôte, quel que soit le nombre de ports"""
+        import socket
+        from modules.port_scanner import PortScanner
+
+        real_getaddrinfo = socket.getaddrinfo
+        with patch('socket.getaddrinfo', side_effect=real_getaddrinfo) as getaddrinfo:
+            PortScanner(concurrency=50, timeout=0.5).scan('localhost', '1-200')
+        self.assertEqual(getaddrinfo.call_count, 1)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -2,22 +2,6 @@
 Utils module - Utilitaires généraux
 """
 
-from utils.formatter import (
-    format_results,
-    create_results_table,
-    export_json,
-    export_csv,
-)
-from utils.logger import setup_logging, get_logger
-from utils.helpers import (
-    get_random_user_agent,
-    sanitize_string,
-    is_valid_email_format,
-    extract_domain,
-    hash_string,
-    flatten_dict,
-)
-
 __all__ = [
     'format_results',
     'create_results_table',
@@ -31,4 +15,34 @@ __all__ = [
     'extract_domain',
     'hash_string',
     'flatten_dict',
+    'IdentifierExtractor',
+    'extract_identifiers',
 ]
+
+_EXPORTS = {
+    'format_results': 'utils.formatter',
+    'create_results_table': 'utils.formatter',
+    'export_json': 'utils.formatter',
+    'export_csv': 'utils.formatter',
+    'setup_logging': 'utils.logger',
+    'get_logger': 'utils.logger',
+    'get_random_user_agent': 'utils.helpers',
+    'sanitize_string': 'utils.helpers',
+    'is_valid_email_format': 'utils.helpers',
+    'extract_domain': 'utils.helpers',
+    'hash_string': 'utils.helpers',
+    'flatten_dict': 'utils.helpers',
+    'IdentifierExtractor': 'utils.extractor',
+    'extract_identifiers': 'utils.extractor',
+}
+
+
+def __getattr__(name):
+    # Import au premier accès : `import utils.formatter` ne charge pas
+    # fake_useragent ni phonenumbers
+    if name in _EXPORTS:
+        import importlib
+        value = getattr(importlib.import_module(_EXPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+extractor.py - Extraction d'identifiants en un seul passage
+Emails, URLs, IPs, domaines et pseudos via un motif de jetons précompilé,
+téléphones validés par phonenumbers ; dédupliqués au fil du flux
+"""
+
+import re
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import phonenumbers
+
+KINDS = ('emails', 'phones', 'urls', 'ips', 'domains', 'handles')
+
+_OCTET = r'(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)'
+_DELIMS = r'\s<>"\'`\[\](),;{}|'
+
+# Passage unique : seuls les jetons contenant '.' ou '@' sont candidats
+# (emails, URLs, IPs, domaines, pseudos) ; ancrés en début de jeton, chaque
+# segment se terminant par '.' ou '@' : le retour arrière reste linéaire
+# (sans quantificateurs possessifs, indisponibles avant Python 3.11)
+CANDIDATE_PATTERN = re.compile(rf'(?<![^{_DELIMS}])(?:[^{_DELIMS}.@]*[.@])+[^{_DELIMS}]*')
+# Suites de chiffres pouvant être un numéro, validées ensuite par phonenumbers
+PHONE_CANDIDATE_PATTERN = re.compile(r'(?<![\w+.])\+?\(?\d[\d\s()-]{5,18}\d(?!\w)')
+
+URL_RE = re.compile(r'https?://[^\s<>"\'`]+', re.IGNORECASE)
+EMAIL_RE = re.compile(r'[A-Za-z0-9._%+-]+@(?:[A-Za-z0-9-]+\.)+[A-Za-z]{2,24}(?![\w-])')
+IP_RE = re.compile(rf'(?:{_OCTET}\.){{3}}{_OCTET}')
+HANDLE_RE = re.compile(r'@([A-Za-z0-9_]{2,30})')
+DOMAIN_RE = re.compile(r'(?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z]{2,24}')
+_NON_DIGITS = re.compile(r'[^\d+]')
+
+# Extensions de fichiers qui ressemblent à des TLD
+FILE_EXTENSIONS = frozenset({
+    'html', 'htm', 'php', 'asp', 'aspx', 'jsp', 'js', 'css', 'json', 'xml', 'txt', 'csv',
+    'png', 'jpg', 'jpeg', 'gif', 'svg', 'ico', 'webp', 'pdf', 'zip', 'gz', 'tar', 'py',
+    'exe', 'dll', 'log', 'md', 'yaml', 'yml', 'ini', 'conf', 'sh', 'bak', 'sql', 'db',
+})
+
+_TRAILING = '.,;:!?)]}\'"'
+
+
+class IdentifierExtractor:
+    """Extracteur incrémental : feed() renvoie uniquement les nouveaux identifiants
+
+    Les textes longs (sortie d'outil, fichiers) sont traités par morceaux ;
+    la fin de chaque morceau après le dernier saut de ligne est reportée
+    au suivant pour ne pas couper un identifiant.
+    """
+
+    def __init__(self, kinds: Iterable[str] = KINDS, region: Optional[str] = "FR"):
+        self.kinds = set(kinds)
+        self.region = region
+        self.seen: Dict[str, Dict[str, None]] = {kind: {} for kind in KINDS}
+        # Jetons et numéros déjà classés : les répétitions ne coûtent qu'un lookup
+        self._tokens = set()
+        self._phone_keys = set()
+        self._carry = ''
+
+    def _add(self, kind: str, value: str, new: List[Tuple[str, str]]) -> None:
+        if kind in self.kinds and value not in self.seen[kind]:
+            self.seen[kind][value] = None
+            new.append((kind, value))
+
+    def _classify(self, token: str, new: List[Tuple[str, str]]) -> None:
+        """Classer un jeton candidat (contient '.' ou '@')"""
+        if '://' in token:
+            match = URL_RE.search(token)
+            if match:
+                url = match.group().rstrip(_TRAILING)
+                self._add('urls', url, new)
+                host = (urlsplit(url).hostname or '').lower()
+                if host and not IP_RE.fullmatch(host):
+                    self._add('domains', host, new)
+                return
+
+        if '@' in token:
+            match = EMAIL_RE.search(token)
+            if match:
+                email = match.group().lower()
+                self._add('emails', email, new)
+                self._add('domains', email.rsplit('@', 1)[1], new)
+            elif token[0] == '@':
+                match = HANDLE_RE.match(token)
+                if match and len(match.group()) == len(token.rstrip(_TRAILING)):
+                    self._add('handles', match.group(1).lower(), new)
+            return
+
+        host = token.split('/', 1)[0].split(':', 1)[0].rstrip(_TRAILING)
+        if IP_RE.fullmatch(host):
+            self._add('ips', host, new)
+        elif DOMAIN_RE.fullmatch(host) and host.rsplit('.', 1)[1].lower() not in FILE_EXTENSIONS:
+            self._add('domains', host.lower(), new)
+
+    def _scan(self, text: str) -> List[Tuple[str, str]]:
+        new: List[Tuple[str, str]] = []
+        tokens = self._tokens
+        for token in CANDIDATE_PATTERN.findall(text):
+            if token not in tokens:
+                tokens.add(token)
+                self._classify(token, new)
+
+        if 'phones' in self.kinds:
+            keys = self._phone_keys
+            for candidate in PHONE_CANDIDATE_PATTERN.findall(text):
+                key = _NON_DIGITS.sub('', candidate)
+                if key in keys:
+                    continue
+                keys.add(key)
+                if not 8 <= len(key.lstrip('+')) <= 15:
+                    continue
+                try:
+                    number = phonenumbers.parse(key, self.region)
+                except phonenumbers.NumberParseException:
+                    continue
+                if phonenumbers.is_valid_number(number):
+                    self._add('phones', phonenumbers.format_number(number, phonenumbers.PhoneNumberFormat.E164), new)
+        return new
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        """Traiter un morceau de flux ; renvoie les (type, valeur) jamais vus"""
+        text = self._carry + chunk
+        cut = text.rfind('\n') + 1
+        if cut == 0 and len(text) > 65536:
+            cut = max(text.rfind(' '), 0) + 1
+        self._carry = text[cut:]
+        return self._scan(text[:cut]) if cut else []
+
+    def flush(self) -> List[Tuple[str, str]]:
+        """Traiter le reliquat en fin de flux"""
+        text, self._carry = self._carry, ''
+        return self._scan(text) if text else []
+
+    def results(self) -> Dict[str, List[str]]:
+        """Identifiants collectés par type (ordre de première apparition)"""
+        return {kind: list(self.seen[kind]) for kind in KINDS if kind in self.kinds}
+
+
+def extract_identifiers(text: str, kinds: Iterable[str] = KINDS, region: Optional[str] = "FR") -> Dict[str, List[str]]:
+    """Extraire et dédupliquer les identifiants d'un texte"""
+    extractor = IdentifierExtractor(kinds, region)
+    extractor.feed(text)
+    extractor.flush()
+    return extractor.results()
+
+
+def extract_from_stream(chunks: Iterable[str], kinds: Iterable[str] = KINDS,
+                        region: Optional[str] = "FR") -> Iterator[Tuple[str, str]]:
+    """Générer les nouveaux identifiants au fil d'un flux de texte"""
+    extractor = IdentifierExtractor(kinds, region)
+    for chunk in chunks:
+        yield from extractor.feed(chunk)
+    yield from extractor.flush()
+
+
+def extract_from_file(path: str, kinds: Iterable[str] = KINDS, region: Optional[str] = "FR",
+                      chunk_size: int = 1024 * 1024) -> Dict[str, List[str]]:
+    """Extraire les identifiants d'un fichier volumineux, par morceaux"""
+    extractor = IdentifierExtractor(kinds, region)
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            extractor.feed(chunk)
+    extractor.flush()
+    return extractor.results()
+
+
+def in_domain(host: str, domain: str) -> bool:
+    """host est-il le domaine ou l'un de ses sous-domaines"""
+    host, domain = host.lower(), domain.lower()
+    return host == domain or host.endswith('.' + domain)
+
+
+def benchmark(text: str = None, rounds: int = 5) -> Dict[str, float]:
+    """Micro-benchmark : regex dispersées recompilées vs passage unique (Mo/s)"""
+    if text is None:
+        line = ("2024-01-01 host mail{i}.example.com [10.0.{m}.{n}] contact john.doe{i}@example.com "
+                "see https://example.com/u/{i}?ref=x or @user_{i} call +33 6 12 34 {m:02d} {n:02d}\n")
+        text = ''.join(line.format(i=i, m=i % 100, n=i % 97) for i in range(20000))
+    size_mb = len(text.encode('utf-8')) / 1024 / 1024
+
+    def legacy():
+        re.findall(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', text)
+        re.findall(r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b', text)
+        re.findall(r'[\w\.-]+\.' + re.escape('example.com'), text)
+        re.findall(r'https?://[^\s]+', text)
+        re.findall(r'[\+]?[(]?[0-9]{1,4}[)]?[-\s\.]?[(]?[0-9]{1,4}[)]?[-\s\.]?[0-9]{1,5}[-\s\.]?[0-9]{1,5}', text)
+        re.purge()
+
+    timings = {}
+    for name, func in (('legacy_findall', legacy),
+                       ('single_pass', lambda: extract_identifiers(text, kinds=KINDS)),
+                       ('single_pass_no_phones', lambda: extract_identifiers(text, kinds=set(KINDS) - {'phones'}))):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            func()
+        timings[name] = round(size_mb * rounds / (time.perf_counter() - start), 2)
+    return timings
+
+
+if __name__ == '__main__':
+    import sys
+
+    sample = open(sys.argv[1], encoding='utf-8', errors='replace').read() if len(sys.argv) > 1 else None
+    for name, throughput in benchmark(sample).items():
+        print(f"{name:24s} {throughput:8.2f} Mo/s")
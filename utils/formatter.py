@@ -100,6 +100,15 @@ def format_email_results(results: Dict[str, Any]) -> str:
         output += f"  • SPF Configuré: {'✓' if dns.get('spf_configured') else '✗'}\n"
         output += f"  • DMARC Configuré: {'✓' if dns.get('dmarc_configured') else '✗'}\n"
         output += f"  • Domaine Valide: {'✓' if dns.get('valid_domain') else '✗'}\n"
+        security = dns.get('mail_security', {})
+        if security:
+            spf = security.get('spf', {})
+            dmarc = security.get('dmarc', {})
+            limit = ' [red](> 10 requêtes)[/red]' if spf.get('exceeds_lookup_limit') else ''
+            output += f"  • SPF: {spf.get('all_policy') or 'N/A'} - {spf.get('dns_lookups', 0)} requêtes DNS{limit}\n"
+            output += f"  • DMARC: p={dmarc.get('policy') or 'none'}\n"
+            output += f"  • MTA-STS: {security.get('mta_sts', {}).get('mode') or ('✓' if security.get('mta_sts', {}).get('configured') else '✗')}\n"
+            output += f"  • BIMI: {'✓' if security.get('bimi', {}).get('configured') else '✗'}\n"
         output += "\n"
     
     breaches = results.get('breaches', [])
@@ -8,15 +8,18 @@ import hashlib
 from typing import Any, Dict, List
 from urllib.parse import quote, unquote
 import random
-from fake_useragent import UserAgent
 
-# User agents
-ua = UserAgent()
+# User agents (fake_useragent chargé au premier appel)
+_ua = None
 
 def get_random_user_agent() -> str:
     """Obtenir un user agent aléatoire"""
+    global _ua
     try:
-        return ua.random
+        if _ua is None:
+            from fake_useragent import UserAgent
+            _ua = UserAgent()
+        return _ua.random
     except:
         agents = [
             'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36',
@@ -148,6 +151,6 @@ def is_url(s: str) -> bool:
     return bool(re.match(pattern, s))
 
 def extract_urls(text: str) -> List[str]:
-    """Extraire les URLs d'un texte"""
-    pattern = r'https?://[^\s]+'
-    return re.findall(pattern, text)
\ No newline at end of file
+    """Extraire les URLs d'un texte (dédupliquées)"""
+    from utils.extractor import extract_identifiers
+    return extract_identifiers(text, kinds=('urls',))['urls']
\ No newline at end of file